@@ -1,10 +1,16 @@
+import profiling
+profiling.begin_rerun("homepage")
+
 import streamlit as st
-import sqlite3
+import db
+import ticket_store
+import progress_store
+from migrations import migrate
 from langchain.agents import AgentExecutor
 from langchain_core.messages import HumanMessage, AIMessage
-from langchain.memory import ConversationBufferMemory
-from agents.mentor_agent import functions_agent, tools, _tool_create_session_request
-from utils import notifications_panel
+from agents.mentor_agent import get_functions_agent, get_llm, tools, _tool_create_session_request
+from agents.memory import ChatMemory, AgentMemory, llm_summarizer
+from utils import notifications_panel, metrics_panel
 import json
 from datetime import datetime,timezone
 import re
@@ -14,6 +20,10 @@ import difflib
 
 # --- Import onboarding chatbot ---
 from agents.onboarding_chatbot import query_gemini
+from agents.chat_dispatch import route_chat_turn
+from agents.streaming import TokenStream, StreamingCallbackHandler
+from agents.intent_router import TICKET_KEYWORDS, DOCUMENTS_TRIGGERS, SOFTWARE_TRIGGERS, MODULE_TRIGGERS
+profiling.mark("import")
 
 # --- Sidebar profile card ---
 def sidebar_profile(user):
@@ -50,29 +60,17 @@ for key, default in {
     "user": None,
     "all_messages": {},
     "memories": {},
+    "history_cursor": {},   # per-user id of the oldest loaded chat row (None = fully loaded)
+    "history_window": {},   # per-user number of messages rendered
     "last_mentors": None,
 }.items():
     if key not in st.session_state:
         st.session_state[key] = default
 
-DB_PATH = "mentormatch.db"
+DB_PATH = db.DB_PATH
 
 # ---------------------- Ticket intent detect --------------------
 
-TICKETS_CSV = os.getenv("TICKETS_CSV", "datasets/tickets.csv")
-TICKET_ROLE_COL = "role"
-TICKET_KEYWORDS = [
-    # core ticket words
-    "ticket", "ticket id", "tickets", "my ticket", "mytickets",
-    # synonyms
-    "helpdesk", "service desk", "support request", "support ticket", "issue report",
-    # actions
-    "raise a ticket", "create ticket", "open ticket", "submit ticket", "file a ticket",
-    # departments
-    "hr help", "hr ticket", "it ticket", "technical issue", "tech support", "bug report",
-    # references
-    "case number", "incident", "incident id", "problem id", "service request", "req number"
-]
 def detect_ticket_intent(text: str) -> bool:
     if not text:
         return False
@@ -87,91 +85,81 @@ def extract_ticket_id(text: str):
     return int(m.group(1)) if m else None
 
 # ---------------- DB Helpers ----------------
-def _conn():
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
-
 def get_user_by_email(email: str):
-    con = _conn()
-    row = con.execute("SELECT * FROM users WHERE email=?", (email,)).fetchone()
-    con.close()
-    return dict(row) if row else None
-
-def ensure_tables():
-    con = _conn()
-    con.execute("""
-        CREATE TABLE IF NOT EXISTS chat_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_email TEXT NOT NULL,
-            role TEXT NOT NULL,     -- "user" or "assistant"
-            message TEXT NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    con.commit(); con.close()
-
-ensure_tables()
-
-# ------------------------ SQLite Tickets (sidebar) --------------
-def ensure_ticket_tables():
-    con = _conn()
-    con.execute("""
-        CREATE TABLE IF NOT EXISTS tickets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_email TEXT NOT NULL,
-            title TEXT NOT NULL,
-            status TEXT NOT NULL DEFAULT 'open',   -- open | in_progress | resolved | closed
-            details TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    con.commit(); con.close()
+    return db.query_one("SELECT * FROM users WHERE email=?", (email,))
 
-ensure_ticket_tables()
+# Schema (chat_history, sidebar tickets, indexes, ...) lives in migrations.py
+migrate()
 
 def get_tickets(user_email: str):
-    con = _conn()
-    rows = con.execute(
-        "SELECT id, title, status, created_at, updated_at FROM tickets WHERE user_email=? ORDER BY created_at DESC",
-        (user_email,)
-    ).fetchall()
-    con.close()
-    return [dict(r) for r in rows]
+    return ticket_store.list_tickets(requester_email=user_email)
 
 def get_ticket_counts(user_email: str):
-    con = _conn()
-    rows = con.execute("""
-        SELECT status, COUNT(*) AS cnt
-        FROM tickets
-        WHERE user_email=?
-        GROUP BY status
-    """, (user_email,)).fetchall()
-    con.close()
-    counts = {r["status"]: r["cnt"] for r in rows}
-    counts.setdefault("open", 0)
-    counts.setdefault("in_progress", 0)
-    counts.setdefault("resolved", 0)
-    counts.setdefault("closed", 0)
-    return counts
+    return ticket_store.status_counts(user_email)
 
 def save_message(user_email, role, message):
-    con = _conn()
-    con.execute(
+    row_id = db.execute(
         "INSERT INTO chat_history (user_email, role, message) VALUES (?,?,?)",
         (user_email, role, message),
     )
-    con.commit(); con.close()
-
-def load_chat_history(user_email):
-    con = _conn()
-    rows = con.execute(
-        "SELECT role, message FROM chat_history WHERE user_email=? ORDER BY created_at",
-        (user_email,),
-    ).fetchall()
-    con.close()
-    return [(r["role"], r["message"]) for r in rows]
+    # Feed the bounded conversation memory used by both chat backends
+    memory = st.session_state.memories.get(user_email)
+    if memory is not None:
+        memory.add(role, message, row_id)
+
+# Chat history is paged by id (keyset), newest first, and rendered in a window
+HISTORY_PAGE_SIZE = int(os.getenv("CHAT_HISTORY_PAGE", "50"))
+HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "30"))
+HISTORY_MAX_IN_MEMORY = int(os.getenv("CHAT_HISTORY_MAX", "200"))
+
+def load_chat_history(user_email, limit=HISTORY_PAGE_SIZE, before_id=None):
+    """Return up to `limit` messages older than `before_id` (default: the latest), oldest first."""
+    if before_id is None:
+        rows = db.query(
+            "SELECT id, role, message FROM chat_history WHERE user_email=? AND role != 'summary' ORDER BY id DESC LIMIT ?",
+            (user_email, limit),
+        )
+    else:
+        rows = db.query(
+            "SELECT id, role, message FROM chat_history WHERE user_email=? AND id < ? AND role != 'summary' ORDER BY id DESC LIMIT ?",
+            (user_email, before_id, limit),
+        )
+    rows.reverse()
+    return rows
+
+def _to_messages(rows):
+    return [HumanMessage(r["message"]) if r["role"] == "user" else AIMessage(r["message"]) for r in rows]
+
+def init_chat_history(user_email):
+    """Load the latest page of history into session state."""
+    rows = load_chat_history(user_email)
+    st.session_state.all_messages[user_email] = _to_messages(rows)
+    st.session_state.history_cursor[user_email] = rows[0]["id"] if len(rows) == HISTORY_PAGE_SIZE else None
+    st.session_state.history_window[user_email] = HISTORY_WINDOW
+
+def load_older_messages(user_email):
+    """Widen the rendered window by a page, fetching older rows from the DB when needed."""
+    msgs = st.session_state.all_messages[user_email]
+    window = st.session_state.history_window.get(user_email, HISTORY_WINDOW) + HISTORY_PAGE_SIZE
+    cursor = st.session_state.history_cursor.get(user_email)
+    if len(msgs) < window and cursor is not None:
+        rows = load_chat_history(user_email, limit=HISTORY_PAGE_SIZE, before_id=cursor)
+        msgs[:0] = _to_messages(rows)
+        st.session_state.history_cursor[user_email] = rows[0]["id"] if len(rows) == HISTORY_PAGE_SIZE else None
+    st.session_state.history_window[user_email] = window
+
+def trim_chat_history(user_email):
+    """Keep at most HISTORY_MAX_IN_MEMORY messages (or the widened window) in session state."""
+    msgs = st.session_state.all_messages.get(user_email, [])
+    cap = max(HISTORY_MAX_IN_MEMORY, st.session_state.history_window.get(user_email, HISTORY_WINDOW))
+    if len(msgs) <= cap:
+        return
+    del msgs[: len(msgs) - cap]
+    # In-memory messages are the newest rows, so the oldest kept one is `cap` rows back
+    st.session_state.history_cursor[user_email] = db.scalar(
+        "SELECT id FROM chat_history WHERE user_email=? AND role != 'summary' ORDER BY id DESC LIMIT 1 OFFSET ?",
+        (user_email, cap - 1),
+    )
 
 # ------------------------- Navigation helper --------------------
 def open_mytickets_page(focus_id: int | None = None, from_chat: bool = True):
@@ -193,61 +181,19 @@ def open_mytickets_page(focus_id: int | None = None, from_chat: bool = True):
 
             st.markdown(f"➡️ [Open MyTickets](pages/4_🎫_MyTickets.py{suffix})")
 
-# ------------------------- CSV helpers (NEW) --------------------
-def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-def _ensure_tickets_csv():
-    if not os.path.exists(TICKETS_CSV):
-        pd.DataFrame(columns=[
-            "id","title","description","status","priority","category_key",
-            "requester_email","assignee_email","created_at","updated_at", TICKET_ROLE_COL
-        ]).to_csv(TICKETS_CSV, index=False)
-
-def _load_tickets_csv() -> pd.DataFrame:
-    _ensure_tickets_csv()
-    try:
-        df = pd.read_csv(TICKETS_CSV)
-    except Exception:
-        df = pd.DataFrame(columns=[
-            "id","title","description","status","priority","category_key",
-            "requester_email","assignee_email","created_at","updated_at", TICKET_ROLE_COL
-        ])
-    if "id" in df.columns:
-        df["id"] = pd.to_numeric(df["id"], errors="coerce").fillna(0).astype(int)
-    if TICKET_ROLE_COL not in df.columns:
-        df[TICKET_ROLE_COL] = ""
-    return df
-
-def _save_tickets_csv(df: pd.DataFrame):
-    tmp = TICKETS_CSV + ".tmp"
-    df.to_csv(tmp, index=False)
-    os.replace(tmp, TICKETS_CSV)
-
-def _next_ticket_id(df: pd.DataFrame) -> int:
-    return (int(df["id"].max()) + 1) if (not df.empty and "id" in df.columns) else 1
-
+# ------------------------- Ticket store --------------------
 def create_ticket_via_chat(*, requester_email: str, title: str, description: str,
                            category_key: str, priority: str, assignee_email: str | None,
                            requester_role: str | None) -> int:
-    df = _load_tickets_csv()
-    new_id = _next_ticket_id(df)
-    row = {
-        "id": new_id,
-        "title": title.strip(),
-        "description": description.strip(),
-        "status": "NEW",
-        "priority": priority.strip().upper(),
-        "category_key": category_key.strip().lower(),
-        "requester_email": requester_email,
-        "assignee_email": (assignee_email or "").strip(),
-        "created_at": _now_iso(),
-        "updated_at": _now_iso(),
-        TICKET_ROLE_COL: (requester_role or "EMPLOYEE").upper()
-    }
-    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    _save_tickets_csv(df)
-    return new_id
+    return ticket_store.create_ticket(
+        requester_email=requester_email,
+        title=title,
+        description=description,
+        category_key=category_key,
+        priority=priority,
+        assignee_email=assignee_email or "",
+        role=requester_role or "EMPLOYEE",
+    )
 
 # ------------------------- Intake flow (NEW) --------------------
 def start_ticket_intake():
@@ -349,17 +295,14 @@ def handle_ticket_intake_input(user_text: str, requester_email: str, requester_r
 
 # --- NEW: fetch bookings as a mentee ---
 def get_bookings_as_mentee(user_email):
-    con = _conn()
-    rows = con.execute("""
+    return db.query("""
         SELECT s.id, s.start_utc, s.end_utc, s.status, s.location,
                u.name as mentor_name, u.email as mentor_email
         FROM sessions s
         JOIN users u ON u.id = s.mentor_id
         WHERE s.mentee_email=?
         ORDER BY s.start_utc DESC
-    """, (user_email,)).fetchall()
-    con.close()
-    return [dict(r) for r in rows]
+    """, (user_email,))
 
 # ------------------------- Natural language intent helpers (documents/software/modules) --------------------
 def _norm_text(t: str) -> str:
@@ -424,95 +367,32 @@ def wants_modules(t: str) -> bool:
 
 #NEWLY ADDED NEHA BELOW
 # ------------------------- Seed learning progress for all users (NEW) --------------------
-def seed_learning_progress_from_assignments(assignments_csv: str = "datasets/Employee Dataset1.csv",
-                                            progress_csv: str = "datasets/LearningProgress.csv") -> None:
-    """Ensure LearningProgress.csv has a row for each (email, assigned module).
-    Missing pairs are added with completed=False. Safe to call repeatedly (idempotent).
+def seed_learning_progress_from_assignments(assignments_csv: str = progress_store.ASSIGNMENTS_CSV) -> None:
+    """Ensure the progress store has a "module" row for each (email, assigned module).
+    Missing pairs are added with completed=False. Safe to call repeatedly (idempotent):
+    the work runs once per process and per version of the assignments file.
     """
     try:
-        # Load assignments
-        if not os.path.exists(assignments_csv):
-            return
-        df_assign = pd.read_csv(assignments_csv)
-        if "email" not in df_assign.columns or "Learning Modules" not in df_assign.columns:
-            return
-
-        # Build target rows from assignments
-        target_rows = []
-        for _, r in df_assign.iterrows():
-            email = str(r.get("email", "")).strip().lower()
-            mods_str = r.get("Learning Modules")
-            if not email:
-                continue
-            if pd.isna(mods_str):
-                continue
-            for m in str(mods_str).split(","):
-                mod = str(m).strip()
-                if mod:
-                    target_rows.append((email, mod))
-
-        # Load existing progress
-        if os.path.exists(progress_csv):
-            df_prog = pd.read_csv(progress_csv)
-        else:
-            df_prog = pd.DataFrame(columns=["email", "module", "completed"]) \
-                     .astype({"email": str, "module": str})
-
-        if not df_prog.empty:
-            df_prog["email"] = df_prog["email"].astype(str).str.strip().str.lower()
-            df_prog["module"] = df_prog["module"].astype(str).str.strip()
-        else:
-            # ensure correct dtypes
-            df_prog = pd.DataFrame(columns=["email", "module", "completed"]) \
-                     .astype({"email": str, "module": str})
-
-        existing = set(zip(df_prog["email"].tolist(), df_prog["module"].str.lower().tolist()))
-
-        new_rows = []
-        for email, mod in target_rows:
-            key = (email, mod.lower())
-            if key not in existing:
-                new_rows.append({"email": email, "module": mod, "completed": False})
-
-        if new_rows:
-            df_prog = pd.concat([df_prog, pd.DataFrame(new_rows)], ignore_index=True)
-            tmp = progress_csv + ".tmp"
-            df_prog.to_csv(tmp, index=False)
-            os.replace(tmp, progress_csv)
+        progress_store.seed_from_assignments(assignments_csv, kind="module", column="Learning Modules")
     except Exception:
         # Fail silently to avoid user-facing errors in chat; seeding is best-effort.
         pass
 
-# Run seeding once per app process/session
-if "_seed_progress_ran" not in st.session_state:
-    try:
-        seed_learning_progress_from_assignments()
-    except Exception:
-        pass
-    st.session_state["_seed_progress_ran"] = True
+seed_learning_progress_from_assignments()
 #NEWLY ADDED NEHA ABOVE
 
 # ------------------------- Learning modules UI (NEW) --------------------
 def show_required_learning_modules(user_email: str):
     """Render a tickable list of assigned learning modules for the logged-in user.
-    Persists updates to LearningProgress.csv.
+    Persists updates to the progress store (kind "module").
     """
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    emp_path = os.path.join(BASE_DIR, "datasets/Employee Dataset1.csv")
-    progress_path = os.path.join(BASE_DIR, "datasets/LearningProgress.csv")
-
-    # Load assignments for this user
+    # Assigned items + completion map for this user only (shared index, see progress_store)
     try:
-        df = pd.read_csv(emp_path)
-        df.columns = df.columns.str.strip()
-        df["email"] = df["email"].astype(str).str.strip().str.lower()
-        row = df[df["email"] == user_email.lower()]
-        if row.empty:
+        if not progress_store.assignments.known(user_email):
             with st.chat_message("assistant"):
                 st.info("I couldn't find your employee profile. Please check your login email.")
             return
-        mods_str = row.iloc[0].get("Learning Modules", "")
-        modules = [m.strip() for m in str(mods_str).split(",") if str(m).strip()]
+        modules, user_prog = progress_store.checklist(user_email, "module")
         if not modules:
             with st.chat_message("assistant"):
                 st.info("No learning modules assigned to your profile.")
@@ -522,22 +402,6 @@ def show_required_learning_modules(user_email: str):
             st.error(f"Couldn't load your assigned modules: {e}")
         return
 
-    # Load progress
-    if os.path.exists(progress_path):
-        prog = pd.read_csv(progress_path)
-    else:
-        prog = pd.DataFrame(columns=["email", "module", "completed"]) 
-    if not prog.empty:
-        prog["email"] = prog["email"].astype(str).str.strip().str.lower()
-        prog["module"] = prog["module"].astype(str).str.strip()
-        def _coerce_bool_series(s: pd.Series) -> pd.Series:
-            if s.dtype == bool:
-                return s
-            return s.apply(lambda v: str(v).strip().lower() in {"true","1","yes","y","t"})
-        prog["completed"] = _coerce_bool_series(prog.get("completed", pd.Series(dtype=bool)))
-
-    user_prog = {r["module"].strip().lower(): bool(r["completed"]) for _, r in prog[prog["email"] == user_email.lower()].iterrows()}
-
     with st.chat_message("assistant"):
         st.markdown("Here are your required learning modules. Tick what you’ve done and click Update.")
         with st.form(key=f"learning_mods_form_{user_email}"):
@@ -552,50 +416,13 @@ def show_required_learning_modules(user_email: str):
             submitted = st.form_submit_button("Update")
 
         if submitted:
-            # Upsert changes to CSV
-            for mod, val in checked_map.items():
-                if prog.empty:
-                    mask_any = False
-                else:
-                    mask_any = ((prog["email"] == user_email.lower()) & (prog["module"].str.lower() == mod.lower())).any()
-                if mask_any:
-                    mask = (prog["email"] == user_email.lower()) & (prog["module"].str.lower() == mod.lower())
-                    prog.loc[mask, "completed"] = bool(val)
-                else:
-                    prog = pd.concat([prog, pd.DataFrame([{ "email": user_email.lower(), "module": mod, "completed": bool(val)}])], ignore_index=True)
-
-            # Deduplicate by (email, module lowercased), keep the last occurrence (most recent)
-            if not prog.empty:
-                prog["email"] = prog["email"].astype(str).str.strip().str.lower()
-                prog["module"] = prog["module"].astype(str).str.strip()
-                prog["_module_norm"] = prog["module"].str.lower()
-                prog = prog.reset_index(drop=True)
-                prog = prog.drop_duplicates(subset=["email", "_module_norm"], keep="last")
-                prog = prog.drop(columns=["_module_norm"], errors="ignore")
-
-            tmp = progress_path + ".tmp"
-            prog.to_csv(tmp, index=False)
-            os.replace(tmp, progress_path)
-            # Ensure filesystem mtime changes so other pages (dashboard) detect updates for widget keys
-            try:
-                os.utime(progress_path, None)
-            except Exception:
-                pass
-
-            
+            # Only rows whose tick changed are written
+            progress_store.set_many(user_email, "module", checked_map)
 
             st.success(f"Saved. {completed_count}/{len(modules)} modules completed.")
             # Quick read-back to show what the dashboard will see
-            try:
-                _check = pd.read_csv(progress_path)
-                if not _check.empty:
-                    _check["email"] = _check["email"].astype(str).str.strip().str.lower()
-                    _check["module"] = _check["module"].astype(str).str.strip()
-                    _check_map = {r["module"].strip().lower(): bool(r.get("completed", False)) for _, r in _check[_check["email"] == user_email.lower()].iterrows()}
-                    done_now = [m for m in modules if _check_map.get(m.lower(), False)]
-                    st.caption("Now marked complete: " + (", ".join(done_now) if done_now else "None yet"))
-            except Exception:
-                pass
+            done_now = progress_store.completed_items(user_email, "module", modules)
+            st.caption("Now marked complete: " + (", ".join(done_now) if done_now else "None yet"))
             # Also append a brief assistant message to chat history DB
             msg = f"Updated your learning progress: {completed_count}/{len(modules)} completed."
             st.session_state.all_messages[user_email].append(AIMessage(msg))
@@ -614,24 +441,15 @@ def show_required_learning_modules(user_email: str):
 # ------------------------- Documents UI (NEW) --------------------
 def show_required_documents(user_email: str):
     """Render a tickable list of required documents for the logged-in user.
-    Persists updates to DocumentsProgress.csv.
+    Persists updates to the progress store (kind "document").
     """
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    emp_path = os.path.join(BASE_DIR, "datasets/Employee Dataset1.csv")
-    progress_path = os.path.join(BASE_DIR, "datasets/DocumentsProgress.csv")
-
-    # Load assignments for this user
+    # Assigned items + completion map for this user only (shared index, see progress_store)
     try:
-        df = pd.read_csv(emp_path)
-        df.columns = df.columns.str.strip()
-        df["email"] = df["email"].astype(str).str.strip().str.lower()
-        row = df[df["email"] == user_email.lower()]
-        if row.empty:
+        if not progress_store.assignments.known(user_email):
             with st.chat_message("assistant"):
                 st.info("I couldn't find your employee profile. Please check your login email.")
             return
-        docs_str = row.iloc[0].get("Documents to be signed", "")
-        documents = [m.strip() for m in str(docs_str).split(",") if str(m).strip()]
+        documents, user_prog = progress_store.checklist(user_email, "document")
         if not documents:
             with st.chat_message("assistant"):
                 st.info("No documents assigned to your profile.")
@@ -641,22 +459,6 @@ def show_required_documents(user_email: str):
             st.error(f"Couldn't load your required documents: {e}")
         return
 
-    # Load progress
-    if os.path.exists(progress_path):
-        prog = pd.read_csv(progress_path)
-    else:
-        prog = pd.DataFrame(columns=["email", "item", "completed"]) 
-    if not prog.empty:
-        prog["email"] = prog["email"].astype(str).str.strip().str.lower()
-        prog["item"] = prog["item"].astype(str).str.strip()
-        def _coerce_bool_series(s: pd.Series) -> pd.Series:
-            if s.dtype == bool:
-                return s
-            return s.apply(lambda v: str(v).strip().lower() in {"true","1","yes","y","t"})
-        prog["completed"] = _coerce_bool_series(prog.get("completed", pd.Series(dtype=bool)))
-
-    user_prog = {r["item"].strip().lower(): bool(r["completed"]) for _, r in prog[prog["email"] == user_email.lower()].iterrows()}
-
     with st.chat_message("assistant"):
         st.markdown("Here are your required documents. Tick what you’ve completed and click Update.")
         with st.form(key=f"docs_form_{user_email}"):
@@ -671,35 +473,7 @@ def show_required_documents(user_email: str):
             submitted = st.form_submit_button("Update")
 
         if submitted:
-            # Upsert changes to CSV
-            for doc, val in checked_map.items():
-                if prog.empty:
-                    mask_any = False
-                else:
-                    mask_any = ((prog["email"] == user_email.lower()) & (prog["item"].str.lower() == doc.lower())).any()
-                if mask_any:
-                    mask = (prog["email"] == user_email.lower()) & (prog["item"].str.lower() == doc.lower())
-                    prog.loc[mask, "completed"] = bool(val)
-                else:
-                    prog = pd.concat([prog, pd.DataFrame([{ "email": user_email.lower(), "item": doc, "completed": bool(val)}])], ignore_index=True)
-
-            # Deduplicate by (email, item lowercased)
-            if not prog.empty:
-                prog["email"] = prog["email"].astype(str).str.strip().str.lower()
-                prog["item"] = prog["item"].astype(str).str.strip()
-                prog["_item_norm"] = prog["item"].str.lower()
-                prog = prog.reset_index(drop=True)
-                prog = prog.drop_duplicates(subset=["email", "_item_norm"], keep="last")
-                prog = prog.drop(columns=["_item_norm"], errors="ignore")
-
-            tmp = progress_path + ".tmp"
-            prog.to_csv(tmp, index=False)
-            os.replace(tmp, progress_path)
-            try:
-                os.utime(progress_path, None)
-            except Exception:
-                pass
-
+            progress_store.set_many(user_email, "document", checked_map)
 
             st.success(f"Saved. {completed_count}/{len(documents)} documents completed.")
 
@@ -714,24 +488,15 @@ def show_required_documents(user_email: str):
 # ------------------------- Software UI (NEW) --------------------
 def show_required_software(user_email: str):
     """Render a tickable list of required software to install for the user.
-    Persists updates to InstallProgress.csv.
+    Persists updates to the progress store (kind "software").
     """
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    emp_path = os.path.join(BASE_DIR, "datasets/Employee Dataset1.csv")
-    progress_path = os.path.join(BASE_DIR, "datasets/InstallProgress.csv")
-
-    # Load assignments
+    # Assigned items + completion map for this user only (shared index, see progress_store)
     try:
-        df = pd.read_csv(emp_path)
-        df.columns = df.columns.str.strip()
-        df["email"] = df["email"].astype(str).str.strip().str.lower()
-        row = df[df["email"] == user_email.lower()]
-        if row.empty:
+        if not progress_store.assignments.known(user_email):
             with st.chat_message("assistant"):
                 st.info("I couldn't find your employee profile. Please check your login email.")
             return
-        sw_str = row.iloc[0].get("To Install", "")
-        softwares = [m.strip() for m in str(sw_str).split(",") if str(m).strip()]
+        softwares, user_prog = progress_store.checklist(user_email, "software")
         if not softwares:
             with st.chat_message("assistant"):
                 st.info("No required software found for your profile.")
@@ -741,22 +506,6 @@ def show_required_software(user_email: str):
             st.error(f"Couldn't load your required software: {e}")
         return
 
-    # Load progress
-    if os.path.exists(progress_path):
-        prog = pd.read_csv(progress_path)
-    else:
-        prog = pd.DataFrame(columns=["email", "item", "completed"]) 
-    if not prog.empty:
-        prog["email"] = prog["email"].astype(str).str.strip().str.lower()
-        prog["item"] = prog["item"].astype(str).str.strip()
-        def _coerce_bool_series(s: pd.Series) -> pd.Series:
-            if s.dtype == bool:
-                return s
-            return s.apply(lambda v: str(v).strip().lower() in {"true","1","yes","y","t"})
-        prog["completed"] = _coerce_bool_series(prog.get("completed", pd.Series(dtype=bool)))
-
-    user_prog = {r["item"].strip().lower(): bool(r["completed"]) for _, r in prog[prog["email"] == user_email.lower()].iterrows()}
-
     with st.chat_message("assistant"):
         st.markdown("Here are your required software. Tick what you’ve installed and click Update.")
         with st.form(key=f"sw_form_{user_email}"):
@@ -771,32 +520,7 @@ def show_required_software(user_email: str):
             submitted = st.form_submit_button("Update")
 
         if submitted:
-            for sw, val in checked_map.items():
-                if prog.empty:
-                    mask_any = False
-                else:
-                    mask_any = ((prog["email"] == user_email.lower()) & (prog["item"].str.lower() == sw.lower())).any()
-                if mask_any:
-                    mask = (prog["email"] == user_email.lower()) & (prog["item"].str.lower() == sw.lower())
-                    prog.loc[mask, "completed"] = bool(val)
-                else:
-                    prog = pd.concat([prog, pd.DataFrame([{ "email": user_email.lower(), "item": sw, "completed": bool(val)}])], ignore_index=True)
-
-            if not prog.empty:
-                prog["email"] = prog["email"].astype(str).str.strip().str.lower()
-                prog["item"] = prog["item"].astype(str).str.strip()
-                prog["_item_norm"] = prog["item"].str.lower()
-                prog = prog.reset_index(drop=True)
-                prog = prog.drop_duplicates(subset=["email", "_item_norm"], keep="last")
-                prog = prog.drop(columns=["_item_norm"], errors="ignore")
-
-            tmp = progress_path + ".tmp"
-            prog.to_csv(tmp, index=False)
-            os.replace(tmp, progress_path)
-            try:
-                os.utime(progress_path, None)
-            except Exception:
-                pass
+            progress_store.set_many(user_email, "software", checked_map)
 
             st.success(f"Saved. {completed_count}/{len(softwares)} software installed.")
             # Auto-collapse the pinned UI immediately after update
@@ -848,26 +572,19 @@ if not st.session_state.user:
 
             user_email = user["email"]
 
-            # --- Load chat history from DB ---
-            past = load_chat_history(user_email)
-            st.session_state.all_messages[user_email] = []
-            for role, msg in past:
-                if role == "user":
-                    st.session_state.all_messages[user_email].append(HumanMessage(msg))
-                else:
-                    st.session_state.all_messages[user_email].append(AIMessage(msg))
+            # --- Load the latest page of chat history from DB ---
+            init_chat_history(user_email)
 
-            # --- Init memory ---
+            # --- Init memory: last K turns + persisted rolling summary ---
             if user_email not in st.session_state.memories:
-                st.session_state.memories[user_email] = ConversationBufferMemory(
-                    memory_key="chat_history",
-                    return_messages=True,
+                st.session_state.memories[user_email] = ChatMemory.load(
+                    user_email, summarize=llm_summarizer(get_llm())
                 )
 
             st.session_state.user_agent = AgentExecutor(
-                agent=functions_agent,
+                agent=get_functions_agent(),
                 tools=tools,
-                memory=st.session_state.memories[user_email],
+                memory=AgentMemory(chat=st.session_state.memories[user_email]),
                 verbose=True,
             )
             st.rerun()
@@ -882,6 +599,8 @@ else:
     sidebar_profile(st.session_state.user)
     # Sidebar notifications
     notifications_panel(st.session_state.user)
+    metrics_panel()
+    profiling.profiling_panel(st.session_state.user)
 
     # Chatbot
     st.subheader(f"Hi {st.session_state.user['name']}, how can I help you today?")
@@ -890,6 +609,8 @@ else:
     if st.sidebar.button("🗑️ Clear Chat"):
         user_email = st.session_state.user["email"]
         st.session_state.all_messages[user_email] = []
+        st.session_state.history_cursor[user_email] = None
+        st.session_state.history_window[user_email] = HISTORY_WINDOW
         st.session_state.memories[user_email].clear()
         # Also collapse the pinned learning modules UI (Code 2) so it disappears
         st.session_state["show_learning_modules_ui"] = False
@@ -902,8 +623,15 @@ else:
         st.sidebar.success("Chat cleared from screen (history still saved).")
         st.rerun()
 
-    # Show chat history
-    for message in st.session_state.all_messages.get(user_email, []):
+    # Show chat history (only the latest window; older pages on demand)
+    trim_chat_history(user_email)
+    history = st.session_state.all_messages.setdefault(user_email, [])
+    window = st.session_state.history_window.get(user_email, HISTORY_WINDOW)
+    if len(history) > window or st.session_state.history_cursor.get(user_email) is not None:
+        if st.button("⬆️ Load older messages"):
+            load_older_messages(user_email)
+            st.rerun()
+    for message in history[-window:]:
         role = "user" if isinstance(message, HumanMessage) else "assistant"
         with st.chat_message(role):
             st.markdown(message.content)
@@ -990,14 +718,7 @@ else:
                 # --- Route: required learning modules for this user ---
                 lp = prompt.lower()
                 # Documents triggers
-                documents_triggers = [
-                    "documents to be signed",
-                    "documents to sign",
-                    "required documents",
-                    "show my documents",
-                    "what documents do i need",
-                ]
-                if any(t in lp for t in documents_triggers):
+                if any(t in lp for t in DOCUMENTS_TRIGGERS):
                     st.session_state["show_documents_ui"] = True
                     if not st.session_state.get("documents_ui_ack_sent"):
                         ack_msg = "Sure — here are your required documents below."
@@ -1009,14 +730,7 @@ else:
                     st.rerun()
 
                 # Software triggers
-                software_triggers = [
-                    "to install",
-                    "software to install",
-                    "apps to install",
-                    "required software",
-                    "what software do i need",
-                ]
-                if any(t in lp for t in software_triggers):
+                if any(t in lp for t in SOFTWARE_TRIGGERS):
                     st.session_state["show_software_ui"] = True
                     if not st.session_state.get("software_ui_ack_sent"):
                         ack_msg = "Sure — here are your required software below."
@@ -1027,15 +741,7 @@ else:
                         st.session_state["software_ui_ack_sent"] = True
                     st.rerun()
 
-                module_triggers = [
-                    "what modules do i need",
-                    "modules do i need to do",
-                    "required learning modules",
-                    "what learning modules",
-                    "modules to complete",
-                    "what modules should i complete",
-                ]
-                if any(t in lp for t in module_triggers):
+                if any(t in lp for t in MODULE_TRIGGERS):
                     # Code 2 behavior: set sticky flags, send one-time ack, then rerun so UI renders at bottom
                     st.session_state["show_learning_modules_ui"] = True
                     if not st.session_state.get("modules_ui_ack_sent"):
@@ -1048,38 +754,33 @@ else:
                     st.rerun()
                 else:
                     # --- Routing logic for onboarding vs mentor agent ---
-                    chat_history = []
-                    for message in st.session_state.all_messages[user_email]:
-                        if isinstance(message, HumanMessage):
-                            chat_history.append(f"You: {message.content}")
-                        else:
-                            chat_history.append(f"Bot: {message.content}")
+                    chat_history = st.session_state.memories[user_email].lines()
 
-                    onboarding_response = query_gemini(prompt, chat_history=chat_history)
+                    # Intent router picks one backend; low-confidence turns run both concurrently
                     modified_prompt = f"(User email: {user_email}) {prompt}"
-                    result = st.session_state.user_agent.invoke({"input": modified_prompt})
-                    mentor_response = result["output"]
-                    try:
-                        mentors = eval(mentor_response)
-                    except Exception:
-                        mentors = None
-
-                    fallback_phrases = [
-                        "I am sorry", "I cannot answer", "I don't know", "not able to", "cannot help"
-                    ]
-                    def is_fallback(resp):
-                        return any(phrase in resp.lower() for phrase in fallback_phrases)
-
-                    if mentors and isinstance(mentors, list) and all("name" in m for m in mentors):
-                        final_response = "Here are some mentors you can choose 👇"
-                        st.session_state.last_mentors = mentors
-                    elif not is_fallback(onboarding_response) and onboarding_response.strip() != "":
-                        final_response = onboarding_response
-                    else:
-                        final_response = mentor_response
-
+                    user_agent = st.session_state.user_agent
                     with st.chat_message("assistant"):
-                        st.markdown(final_response)
+                        # Tokens are rendered as they arrive; the final answer replaces them
+                        placeholder = st.empty()
+                        stream = TokenStream(lambda text: placeholder.markdown(text + "▌"), name="chat")
+                        invoke_agent = profiling.timed("llm", "agent.invoke")(user_agent.invoke)
+                        turn = route_chat_turn(
+                            prompt,
+                            lambda on_token=None: query_gemini(
+                                prompt, chat_history=chat_history, user_email=user_email, on_token=on_token
+                            ),
+                            lambda on_token=None: invoke_agent(
+                                {"input": modified_prompt},
+                                config={"callbacks": [StreamingCallbackHandler(on_token)]} if on_token else None,
+                            )["output"],
+                            stream=stream,
+                        )
+                        stream.finish()
+                        final_response = turn["response"]
+                        mentors = turn["mentors"]
+                        if mentors:
+                            st.session_state.last_mentors = mentors
+                        placeholder.markdown(final_response)
 
                     st.session_state.all_messages[user_email].append(
                         AIMessage(final_response if not mentors else "Mentor options displayed.")
@@ -1111,15 +812,8 @@ else:
 
             if completed_module:
                 # Try to resolve to one of the user's assigned modules
-                BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-                assigned_path = os.path.join(BASE_DIR, "datasets/Employee Dataset1.csv")
-                assigned_modules: list[str] = []
                 try:
-                    df_emp = pd.read_csv(assigned_path)
-                    row = df_emp[df_emp["email"].astype(str).str.strip().str.lower() == user_email.lower()]
-                    if not row.empty and "Learning Modules" in df_emp.columns:
-                        mods_str = str(row.iloc[0]["Learning Modules"]) if not pd.isna(row.iloc[0]["Learning Modules"]) else ""
-                        assigned_modules = [m.strip() for m in mods_str.split(",") if str(m).strip()]
+                    assigned_modules = progress_store.assignments.items(user_email, "module")
                 except Exception:
                     assigned_modules = []
 
@@ -1135,47 +829,8 @@ else:
                         if match_l:
                             canonical_module = lower_map[match_l[0]]
 
-                # Path to progress CSV (must match dashboard)
-                progress_path = os.path.join(BASE_DIR, "datasets/LearningProgress.csv")
-                # Load or create progress CSV
-                if os.path.exists(progress_path):
-                    progress_df = pd.read_csv(progress_path)
-                else:
-                    progress_df = pd.DataFrame(columns=["email", "module", "completed"])
-                # Normalize
-                if not progress_df.empty:
-                    progress_df["email"] = progress_df["email"].astype(str).str.strip().str.lower()
-                    progress_df["module"] = progress_df["module"].astype(str).str.strip()
-                # Update or add the completed module for this user
-                if progress_df.empty:
-                    mask_any = False
-                else:
-                    mask_any = ((progress_df["email"] == user_email.lower()) & (progress_df["module"].str.lower() == canonical_module.lower())).any()
-                if mask_any:
-                    mask = (progress_df["email"] == user_email.lower()) & (progress_df["module"].str.lower() == canonical_module.lower())
-                    progress_df.loc[mask, "completed"] = True
-                else:
-                    progress_df = pd.concat([
-                        progress_df,
-                        pd.DataFrame([{ "email": user_email.lower(), "module": canonical_module, "completed": True }])
-                    ], ignore_index=True)
-                # Deduplicate by (email, module lowercased), keep the last occurrence
-                if not progress_df.empty:
-                    progress_df["email"] = progress_df["email"].astype(str).str.strip().str.lower()
-                    progress_df["module"] = progress_df["module"].astype(str).str.strip()
-                    progress_df["_module_norm"] = progress_df["module"].str.lower()
-                    progress_df = progress_df.reset_index(drop=True)
-                    progress_df = progress_df.drop_duplicates(subset=["email", "_module_norm"], keep="last")
-                    progress_df = progress_df.drop(columns=["_module_norm"], errors="ignore")
-
-                # Atomic write + mtime bump so dashboard refreshes widget keys
-                tmp = progress_path + ".tmp"
-                progress_df.to_csv(tmp, index=False)
-                os.replace(tmp, progress_path)
-                try:
-                    os.utime(progress_path, None)
-                except Exception:
-                    pass
+                # Same store the dashboard reads
+                progress_store.set_progress(user_email, "module", canonical_module, True)
 
                 # Confirm to the user
                 confirm_msg = f"✅ Noted. Marked ‘{canonical_module}’ as completed. It will appear ticked under Required Learning Modules on your dashboard."
@@ -1249,4 +904,6 @@ else:
     if st.session_state.get("show_documents_ui"):
         show_required_documents(user_email)
     if st.session_state.get("show_software_ui"):
-        show_required_software(user_email)
\ No newline at end of file
+        show_required_software(user_email)
+
+profiling.end_rerun()
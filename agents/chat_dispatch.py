@@ -0,0 +1,135 @@
+import ast
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import metrics
+from agents.intent_router import route
+
+# ----------------------------
+# Concurrent dispatch for a chat turn
+# ----------------------------
+# Both backends are plain blocking calls (Gemini over HTTP), so a small shared
+# thread pool is enough to overlap them. The pool lives for the whole process
+# and is shared by every Streamlit session.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="chat-dispatch")
+
+FALLBACK_PHRASES = [
+    "I am sorry", "I cannot answer", "I don't know", "not able to", "cannot help"
+]
+
+
+def is_fallback(resp: str) -> bool:
+    return any(phrase.lower() in (resp or "").lower() for phrase in FALLBACK_PHRASES)
+
+
+def parse_mentor_list(resp: str):
+    """Return the mentor list from a `search_with_availability` tool output, else None."""
+    try:
+        mentors = ast.literal_eval(resp)
+    except Exception:
+        return None
+    if mentors and isinstance(mentors, list) and all(isinstance(m, dict) and "name" in m for m in mentors):
+        return mentors
+    return None
+
+
+def _result_or_none(future):
+    try:
+        return future.result(), None
+    except Exception as e:
+        return None, e
+
+
+def select_response(onboarding_response: str | None, mentor_response: str | None):
+    """Pick the answer for a chat turn.
+
+    A mentor list always wins, then a non-fallback onboarding answer,
+    otherwise whatever the MentorMatch agent said.
+    """
+    mentors = parse_mentor_list(mentor_response) if mentor_response else None
+    if mentors:
+        return {"response": "Here are some mentors you can choose 👇", "mentors": mentors, "source": "mentor"}
+    if onboarding_response and onboarding_response.strip() != "" and not is_fallback(onboarding_response):
+        return {"response": onboarding_response, "mentors": None, "source": "onboarding"}
+    return {"response": mentor_response or "", "mentors": None, "source": "mentor"}
+
+
+def dispatch_chat_turn(onboarding_call, mentor_call, timeout: float | None = None):
+    """Run the onboarding call and the MentorMatch agent call concurrently.
+
+    `onboarding_call` and `mentor_call` are zero-argument callables returning text.
+    Returns {"response", "mentors", "source"} as soon as the selection is decided:
+    if the agent comes back first with a mentor list the onboarding call is
+    cancelled (or, if already running, its result is ignored).
+    """
+    onboarding_f = _executor.submit(onboarding_call)
+    mentor_f = _executor.submit(mentor_call)
+    pending = {onboarding_f, mentor_f}
+
+    while pending:
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            # Timed out: decide with whatever has arrived so far
+            break
+        if mentor_f in done:
+            mentor_response, _ = _result_or_none(mentor_f)
+            if parse_mentor_list(mentor_response or ""):
+                onboarding_f.cancel()
+                return select_response(None, mentor_response)
+
+    onboarding_response, onboarding_err = _result_or_none(onboarding_f) if onboarding_f.done() else (None, None)
+    mentor_response, mentor_err = _result_or_none(mentor_f) if mentor_f.done() else (None, None)
+    for f in pending:
+        f.cancel()
+
+    if onboarding_response is None and mentor_response is None:
+        err = mentor_err or onboarding_err
+        if err:
+            raise err
+        raise TimeoutError("No chatbot backend answered in time.")
+    return select_response(onboarding_response, mentor_response)
+
+
+def _call_or_none(call):
+    try:
+        return call()
+    except Exception:
+        return None
+
+
+def route_chat_turn(prompt: str, onboarding_call, mentor_call, stream=None):
+    """Send a chat turn to the backend picked by the intent router.
+
+    Only one backend is called when the router is confident; the other one is
+    consulted only if the first answer is a fallback (or fails). Low-confidence
+    turns go to both backends concurrently via `dispatch_chat_turn`.
+
+    The calls take an optional `on_token` callback; when `stream` (a
+    TokenStream) is given, single-backend turns stream their answer into it.
+    Concurrent turns are not streamed.
+    """
+    def call(fn):
+        return _call_or_none(lambda: fn(on_token=stream) if stream is not None else fn())
+
+    def escalate(fn):
+        metrics.incr("router.fallback_escalated")
+        if stream is not None:
+            stream.reset()
+        return call(fn)
+
+    decision = route(prompt)
+    if decision["escalate"]:
+        turn = dispatch_chat_turn(onboarding_call, mentor_call)
+    elif decision["backend"] == "mentor":
+        mentor_response = call(mentor_call)
+        turn = select_response(None, mentor_response)
+        if not turn["mentors"] and (not (mentor_response or "").strip() or is_fallback(mentor_response)):
+            turn = select_response(escalate(onboarding_call), mentor_response)
+    else:
+        onboarding_response = call(onboarding_call)
+        if not (onboarding_response or "").strip() or is_fallback(onboarding_response):
+            turn = select_response(onboarding_response, escalate(mentor_call))
+        else:
+            turn = select_response(onboarding_response, None)
+    metrics.incr(f"router.answered_by.{turn['source']}")
+    turn["route"] = decision
+    return turn
@@ -0,0 +1,144 @@
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import db
+import metrics
+from migrations import migrate
+
+# ----------------------------
+# Query-embedding cache
+# ----------------------------
+# Wraps an embeddings client (GoogleGenerativeAIEmbeddings) so repeated queries
+# such as "python mentor" or "SAP BTP" are embedded once per TTL. The in-memory
+# LRU is bounded by entry count and by vector bytes; the optional
+# `embedding_cache` table (see migrations.py) keeps warm entries across
+# Streamlit restarts.
+
+def normalize_query(text: str) -> str:
+    t = re.sub(r"\s+", " ", (text or "").strip().lower())
+    return t.strip(" .,!?;:")
+
+
+class CachedEmbeddings:
+    def __init__(self, inner, namespace: str = "", max_entries: int = 2048,
+                 max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 24 * 3600,
+                 db_path: str | None = None, max_db_rows: int = 20000):
+        self.inner = inner
+        self.namespace = namespace or getattr(inner, "model", "") or ""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.db_path = db_path
+        self.max_db_rows = max_db_rows
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (created_at, np.ndarray)
+        self._bytes = 0
+        if self.db_path:
+            migrate(self.db_path)
+
+    # --- SQLite backing ---
+    def _db(self):
+        return db.connect(self.db_path)
+
+    def _db_get(self, key: str):
+        row = self._db().execute("SELECT vector, created_at FROM embedding_cache WHERE key=?", (key,)).fetchone()
+        if not row or time.time() - row[1] > self.ttl:
+            return None
+        return row[1], np.frombuffer(row[0], dtype=np.float32)
+
+    def _db_put(self, key: str, text: str, vec: np.ndarray, created_at: float):
+        with db.transaction(self.db_path) as con:
+            con.execute(
+                "INSERT OR REPLACE INTO embedding_cache (key, text, vector, created_at) VALUES (?,?,?,?)",
+                (key, text, vec.tobytes(), created_at),
+            )
+            con.execute("DELETE FROM embedding_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            con.execute("""
+                DELETE FROM embedding_cache WHERE key IN (
+                    SELECT key FROM embedding_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_db_rows,))
+
+    # --- in-memory LRU ---
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.namespace}\0{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+    def _mem_get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] > self.ttl:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _mem_put(self, key: str, vec: np.ndarray, created_at: float):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (created_at, vec)
+            self._bytes += vec.nbytes
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                metrics.incr("embed_cache.evicted")
+
+    def _drop(self, key: str):
+        _, vec = self._entries.pop(key)
+        self._bytes -= vec.nbytes
+
+    # --- embeddings API ---
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vec = self._mem_get(key)
+        if vec is not None:
+            metrics.incr("embed_cache.hit")
+            return vec.tolist()
+
+        if self.db_path:
+            found = self._db_get(key)
+            if found is not None:
+                metrics.incr("embed_cache.hit")
+                metrics.incr("embed_cache.disk_hit")
+                self._mem_put(key, found[1], found[0])
+                return found[1].tolist()
+
+        metrics.incr("embed_cache.miss")
+        t0 = time.perf_counter()
+        vec = np.asarray(self.inner.embed_query(normalize_query(text)), dtype=np.float32)
+        metrics.observe("embed_cache.miss_latency_ms", (time.perf_counter() - t0) * 1000)
+
+        now = time.time()
+        self._mem_put(key, vec, now)
+        if self.db_path:
+            try:
+                self._db_put(key, normalize_query(text), vec, now)
+            except sqlite3.Error:
+                pass
+        return vec.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        # Documents (mentor profiles) are persisted by the mentor index instead
+        return self.inner.embed_documents(texts)
+
+    def stats(self) -> dict:
+        hits, misses = metrics.counter("embed_cache.hit"), metrics.counter("embed_cache.miss")
+        miss_ms = metrics.summary("embed_cache.miss_latency_ms")["mean"] or 0.0
+        with self._lock:
+            entries, nbytes = len(self._entries), self._bytes
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(metrics.ratio("embed_cache.hit", "embed_cache.miss"), 3),
+            "entries": entries,
+            "bytes": nbytes,
+            "saved_ms_estimate": round(hits * miss_ms, 1),
+        }
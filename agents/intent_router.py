@@ -0,0 +1,226 @@
+import os
+import re
+import json
+import math
+from collections import Counter
+
+import numpy as np
+
+import metrics
+
+# ----------------------------
+# Keyword lists (shared with the Homepage triggers)
+# ----------------------------
+TICKET_KEYWORDS = [
+    # core ticket words
+    "ticket", "ticket id", "tickets", "my ticket", "mytickets",
+    # synonyms
+    "helpdesk", "service desk", "support request", "support ticket", "issue report",
+    # actions
+    "raise a ticket", "create ticket", "open ticket", "submit ticket", "file a ticket",
+    # departments
+    "hr help", "hr ticket", "it ticket", "technical issue", "tech support", "bug report",
+    # references
+    "case number", "incident", "incident id", "problem id", "service request", "req number"
+]
+
+DOCUMENTS_TRIGGERS = [
+    "documents to be signed",
+    "documents to sign",
+    "required documents",
+    "show my documents",
+    "what documents do i need",
+]
+
+SOFTWARE_TRIGGERS = [
+    "to install",
+    "software to install",
+    "apps to install",
+    "required software",
+    "what software do i need",
+]
+
+MODULE_TRIGGERS = [
+    "what modules do i need",
+    "modules do i need to do",
+    "required learning modules",
+    "what learning modules",
+    "modules to complete",
+    "what modules should i complete",
+]
+
+BOOKING_PHRASES = ["my bookings", "past bookings"]
+
+MENTOR_PHRASES = [
+    "find a mentor", "find me a mentor", "mentor who knows", "looking for a mentor",
+    "mentor for", "mentors in", "who can mentor me", "mentorship",
+    "book a session", "book a meeting", "request a session", "schedule a session",
+    "approve session", "approve the request", "availability", "available slots",
+    "meetings today", "meetings tomorrow", "upcoming sessions", "my sessions",
+    "sessions this week", "meetings next week",
+]
+
+ONBOARDING_PHRASES = [
+    "office address", "where is the office", "office hours", "when does the office open",
+    "who is in my team", "my team members", "who are my teammates", "my manager",
+    "what is my position", "onboarding", "first day", "company policy", "dress code",
+    "email of", "what does my team do",
+]
+
+BACKENDS = ("onboarding", "mentor")
+
+# Substring keywords that strongly indicate one backend
+KEYWORDS = {
+    "onboarding": DOCUMENTS_TRIGGERS + SOFTWARE_TRIGGERS + MODULE_TRIGGERS + ONBOARDING_PHRASES + [
+        "document", "install", "module", "office", "team member", "teammate", "onboard",
+    ],
+    "mentor": BOOKING_PHRASES + MENTOR_PHRASES + [
+        "mentor", "booking", "book ", "session", "meeting", "approve", "slot",
+    ],
+}
+
+# Seed corpus: every keyword list doubles as labelled training text
+SEED_EXAMPLES = (
+    [(t, "onboarding") for t in DOCUMENTS_TRIGGERS + SOFTWARE_TRIGGERS + MODULE_TRIGGERS
+     + ONBOARDING_PHRASES + TICKET_KEYWORDS]
+    + [(t, "mentor") for t in BOOKING_PHRASES + MENTOR_PHRASES]
+)
+
+MODEL_PATH = os.getenv("INTENT_ROUTER_MODEL", os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_router.json"))
+
+# Below this confidence the turn is escalated to both backends
+CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.7"))
+_KEYWORD_WEIGHT = 0.4
+_TEMPERATURE = 8.0
+
+
+# ----------------------------
+# TF-IDF model (word unigrams + bigrams, one centroid per backend)
+# ----------------------------
+def _tokens(text: str) -> list[str]:
+    words = re.findall(r"[a-z0-9/+#.]+", (text or "").lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def train(examples) -> dict:
+    """Fit a TF-IDF centroid model on (text, backend) pairs."""
+    docs = [(Counter(_tokens(t)), label) for t, label in examples if label in BACKENDS]
+    df = Counter(term for tf, _ in docs for term in tf)
+    vocab = {term: i for i, term in enumerate(sorted(df))}
+    n = len(docs)
+    idf = np.array([math.log((1 + n) / (1 + df[t])) + 1.0 for t in sorted(df)])
+
+    centroids = {}
+    for label in BACKENDS:
+        acc = np.zeros(len(vocab))
+        for tf, lab in docs:
+            if lab == label:
+                acc += _vectorize(tf, vocab, idf)
+        norm = np.linalg.norm(acc)
+        centroids[label] = (acc / norm if norm else acc).tolist()
+    return {"vocab": vocab, "idf": idf.tolist(), "centroids": centroids}
+
+
+def _vectorize(tf: Counter, vocab: dict, idf: np.ndarray) -> np.ndarray:
+    vec = np.zeros(len(vocab))
+    for term, cnt in tf.items():
+        i = vocab.get(term)
+        if i is not None:
+            vec[i] = (1 + math.log(cnt)) * idf[i]
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def save_model(model: dict, path: str = MODEL_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model, f)
+
+
+def load_model(path: str = MODEL_PATH) -> dict:
+    """Load the offline-trained model, falling back to the seed corpus."""
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return train(SEED_EXAMPLES)
+
+
+_model = None
+_model_arrays = None
+
+
+def _get_model():
+    global _model, _model_arrays
+    if _model is None:
+        _model = load_model()
+        _model_arrays = (
+            np.asarray(_model["idf"]),
+            np.vstack([_model["centroids"][b] for b in BACKENDS]),
+        )
+    return _model, _model_arrays
+
+
+# ----------------------------
+# Routing
+# ----------------------------
+def keyword_scores(text: str) -> dict:
+    t = (text or "").lower()
+    return {b: sum(1 for k in KEYWORDS[b] if k in t) for b in BACKENDS}
+
+
+def classify(text: str) -> dict:
+    """Return {"backend", "confidence", "scores"} for a chat prompt."""
+    model, (idf, centroids) = _get_model()
+    vec = _vectorize(Counter(_tokens(text)), model["vocab"], idf)
+    sims = centroids @ vec
+
+    kw = keyword_scores(text)
+    scores = np.array([
+        (1 - _KEYWORD_WEIGHT) * sims[i] + _KEYWORD_WEIGHT * min(kw[b], 2) / 2
+        for i, b in enumerate(BACKENDS)
+    ])
+    probs = np.exp(_TEMPERATURE * scores)
+    probs /= probs.sum()
+    best = int(np.argmax(probs))
+    return {
+        "backend": BACKENDS[best],
+        "confidence": round(float(probs[best]), 3),
+        "scores": {b: round(float(s), 3) for b, s in zip(BACKENDS, scores)},
+    }
+
+
+def route(text: str) -> dict:
+    """Classify a prompt and decide whether it needs both backends.
+
+    Adds `escalate=True` when the confidence is below CONFIDENCE_THRESHOLD.
+    Every decision is recorded in `metrics` under the `router.` prefix.
+    """
+    decision = classify(text)
+    decision["escalate"] = decision["confidence"] < CONFIDENCE_THRESHOLD
+    metrics.incr(f"router.route.{decision['backend']}")
+    if decision["escalate"]:
+        metrics.incr("router.escalated")
+    metrics.observe("router.confidence", decision["confidence"])
+    return decision
+
+
+# ----------------------------
+# Offline training
+# ----------------------------
+if __name__ == "__main__":
+    import argparse
+    import csv
+
+    ap = argparse.ArgumentParser(description="Train the chat intent router.")
+    ap.add_argument("--data", help="Optional CSV with `text,label` columns (label: onboarding|mentor)")
+    ap.add_argument("--out", default=MODEL_PATH)
+    args = ap.parse_args()
+
+    examples = list(SEED_EXAMPLES)
+    if args.data:
+        with open(args.data, newline="", encoding="utf-8") as f:
+            examples += [(r["text"], r["label"].strip().lower()) for r in csv.DictReader(f)]
+    save_model(train(examples), args.out)
+    print(f"Trained intent router on {len(examples)} examples → {args.out}")
@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from langchain_core.memory import BaseMemory
+from langchain_core.messages import HumanMessage, AIMessage
+
+import db
+import metrics
+from agents.retrieval import estimate_tokens
+
+# ----------------------------
+# Config
+# ----------------------------
+# Turns (user + assistant message pairs) kept verbatim
+KEEP_TURNS = int(os.getenv("CHAT_MEMORY_TURNS", "6"))
+# Hard budget for the history part of the onboarding and agent prompts
+MEMORY_TOKEN_BUDGET = int(os.getenv("CHAT_MEMORY_TOKENS", "1200"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))
+# Older messages are folded into the summary in batches of at least this many
+SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH", "4"))
+
+SUMMARY_ROLE = "summary"
+
+# Summaries are computed off the request path on a small shared pool
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+
+
+def _line(role: str, text: str) -> str:
+    return f"{'You' if role == 'user' else 'Bot'}: {text}"
+
+
+def fit_history(lines: list[str], token_budget: int = MEMORY_TOKEN_BUDGET) -> list[str]:
+    """Keep the newest `lines` that fit in `token_budget` (the first line is kept if it is a summary)."""
+    head = lines[:1] if lines and lines[0].startswith("Summary:") else []
+    used = sum(estimate_tokens(l) for l in head)
+    tail = []
+    for line in reversed(lines[len(head):]):
+        cost = estimate_tokens(line)
+        if used + cost > token_budget:
+            break
+        tail.append(line)
+        used += cost
+    return head + tail[::-1]
+
+
+def llm_summarizer(llm):
+    """Summarizer backed by a LangChain chat model (e.g. the MentorMatch Gemini LLM)."""
+    def summarize(previous: str, lines: list[str]) -> str:
+        prompt = (
+            "Update the running summary of a conversation between an employee and the SAP360 assistant.\n"
+            "Keep facts the assistant should remember (name, team, position, goals, mentors, bookings, "
+            f"tickets, open questions). At most {SUMMARY_TOKEN_BUDGET * 3 // 4} words.\n\n"
+            f"Current summary:\n{previous or '(none)'}\n\nNew messages:\n" + "\n".join(lines)
+        )
+        return llm.invoke(prompt).content.strip()
+    return summarize
+
+
+# ----------------------------
+# Per-user conversation memory
+# ----------------------------
+class ChatMemory:
+    """Last KEEP_TURNS turns verbatim plus a rolling summary of everything older.
+
+    Messages are recorded with `add()` as they are saved to `chat_history`;
+    the summary is stored there too (role 'summary', JSON with the last
+    message id it covers), so `load()` restores the memory after a restart
+    without replaying the whole conversation.
+    """
+
+    def __init__(self, user_email: str, summarize=None, keep_turns: int = KEEP_TURNS,
+                 token_budget: int = MEMORY_TOKEN_BUDGET, path: str | None = None):
+        self.user_email = user_email
+        self.summarize = summarize
+        self.keep_messages = keep_turns * 2
+        self.token_budget = token_budget
+        self.path = path
+
+        self._lock = threading.Lock()
+        self.summary = ""
+        self.summary_through_id = 0
+        self._recent = []      # [(row id, role, text)], oldest first
+        self._folding = []     # messages handed to the summarizer, still shown verbatim
+        self._job = None
+        self._generation = 0   # bumped by clear() so an in-flight summary is discarded
+
+    # --- persistence ---
+    @classmethod
+    def load(cls, user_email: str, **kwargs) -> "ChatMemory":
+        mem = cls(user_email, **kwargs)
+        row = db.query_one(
+            "SELECT id, message FROM chat_history WHERE user_email=? AND role=? ORDER BY id DESC LIMIT 1",
+            (user_email, SUMMARY_ROLE), path=mem.path,
+        )
+        if row:
+            try:
+                data = json.loads(row["message"])
+                mem.summary, mem.summary_through_id = data.get("text", ""), int(data.get("through_id", 0))
+            except (ValueError, TypeError):
+                pass
+        # Anything newer than the summary, capped so a long backlog is never replayed
+        rows = db.query("""
+            SELECT id, role, message FROM chat_history
+            WHERE user_email=? AND id > ? AND role IN ('user', 'assistant')
+            ORDER BY id DESC LIMIT ?
+        """, (user_email, mem.summary_through_id, mem.keep_messages + SUMMARY_BATCH * 2), path=mem.path)
+        mem._recent = [(r["id"], r["role"], r["message"]) for r in reversed(rows)]
+        mem._maybe_fold()
+        return mem
+
+    def _persist_summary(self, text: str, through_id: int):
+        db.execute(
+            "INSERT INTO chat_history (user_email, role, message) VALUES (?,?,?)",
+            (self.user_email, SUMMARY_ROLE, json.dumps({"text": text, "through_id": through_id})),
+            path=self.path,
+        )
+
+    # --- recording ---
+    def add(self, role: str, text: str, row_id: int = 0):
+        with self._lock:
+            self._recent.append((row_id, role, text))
+        self._maybe_fold()
+
+    def clear(self):
+        with self._lock:
+            self.summary, self._recent, self._folding = "", [], []
+            self._generation += 1
+
+    # --- summarisation (background) ---
+    def _maybe_fold(self):
+        with self._lock:
+            overflow = len(self._recent) - self.keep_messages
+            if self.summarize is None or self._job is not None or overflow < SUMMARY_BATCH:
+                return
+            self._folding, self._recent = self._recent[:overflow], self._recent[overflow:]
+            batch, previous = list(self._folding), self.summary
+            self._job = _executor.submit(self._fold, previous, batch, self._generation)
+
+    def _fold(self, previous: str, batch: list, generation: int):
+        lines = [_line(role, text) for _, role, text in batch]
+        t0 = time.perf_counter()
+        try:
+            text = self.summarize(previous, lines)
+            metrics.observe("memory.summary_ms", (time.perf_counter() - t0) * 1000)
+        except Exception:
+            metrics.incr("memory.summary_failed")
+            # Keep the conversation usable: fall back to a clipped transcript
+            text = "\n".join(fit_history([previous] + lines if previous else lines, SUMMARY_TOKEN_BUDGET))
+        text = _clip(text, SUMMARY_TOKEN_BUDGET)
+        through_id = max((i for i, _, _ in batch), default=0)
+        with self._lock:
+            self._job = None
+            if generation != self._generation:
+                return
+            self.summary = text
+            if through_id:
+                self.summary_through_id = through_id
+            self._folding = []
+        if through_id:
+            try:
+                self._persist_summary(text, through_id)
+            except Exception:
+                metrics.incr("memory.persist_failed")
+        metrics.incr("memory.summaries")
+        self._maybe_fold()
+
+    # --- views for the two backends ---
+    def _snapshot(self, exclude_pending_user: bool):
+        with self._lock:
+            msgs = [(role, text) for _, role, text in self._folding + self._recent]
+            summary = self.summary
+        # The turn being answered is already recorded; the prompts add it themselves
+        if exclude_pending_user and msgs and msgs[-1][0] == "user":
+            msgs = msgs[:-1]
+        return summary, msgs
+
+    def lines(self, token_budget: int | None = None, exclude_pending_user: bool = True) -> list[str]:
+        """History for the onboarding prompt: "Summary: …" then "You:/Bot:" lines, within budget."""
+        summary, msgs = self._snapshot(exclude_pending_user)
+        out = ([f"Summary: {summary}"] if summary else []) + [_line(r, t) for r, t in msgs]
+        out = fit_history(out, token_budget or self.token_budget)
+        metrics.observe("memory.history_tokens", sum(estimate_tokens(l) for l in out))
+        return out
+
+    def messages(self, token_budget: int | None = None, exclude_pending_user: bool = True) -> list:
+        """History for the agent prompt as LangChain messages, within budget."""
+        summary, msgs = self._snapshot(exclude_pending_user)
+        budget = token_budget or self.token_budget
+        used = estimate_tokens(summary) if summary else 0
+        kept = []
+        for role, text in reversed(msgs):
+            cost = estimate_tokens(text)
+            if used + cost > budget:
+                break
+            kept.append(HumanMessage(text) if role == "user" else AIMessage(text))
+            used += cost
+        # Gemini only accepts a leading system message, so the summary rides as user context
+        head = [HumanMessage(f"(Context) Summary of our earlier conversation: {summary}")] if summary else []
+        return head + kept[::-1]
+
+
+def _clip(text: str, token_budget: int) -> str:
+    max_chars = token_budget * 4
+    return text if len(text) <= max_chars else text[: max_chars - 1] + "…"
+
+
+# ----------------------------
+# LangChain adapter for the AgentExecutor
+# ----------------------------
+class AgentMemory(BaseMemory):
+    """Read-only view of a ChatMemory for `AgentExecutor(memory=...)`.
+
+    Turns are recorded once, by the app's `save_message`, so `save_context`
+    does nothing here.
+    """
+    chat: Any
+    memory_key: str = "chat_history"
+
+    @property
+    def memory_variables(self) -> list[str]:
+        return [self.memory_key]
+
+    def load_memory_variables(self, inputs: dict) -> dict:
+        return {self.memory_key: self.chat.messages()}
+
+    def save_context(self, inputs: dict, outputs: dict) -> None:
+        pass
+
+    def clear(self) -> None:
+        self.chat.clear()
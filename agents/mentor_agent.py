@@ -1,19 +1,20 @@
 import os
+import re
 import sqlite3
 from datetime import datetime, timedelta, timezone
 import numpy as np
+import streamlit as st
 from dotenv import load_dotenv
-from langchain.agents import create_openai_functions_agent, AgentExecutor
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.memory import ConversationBufferMemory
-
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain.agents import initialize_agent, AgentType
 from langchain.tools import tool
 
-import pickle
 import asyncio
 from utils import add_notification  
+import db
+from migrations import migrate
+from profiling import timed, section
+from agents.mentor_index import MentorVectorIndex
+from agents.embedding_cache import CachedEmbeddings
 
 try:
     asyncio.get_running_loop()
@@ -29,92 +30,102 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 DB_PATH = os.getenv("DB_PATH", "mentormatch.db")
 
 # ----------------------------
-# Init Gemini LLM + embeddings
+# Gemini LLM + embeddings (built on first use, shared by all sessions and pages)
 # ----------------------------
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    temperature=0.2,
-    max_output_tokens=512,
-    google_api_key=GOOGLE_API_KEY,
-)
-emb = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004", google_api_key=GOOGLE_API_KEY,)
+@st.cache_resource(show_spinner=False)
+def get_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        temperature=0.2,
+        max_output_tokens=512,
+        google_api_key=GOOGLE_API_KEY,
+        streaming=True,   # tokens reach StreamingCallbackHandler while the agent answers
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_embeddings():
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    # Query embeddings are cached process-wide (and in the DB, so they survive restarts)
+    return CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model="models/text-embedding-004", google_api_key=GOOGLE_API_KEY,),
+        namespace="models/text-embedding-004",
+        db_path=DB_PATH if os.getenv("EMBED_CACHE_PERSIST", "1") == "1" else None,
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_mentor_index():
+    # Mentor vectors are embedded once and persisted next to the DB
+    migrate(DB_PATH)
+    return MentorVectorIndex(get_embeddings(), DB_PATH)
 
 
 # ----------------------------
 # DB helpers
 # ----------------------------
 def _conn():
-    c = sqlite3.connect(DB_PATH)
-    c.row_factory = sqlite3.Row
-    return c
+    # Pooled connection held by this thread (see db.py); owned by the pool, never closed here
+    return db.connect(DB_PATH)
 
 def _dicts(rows): return [dict(r) for r in rows]
 
-def ensure_tables():
-    con = _conn()
-    cur = con.cursor()
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS sessions(
-      id INTEGER PRIMARY KEY AUTOINCREMENT,
-      mentee_email TEXT NOT NULL,
-      mentor_id INTEGER NOT NULL,
-      status TEXT NOT NULL,             -- requested/approved/booked/cancelled
-      start_utc TEXT,
-      end_utc TEXT,
-      location TEXT,
-      graph_event_id TEXT,
-      notes TEXT,
-      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    """)
-    con.commit(); con.close()
+# ----------------------------
+# Search (SQL + semantic fallback)
+# ----------------------------
+# Words that say "I want a mentor" rather than what the mentor should know
+_FTS_STOPWORDS = {
+    "a", "an", "and", "the", "of", "in", "on", "for", "with", "to", "who", "knows", "know",
+    "find", "me", "i", "my", "need", "someone", "mentor", "mentors", "looking", "is", "are",
+}
 
-ensure_tables()
 
+def _fts_query(query: str) -> str:
+    """Turn free text into an FTS5 query: OR of quoted prefix terms."""
+    terms = [t for t in re.findall(r"\w+", query.lower()) if t not in _FTS_STOPWORDS]
+    return " OR ".join(f'"{t}"*' for t in dict.fromkeys(terms))
 
 
+@timed("db")
+def _sql_search_mentors(query: str, min_months: int, limit: int):
+    """bm25-ranked FTS5 match on skills/topics/position/team/department.
 
-# ----------------------------
-# Search (SQL + semantic fallback)
-# ----------------------------
-def fetch_all_mentors(min_months=24):
+    Falls back to the LIKE scan when the users_fts table has not been created.
+    """
     con = _conn()
-    rows = con.execute("""
-        SELECT ID, name, position, department, team, skills, months_experience,email
-        FROM users
-        WHERE is_mentor=1 AND months_experience >= ?
-    """, (min_months,)).fetchall()
-    con.close()
+    try:
+        match = _fts_query(query)
+        if not match:
+            return []
+        rows = con.execute("""
+            SELECT u.ID, u.name, u.position, u.department, u.team, u.skills, u.months_experience, u.email
+            FROM users_fts
+            JOIN users u ON u.ID = users_fts.rowid
+            WHERE users_fts MATCH ?
+              AND u.is_mentor=1
+              AND u.months_experience >= ?
+            ORDER BY bm25(users_fts, 10.0, 5.0, 3.0, 2.0, 1.0)
+            LIMIT ?
+        """, (match, min_months, limit)).fetchall()
+    except sqlite3.OperationalError:
+        rows = con.execute("""
+            SELECT ID, name, position, department, team, skills, months_experience, email
+            FROM users
+            WHERE is_mentor=1
+              AND months_experience >= ?
+              AND (position LIKE ? OR skills LIKE ? OR team LIKE ?)
+            LIMIT ?
+        """, (min_months, f"%{query}%", f"%{query}%", f"%{query}%", limit)).fetchall()
     return _dicts(rows)
 
-def cosine(a, b):
-    na, nb = np.linalg.norm(a), np.linalg.norm(b)
-    if na == 0 or nb == 0: return 0.0
-    return float(np.dot(a, b) / (na * nb))
 
 def search_mentors(query: str, min_months: int = 24, limit: int = 3):
-    con = _conn()
-    rows = con.execute(f"""
-        SELECT ID, name, position, department, team, skills, months_experience, email
-        FROM users
-        WHERE is_mentor=1
-          AND months_experience >= ?
-          AND (position LIKE ? OR skills LIKE ? OR team LIKE ?)
-        LIMIT {limit}
-    """, (min_months, f"%{query}%", f"%{query}%", f"%{query}%")).fetchall()
-    con.close()
-    rows = _dicts(rows)
+    rows = _sql_search_mentors(query, min_months, limit)
     if len(rows) >= limit:
         return rows
 
-    mentors = fetch_all_mentors(min_months)
-    if not mentors: return []
-    q_vec = np.array(emb.embed_query(query))
-    reps  = [f"{m['position']} | {m['skills']} | {m['team']} | {m['department']}" for m in mentors]
-    m_vecs = np.array(emb.embed_documents(reps))
-    scores = [cosine(q_vec, m_vecs[i]) for i in range(len(mentors))]
-    top_idx = np.argsort(scores)[::-1][:limit]
-    return [mentors[i] | {"score": round(scores[i], 3)} for i in top_idx]
+    with section("llm", "embed_query"):
+        q_vec = np.array(get_embeddings().embed_query(query))
+    return get_mentor_index().search(q_vec, min_months=min_months, limit=limit)
 
 # ----------------------------
 # Availability (Isaiah real, rest fake)
@@ -147,21 +158,14 @@ def attach_availability(mentors: list, slots_per_mentor: int = 3):
 # Session request + approval (ICS invite)
 # ----------------------------
 def create_session_request_row(mentee_email, mentor_email, mentor_id, start_utc, end_utc, location="Teams"):
-    con = _conn()
-    cur = con.cursor()
     start_sql = _normalize_dt(start_utc)
     end_sql   = _normalize_dt(end_utc)
-    cur.execute("""
+    return db.execute("""
         INSERT INTO sessions (
             mentee_email, mentor_email, mentor_id, status, start_utc, end_utc, location
         )
         VALUES (?, ?, ?, 'requested', ?, ?, ?)
-    """, (mentee_email, mentor_email, int(mentor_id), start_sql, end_sql, location))
-
-    con.commit()
-    sid = cur.lastrowid
-    con.close()
-    return sid
+    """, (mentee_email, mentor_email, int(mentor_id), start_sql, end_sql, location), path=DB_PATH)
 
 
 
@@ -192,10 +196,8 @@ END:VCALENDAR
 """
 
 def approve_and_create_ics(session_id: int, mentor_email: str):
-    con = _conn()
-    s = con.execute("SELECT * FROM sessions WHERE id=?", (session_id,)).fetchone()
+    s = db.query_one("SELECT * FROM sessions WHERE id=?", (session_id,), path=DB_PATH)
     if not s:
-        con.close()
         return {"error": f"Session {session_id} not found"}
     mentee_email = s["mentee_email"]; start = s["start_utc"]; end = s["end_utc"]
 
@@ -212,10 +214,10 @@ def approve_and_create_ics(session_id: int, mentor_email: str):
     with open(ics_path, "w", encoding="utf-8") as f:
         f.write(ics_text)
 
-    con.execute("UPDATE sessions SET status='booked', graph_event_id=? WHERE id=?", (ics_path, session_id))
-    con.commit(); con.close()
+    db.execute("UPDATE sessions SET status='booked', graph_event_id=? WHERE id=?", (ics_path, session_id), path=DB_PATH)
     return {"ics_path": ics_path, "status": "booked"}
 
+@timed("db")
 def meetings_in(email: str, days: int | None = None) -> str:
     """
     Return sessions for a mentee or mentor as neat text.
@@ -256,7 +258,6 @@ def meetings_in(email: str, days: int | None = None) -> str:
             ORDER BY s.start_utc ASC
         """, (email, email, target_day)).fetchall()
 
-    con.close()
     sessions = _dicts(rows)
 
     if not sessions:
@@ -363,8 +364,6 @@ def _tool_approve_session(input: str) -> str:
         mentor_row = con.execute("SELECT name FROM users WHERE email=?", (mentor_email,)).fetchone()
         mentor_name = mentor_row["name"] if mentor_row else mentor_email
 
-        con.close()
-
         # Notify mentee
         add_notification(
             mentee_email,
@@ -448,13 +447,6 @@ You are MentorMatch Agent.
 For non-mentorship questions, answer conversationally.
 """
 
-
-
-
-memory = ConversationBufferMemory(
-    memory_key="chat_history",   # must match MessagesPlaceholder
-    return_messages=True         # so it returns list of messages
-)
 prompt = ChatPromptTemplate.from_messages([
     ("system", system_message),
     MessagesPlaceholder(variable_name="chat_history"),
@@ -462,18 +454,30 @@ prompt = ChatPromptTemplate.from_messages([
     MessagesPlaceholder(variable_name="agent_scratchpad"),
 ])
 
-functions_agent = create_openai_functions_agent(
-    llm=llm,
-    tools=tools,
-    prompt=prompt,
-)
+@st.cache_resource(show_spinner=False)
+def get_functions_agent():
+    from langchain.agents import create_openai_functions_agent
+    return create_openai_functions_agent(
+        llm=get_llm(),
+        tools=tools,
+        prompt=prompt,
+    )
 
-agent = AgentExecutor(agent=functions_agent, tools=tools, memory=memory,verbose=True)
+def get_agent():
+    """Standalone executor with its own buffer memory (the Homepage builds one per user)."""
+    from langchain.agents import AgentExecutor
+    from langchain.memory import ConversationBufferMemory
+    memory = ConversationBufferMemory(
+        memory_key="chat_history",   # must match MessagesPlaceholder
+        return_messages=True         # so it returns list of messages
+    )
+    return AgentExecutor(agent=get_functions_agent(), tools=tools, memory=memory, verbose=True)
 
 # ----------------------------
 # Demo loop
 # ----------------------------
 if __name__ == "__main__":
+    agent = get_agent()
     print("MentorMatch Agent ready. Type 'quit' to exit.\n")
     while True:
         q = input("You: ")
@@ -0,0 +1,303 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+import db
+
+# ANN backend: "auto" (IVF once the index is large, else exact), "brute", "ivf" or "hnsw"
+ANN_BACKEND = os.getenv("MENTOR_ANN_BACKEND", "auto")
+ANN_MIN_SIZE = int(os.getenv("MENTOR_ANN_MIN_SIZE", "5000"))
+
+# ----------------------------
+# Persisted mentor embedding index
+# ----------------------------
+# Vectors live next to the DB as <db>.mentor_vectors.npy (float32, L2-normalised,
+# one row per mentor) with a JSON sidecar holding the mentor IDs and the content
+# hash of "position | skills | team | department" each vector was built from.
+# `sync()` re-embeds only rows whose hash changed, so the mentor population is
+# embedded once rather than on every search.
+
+def mentor_repr(m: dict) -> str:
+    return f"{m['position']} | {m['skills']} | {m['team']} | {m['department']}"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _normalize_rows(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest scores, best first (argpartition + small sort)."""
+    if scores.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if scores.size > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(scores.size)
+    return part[np.argsort(-scores[part])]
+
+
+# ----------------------------
+# Searchers (all take L2-normalised vectors; `allowed` is a boolean row mask)
+# ----------------------------
+class BruteForceSearcher:
+    """Exact scan; the reference for recall and the fallback for small indexes."""
+
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+
+    def search(self, q: np.ndarray, k: int, allowed: np.ndarray | None = None):
+        if allowed is None or allowed.all():
+            scores = self.matrix @ q
+            pos = top_k(scores, k)
+            return pos, scores[pos]
+        cand = np.flatnonzero(allowed)
+        scores = self.matrix[cand] @ q
+        pos = top_k(scores, k)
+        return cand[pos], scores[pos]
+
+
+class IVFSearcher:
+    """Inverted-file index: k-means coarse quantiser, scan only the `n_probe` nearest lists."""
+
+    def __init__(self, matrix: np.ndarray, n_lists: int | None = None, n_probe: int | None = None,
+                 iters: int = 8, train_size: int = 20000, seed: int = 0):
+        self.matrix = matrix
+        n = matrix.shape[0]
+        self.n_lists = max(1, n_lists or int(np.sqrt(n)))
+        self.n_probe = max(1, min(self.n_lists, n_probe or max(4, self.n_lists // 8)))
+        rng = np.random.default_rng(seed)
+
+        sample = matrix[rng.choice(n, size=min(n, train_size), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=min(self.n_lists, sample.shape[0]), replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(centroids.shape[0]):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize_rows(centroids)
+        self.centroids = centroids.astype(np.float32)
+
+        assign = np.concatenate([
+            np.argmax(matrix[i:i + 8192] @ self.centroids.T, axis=1) for i in range(0, n, 8192)
+        ]) if n else np.zeros(0, dtype=np.int64)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(self.centroids.shape[0] + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(self.centroids.shape[0])]
+
+    def search(self, q: np.ndarray, k: int, allowed: np.ndarray | None = None):
+        probes = top_k(self.centroids @ q, self.n_probe)
+        cand = np.concatenate([self.lists[p] for p in probes])
+        if allowed is not None:
+            cand = cand[allowed[cand]]
+        if cand.size < k:
+            return BruteForceSearcher(self.matrix).search(q, k, allowed)
+        scores = self.matrix[cand] @ q
+        pos = top_k(scores, k)
+        return cand[pos], scores[pos]
+
+
+class HNSWSearcher:
+    """Graph index via the optional `hnswlib` package."""
+
+    def __init__(self, matrix: np.ndarray, ef: int = 64, m: int = 16):
+        import hnswlib
+        self.matrix = matrix
+        self.index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+        self.index.init_index(max_elements=max(1, matrix.shape[0]), ef_construction=200, M=m)
+        self.index.add_items(matrix, np.arange(matrix.shape[0]))
+        self.index.set_ef(ef)
+
+    def search(self, q: np.ndarray, k: int, allowed: np.ndarray | None = None):
+        flt = None if allowed is None else (lambda i: bool(allowed[i]))
+        try:
+            labels, dists = self.index.knn_query(q, k=k, filter=flt)
+        except RuntimeError:
+            # Not enough allowed neighbours reachable from the graph
+            return BruteForceSearcher(self.matrix).search(q, k, allowed)
+        return labels[0].astype(np.int64), 1.0 - dists[0]
+
+
+def make_searcher(matrix: np.ndarray, backend: str = ANN_BACKEND):
+    if backend == "auto":
+        backend = "ivf" if matrix.shape[0] >= ANN_MIN_SIZE else "brute"
+    if backend == "hnsw":
+        try:
+            return HNSWSearcher(matrix)
+        except ImportError:
+            backend = "ivf"
+    if backend == "ivf" and matrix.shape[0]:
+        return IVFSearcher(matrix)
+    return BruteForceSearcher(matrix)
+
+
+class MentorVectorIndex:
+    def __init__(self, embeddings, db_path: str):
+        self.embeddings = embeddings
+        self.db_path = db_path
+        base = os.path.splitext(db_path)[0]
+        self.vectors_path = f"{base}.mentor_vectors.npy"
+        self.meta_path = f"{base}.mentor_vectors.json"
+
+        self._lock = threading.Lock()
+        self._watch = None            # connection used only for PRAGMA data_version
+        self._data_version = None
+
+        self.ids: list[int] = []
+        self.hashes: list[str] = []
+        self.rows: list[dict] = []
+        self.months = np.zeros(0, dtype=np.int64)
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.searcher = None
+        self._load()
+
+    # --- persistence ---
+    def _load(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            matrix = np.load(self.vectors_path)
+            if matrix.shape[0] == len(meta["ids"]):
+                self.ids, self.hashes, self.matrix = meta["ids"], meta["hashes"], matrix
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        tmp_vec = self.vectors_path + ".tmp.npy"
+        np.save(tmp_vec, self.matrix)
+        os.replace(tmp_vec, self.vectors_path)
+        tmp_meta = self.meta_path + ".tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "hashes": self.hashes}, f)
+        os.replace(tmp_meta, self.meta_path)
+
+    # --- change detection ---
+    def _db_changed(self) -> bool:
+        """True when another connection committed to the DB since the last sync."""
+        # Dedicated read-only connection: data_version ignores the connection's own writes,
+        # so the pooled connections from db.py must not be used here.
+        if self._watch is None:
+            self._watch = sqlite3.connect(self.db_path, check_same_thread=False)
+        version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._data_version
+        self._data_version = version
+        return changed
+
+    def _fetch_mentors(self) -> list[dict]:
+        return db.query("""
+            SELECT ID, name, position, department, team, skills, months_experience, email
+            FROM users
+            WHERE is_mentor=1
+        """, path=self.db_path)
+
+    def sync(self, force: bool = False):
+        """Bring the index in line with the `users` table, embedding only new/changed mentors.
+
+        Returns the consistent (rows, months, searcher) snapshot read under the lock.
+        """
+        with self._lock:
+            # Always read data_version, so the first sync records it too
+            db_changed = self._db_changed()
+            if not force and self.searcher is not None and not db_changed:
+                return self.rows, self.months, self.searcher
+            mentors = self._fetch_mentors()
+            old = {i: (h, self.matrix[pos]) for pos, (i, h) in enumerate(zip(self.ids, self.hashes))}
+
+            reps = [mentor_repr(m) for m in mentors]
+            hashes = [content_hash(r) for r in reps]
+            stale = [pos for pos, (m, h) in enumerate(zip(mentors, hashes))
+                     if m["ID"] not in old or old[m["ID"]][0] != h]
+
+            fresh = {}
+            if stale:
+                vecs = np.asarray(self.embeddings.embed_documents([reps[p] for p in stale]), dtype=np.float32)
+                fresh = dict(zip(stale, _normalize_rows(vecs)))
+
+            if mentors:
+                matrix = np.vstack([fresh[p] if p in fresh else old[m["ID"]][1] for p, m in enumerate(mentors)])
+            else:
+                matrix = np.zeros((0, self.matrix.shape[1] if self.matrix.ndim == 2 else 0), dtype=np.float32)
+
+            ids = [m["ID"] for m in mentors]
+            changed = bool(stale) or ids != self.ids
+            self.ids, self.hashes, self.rows, self.matrix = ids, hashes, mentors, matrix.astype(np.float32)
+            self.months = np.array([int(m["months_experience"] or 0) for m in mentors], dtype=np.int64)
+            if changed or self.searcher is None:
+                self.searcher = make_searcher(self.matrix)
+            if changed:
+                self._save()
+            return self.rows, self.months, self.searcher
+
+    # --- search ---
+    def search(self, query_vec, min_months: int = 24, limit: int = 3) -> list[dict]:
+        """Top `limit` mentors by cosine similarity, as rows with a `score` field."""
+        rows, months, searcher = self.sync()
+        if not rows:
+            return []
+        q = np.asarray(query_vec, dtype=np.float32)
+        qn = np.linalg.norm(q)
+        if qn == 0:
+            return []
+        # Filter before scoring so excluded mentors are never touched
+        allowed = months >= min_months
+        if not allowed.any():
+            return []
+        ids, scores = searcher.search(q / qn, limit, allowed)
+        return [rows[i] | {"score": round(float(s), 3)} for i, s in zip(ids, scores)]
+
+
+# ----------------------------
+# Benchmark: ANN vs exact scan on synthetic mentor vectors
+# ----------------------------
+def benchmark(n: int = 100_000, dim: int = 768, n_queries: int = 50, k: int = 3,
+              backend: str = "ivf", seed: int = 0) -> dict:
+    """Recall@k and mean latency of `backend` against the brute-force scan."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(16, n // 500), dim)).astype(np.float32)
+    matrix = _normalize_rows(centers[rng.integers(0, len(centers), n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32))
+    queries = _normalize_rows(matrix[rng.integers(0, n, n_queries)] + 0.3 * rng.normal(size=(n_queries, dim)).astype(np.float32))
+    months = rng.integers(0, 200, n)
+    allowed = months >= 24
+
+    exact = BruteForceSearcher(matrix)
+    t0 = time.perf_counter()
+    approx = make_searcher(matrix, backend)
+    build_s = time.perf_counter() - t0
+
+    def run(searcher):
+        out, t = [], time.perf_counter()
+        for q in queries:
+            out.append(set(searcher.search(q, k, allowed)[0].tolist()))
+        return out, (time.perf_counter() - t) / n_queries * 1000
+
+    truth, exact_ms = run(exact)
+    got, approx_ms = run(approx)
+    recall = float(np.mean([len(a & b) / k for a, b in zip(truth, got)]))
+    return {
+        "n": n, "dim": dim, "k": k, "backend": type(approx).__name__,
+        "build_s": round(build_s, 2), "exact_ms": round(exact_ms, 2),
+        "approx_ms": round(approx_ms, 2), f"recall@{k}": round(recall, 3),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Benchmark mentor ANN search against the exact scan.")
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--k", type=int, default=3)
+    ap.add_argument("--backend", default="ivf", choices=["ivf", "hnsw", "brute"])
+    args = ap.parse_args()
+    print(benchmark(n=args.n, dim=args.dim, k=args.k, backend=args.backend))
@@ -1,19 +1,36 @@
 import os
 import pandas as pd
-import google.generativeai as genai
+import streamlit as st
 import json
-import sqlite3
-import uuid
-from datetime import datetime
+import time
+
+import metrics
+import profiling
+import ticket_store
+
+from agents.retrieval import OnboardingRetriever, record_prompt_size
+from agents.memory import fit_history, MEMORY_TOKEN_BUDGET
+from agents.embedding_cache import CachedEmbeddings
+from agents.response_cache import ResponseCache
+from agents.onboarding_lookup import OnboardingLookup, is_personal
+
+# Everything below is built on first use and cached for the whole process, so
+# importing this module (Homepage, pages) costs no API client setup or CSV reads.
 
 # -----------------------------
 # 1. Setup Gemini API
 # -----------------------------
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") 
-genai.configure(api_key=GEMINI_API_KEY)
 
-# Load Gemini model
-model = genai.GenerativeModel("gemini-2.5-flash")
+@st.cache_resource(show_spinner=False)
+def _genai():
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)
+    return genai
+
+@st.cache_resource(show_spinner=False)
+def get_model():
+    return _genai().GenerativeModel("gemini-2.5-flash")
 
 # -----------------------------
 # 2. Load Onboarding Data
@@ -21,50 +38,68 @@ model = genai.GenerativeModel("gemini-2.5-flash")
 # Get the directory where this script is located
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-employee_df = pd.read_csv(os.path.join(BASE_DIR, "datasets/Employee Dataset1.csv")).fillna("")
-office_df = pd.read_csv(os.path.join(BASE_DIR, "datasets/OfficeDetails.csv"), sep="\t").fillna("")
-employee_df.columns = employee_df.columns.str.strip()
-office_df.columns = office_df.columns.str.strip()
-
-print("Employee data loaded:", len(employee_df), "records")
-print("Office details loaded:", len(office_df), "records")
+EMPLOYEE_CSV = os.path.join(BASE_DIR, "datasets/Employee Dataset1.csv")
+OFFICE_CSV = os.path.join(BASE_DIR, "datasets/OfficeDetails.csv")
+
+def data_fingerprint():
+    return OnboardingRetriever.fingerprint_files(EMPLOYEE_CSV, OFFICE_CSV)
+
+# Keyed on the CSV fingerprint: editing either file reloads the data and indexes
+@st.cache_data(show_spinner=False)
+def load_datasets(fingerprint):
+    employee_df = profiling.read_csv(EMPLOYEE_CSV).fillna("")
+    office_df = profiling.read_csv(OFFICE_CSV).fillna("")
+    employee_df.columns = employee_df.columns.str.strip()
+    office_df.columns = office_df.columns.str.strip()
+    print("Employee data loaded:", len(employee_df), "records")
+    print("Office details loaded:", len(office_df), "records")
+    return employee_df, office_df
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_retriever(fingerprint):
+    # Row index used to pick only the relevant rows for each prompt
+    return OnboardingRetriever.load_or_build(*load_datasets(fingerprint), fingerprint)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_lookup(fingerprint):
+    # Structured questions (office details, my documents/software/modules, team) are
+    # answered straight from these indexes without calling Gemini
+    return OnboardingLookup(*load_datasets(fingerprint))
+
+# Repeated questions are answered from a semantic cache, scoped by team/position
+# (plus the asker's email for questions about their own checklists/profile)
+# and invalidated whenever either CSV changes
+class _GeminiQueryEmbeddings:
+    model = "models/text-embedding-004"
+
+    def embed_query(self, text):
+        return _genai().embed_content(model=self.model, content=text, task_type="retrieval_query")["embedding"]
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    return ResponseCache(
+        CachedEmbeddings(_GeminiQueryEmbeddings(), namespace=_GeminiQueryEmbeddings.model),
+        fingerprint=data_fingerprint,
+    )
+
+def _cache_scope(retriever, user_email, user_input):
+    me = retriever.profile(user_email) or {}
+    scope = f"{str(me.get('Team', '')).strip().lower()}|{str(me.get('Position', '')).strip().lower()}"
+    if is_personal(user_input):
+        # Documents/software/modules come from the asker's own row, not their team's
+        scope += f"|{(user_email or '').strip().lower()}"
+    return scope
 
 # -----------------------------
-# 3. Setup SQLite for Tickets
+# 3. Tickets (shared ticket store, see ticket_store.py)
 # -----------------------------
-DB_FILE = "tickets.db"
-
-def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tickets (
-            TicketID TEXT PRIMARY KEY,
-            User TEXT,
-            Issue TEXT,
-            Status TEXT,
-            CreatedAt TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-def create_ticket(user_name, issue_description):
-    ticket_id = str(uuid.uuid4())[:8]
-    created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO tickets (TicketID, User, Issue, Status, CreatedAt)
-        VALUES (?, ?, ?, ?, ?)
-    """, (ticket_id, user_name, issue_description, "Open", created_at))
-    conn.commit()
-    conn.close()
-    return ticket_id
-
-# Initialize DB
-init_db()
+def create_ticket(requester, issue_description):
+    return ticket_store.create_ticket(
+        requester_email=requester,
+        title=issue_description[:80],
+        description=issue_description,
+        category_key="it",
+    )
 
 # -----------------------------
 # 4. Conversation history
@@ -74,10 +109,12 @@ conversation_history = []
 # -----------------------------
 # 5. Helper function for Gemini
 # -----------------------------
-def query_gemini(user_input, chat_history=None):
+@profiling.timed("llm")
+def query_gemini(user_input, chat_history=None, user_email=None, on_token=None):
     """
-    Sends the user input along with CSV data and conversation history to Gemini and returns AI response.
-    If the user requests a ticket, create one in SQLite.
+    Sends the user input along with the relevant CSV rows and conversation history to Gemini and returns AI response.
+    If the user requests a ticket, create one in the ticket store.
+    With `on_token`, the answer is streamed and each text chunk is passed to it as it arrives.
     """
     # Use provided chat_history if available, else fallback to local conversation_history
     history = chat_history if chat_history is not None else conversation_history
@@ -98,17 +135,35 @@ def query_gemini(user_input, chat_history=None):
                     user_name = entry.split(",")[0].replace("You:", "").strip()
                     break
 
-            ticket_id = create_ticket(user_name, issue_desc)
-            return f"✅ Ticket raised successfully!\nTicket ID: {ticket_id}\nIssue: {issue_desc}\nYou can track this in the IT dashboard."
+            ticket_id = create_ticket(user_email or user_name, issue_desc)
+            return f"✅ Ticket raised successfully!\nTicket ID: {ticket_id}\nIssue: {issue_desc}\nYou can track this in MyTickets."
         except Exception as e:
             return f"❌ Failed to raise ticket: {str(e)}"
 
-    # Convert CSVs to JSON for AI processing
-    employee_json = employee_df.to_dict(orient="records")
-    office_json = office_df.to_dict(orient="records")
-
-    # Include conversation history
-    history_text = "\n".join(history)
+    fingerprint = data_fingerprint()
+    retriever = get_retriever(fingerprint)
+    fast = get_lookup(fingerprint).answer(user_input, user_email=user_email)
+    if fast:
+        if on_token is not None:
+            on_token(fast)
+        return fast
+
+    response_cache = get_response_cache()
+    scope = _cache_scope(retriever, user_email, user_input)
+    try:
+        cached, query_vec = response_cache.get(user_input, scope)
+    except Exception:
+        cached, query_vec = None, None
+    if cached:
+        if on_token is not None:
+            on_token(cached)
+        return cached
+
+    # Only the rows relevant to this user/question go into the prompt
+    employee_json, office_json = retriever.select(user_input, user_email=user_email)
+
+    # Include conversation history (newest lines within the memory token budget)
+    history_text = "\n".join(fit_history(history, MEMORY_TOKEN_BUDGET))
 
     # Prepare prompt for Gemini with explicit memory instructions
     prompt = f"""
@@ -138,8 +193,32 @@ Instructions:
 User asked: "{user_input}"
     """
 
-    response = model.generate_content(contents=prompt)
-    return response.text.strip()
+    record_prompt_size(prompt)
+    if on_token is None:
+        answer = get_model().generate_content(contents=prompt).text.strip()
+    else:
+        t0 = time.perf_counter()
+        parts = []
+        for chunk in get_model().generate_content(contents=prompt, stream=True):
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk without text parts (e.g. safety metadata only)
+                continue
+            if not parts:
+                metrics.observe("onboarding.ttft_ms", (time.perf_counter() - t0) * 1000)
+            parts.append(text)
+            on_token(text)
+        answer = "".join(parts).strip()
+
+    # Answers that mention the asker personally are never shared
+    me = retriever.profile(user_email) or {}
+    try:
+        response_cache.put(user_input, scope, answer, vec=query_vec,
+                           personal=(user_email, me.get("Name"), me.get("email")))
+    except Exception:
+        pass
+    return answer
 
 # -----------------------------
 # 6. Run chatbot in terminal
@@ -0,0 +1,162 @@
+import os
+import re
+import time
+import hashlib
+import threading
+
+import numpy as np
+
+import db
+import metrics
+from migrations import migrate
+from agents.embedding_cache import normalize_query
+
+# ----------------------------
+# Config
+# ----------------------------
+SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.92"))
+MAX_ROWS = int(os.getenv("RESPONSE_CACHE_MAX_ROWS", "5000"))
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Follow-ups like "and what about that one?" depend on the conversation, not just the text
+_CONTEXT_DEPENDENT = re.compile(r"\b(it|that|those|these|them|this one|above|previous|earlier|again)\b")
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(normalize_query(text).encode("utf-8")).hexdigest()
+
+
+def _unit(vec) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32)
+    n = np.linalg.norm(v)
+    return v / n if n else v
+
+
+# ----------------------------
+# Semantic cache for onboarding answers
+# ----------------------------
+class ResponseCache:
+    """Answers keyed on (scope, dataset fingerprint, query embedding).
+
+    `scope` is the asker's team/position (plus their email for personal
+    questions), so answers are shared only between people the onboarding
+    data treats the same way. `fingerprint` is a
+    callable returning the current fingerprint of the source CSVs; rows from
+    an older fingerprint are dropped the first time a change is seen. Storage
+    is the `response_cache` table (see migrations.py), evicted by last use.
+    """
+
+    def __init__(self, embeddings, fingerprint, threshold: float = SIMILARITY_THRESHOLD,
+                 max_rows: int = MAX_ROWS, ttl_seconds: float = TTL_SECONDS, path: str | None = None):
+        self.embeddings = embeddings
+        self.fingerprint = fingerprint
+        self.threshold = threshold
+        self.max_rows = max_rows
+        self.ttl = ttl_seconds
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._current_fp = None
+        self._matrices = {}   # scope -> (row ids, unit vectors), for the current fingerprint
+        migrate(self.path)
+
+    @staticmethod
+    def cacheable(query: str) -> bool:
+        return bool(normalize_query(query)) and not _CONTEXT_DEPENDENT.search(query.lower())
+
+    def _check_fingerprint(self) -> str:
+        fp = self.fingerprint()
+        with self._lock:
+            if fp != self._current_fp:
+                db.execute("DELETE FROM response_cache WHERE fingerprint != ?", (fp,), path=self.path)
+                self._current_fp = fp
+                self._matrices.clear()
+                metrics.incr("response_cache.invalidated")
+        return fp
+
+    def _matrix(self, scope: str, fp: str):
+        with self._lock:
+            cached = self._matrices.get(scope)
+        if cached is not None:
+            return cached
+        rows = db.query(
+            "SELECT id, vector FROM response_cache WHERE scope=? AND fingerprint=? AND created_at >= ?",
+            (scope, fp, time.time() - self.ttl), path=self.path,
+        )
+        ids = np.array([r["id"] for r in rows], dtype=np.int64)
+        mat = (np.vstack([np.frombuffer(r["vector"], dtype=np.float32) for r in rows])
+               if rows else np.zeros((0, 0), dtype=np.float32))
+        with self._lock:
+            self._matrices[scope] = (ids, mat)
+        return ids, mat
+
+    def _hit(self, row_id: int) -> str | None:
+        db.execute("UPDATE response_cache SET last_used=?, hits=hits+1 WHERE id=?", (time.time(), row_id), path=self.path)
+        row = db.query_one("SELECT response FROM response_cache WHERE id=?", (row_id,), path=self.path)
+        return row["response"] if row else None
+
+    def get(self, query: str, scope: str = ""):
+        """Return (answer or None, query vector or None). Pass the vector on to `put` on a miss."""
+        if not self.cacheable(query):
+            return None, None
+        fp = self._check_fingerprint()
+
+        # Same wording: no embedding call needed
+        row = db.query_one(
+            "SELECT id FROM response_cache WHERE scope=? AND fingerprint=? AND text_key=? AND created_at >= ?",
+            (scope, fp, _text_key(query), time.time() - self.ttl), path=self.path,
+        )
+        answer = self._hit(row["id"]) if row else None
+        if answer is not None:
+            metrics.incr("response_cache.hit")
+            return answer, None
+
+        vec = _unit(self.embeddings.embed_query(query))
+        ids, mat = self._matrix(scope, fp)
+        if len(ids) and mat.shape[1] == vec.shape[0]:
+            sims = mat @ vec
+            best = int(np.argmax(sims))
+            metrics.observe("response_cache.best_similarity", float(sims[best]))
+            if sims[best] >= self.threshold:
+                answer = self._hit(int(ids[best]))
+                if answer is not None:
+                    metrics.incr("response_cache.hit")
+                    return answer, vec
+        metrics.incr("response_cache.miss")
+        return None, vec
+
+    def put(self, query: str, scope: str, response: str, vec=None, personal: tuple = ()):
+        """Store an answer unless it mentions anything in `personal` (e.g. the asker's name/email)."""
+        if not self.cacheable(query) or not (response or "").strip():
+            return
+        low = response.lower()
+        if any(p and str(p).lower() in low for p in personal):
+            metrics.incr("response_cache.skipped_personal")
+            return
+        fp = self._check_fingerprint()
+        vec = _unit(self.embeddings.embed_query(query)) if vec is None else vec
+        now = time.time()
+        with db.transaction(self.path) as con:
+            con.execute("""
+                INSERT INTO response_cache (scope, fingerprint, text_key, query, vector, response, created_at, last_used, hits)
+                VALUES (?,?,?,?,?,?,?,?,0)
+                ON CONFLICT(scope, fingerprint, text_key) DO UPDATE SET
+                  vector=excluded.vector, response=excluded.response,
+                  created_at=excluded.created_at, last_used=excluded.last_used
+            """, (scope, fp, _text_key(query), normalize_query(query), vec.astype(np.float32).tobytes(),
+                  response, now, now))
+            con.execute("""
+                DELETE FROM response_cache WHERE id IN (
+                    SELECT id FROM response_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_rows,))
+        with self._lock:
+            self._matrices.pop(scope, None)
+
+    def stats(self) -> dict:
+        return {
+            "hits": metrics.counter("response_cache.hit"),
+            "misses": metrics.counter("response_cache.miss"),
+            "hit_rate": round(metrics.ratio("response_cache.hit", "response_cache.miss"), 3),
+            "rows": db.scalar("SELECT COUNT(*) FROM response_cache", path=self.path),
+        }
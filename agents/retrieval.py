@@ -0,0 +1,192 @@
+import os
+import re
+import json
+import math
+import pickle
+import hashlib
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# ----------------------------
+# Config
+# ----------------------------
+INDEX_PATH = os.getenv("ONBOARDING_INDEX_PATH", "onboarding_index.pkl")
+# Rough budget for the data part of the onboarding prompt (≈ 4 chars per token)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("ONBOARDING_CONTEXT_TOKENS", "2000"))
+TOP_K = int(os.getenv("ONBOARDING_TOP_K", "8"))
+# Bump when the way the CSVs are parsed changes, so persisted indexes/caches are rebuilt
+INDEX_VERSION = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9@._+#/-]+")
+
+
+def _tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def row_text(row: dict) -> str:
+    return " | ".join(f"{k}: {v}" for k, v in row.items() if str(v).strip())
+
+
+# ----------------------------
+# BM25 over table rows
+# ----------------------------
+class BM25Index:
+    def __init__(self, docs: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        tokenized = [_tokenize(d) for d in docs]
+        self.n_docs = len(tokenized)
+        self.doc_len = np.array([len(t) for t in tokenized], dtype=float)
+        self.avgdl = float(self.doc_len.mean()) if self.n_docs else 0.0
+
+        postings = defaultdict(list)
+        for doc_id, toks in enumerate(tokenized):
+            for term, tf in Counter(toks).items():
+                postings[term].append((doc_id, tf))
+        # term -> (doc ids, term frequencies, idf)
+        self.postings = {}
+        for term, plist in postings.items():
+            ids = np.array([p[0] for p in plist], dtype=np.int32)
+            tfs = np.array([p[1] for p in plist], dtype=float)
+            df = len(plist)
+            idf = math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            self.postings[term] = (ids, tfs, idf)
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(self.n_docs)
+        if not self.n_docs:
+            return out
+        for term in set(_tokenize(query)):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            ids, tfs, idf = entry
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[ids] / (self.avgdl or 1))
+            out[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+        return out
+
+    def top_k(self, query: str, k: int) -> list[int]:
+        s = self.scores(query)
+        hits = np.flatnonzero(s > 0)
+        if hits.size == 0:
+            return []
+        if hits.size > k:
+            hits = hits[np.argpartition(-s[hits], k - 1)[:k]]
+        return hits[np.argsort(-s[hits])].tolist()
+
+
+# ----------------------------
+# Onboarding retriever (employee + office rows)
+# ----------------------------
+class OnboardingRetriever:
+    def __init__(self, employee_df: pd.DataFrame, office_df: pd.DataFrame, fingerprint: str = ""):
+        self.fingerprint = fingerprint
+        self.employees = employee_df.to_dict(orient="records")
+        self.offices = office_df.to_dict(orient="records")
+        self.employee_index = BM25Index([row_text(r) for r in self.employees])
+        self.office_index = BM25Index([row_text(r) for r in self.offices])
+
+        self.by_email = {}
+        self.by_team = defaultdict(list)
+        for i, r in enumerate(self.employees):
+            email = str(r.get("email", "")).strip().lower()
+            if email:
+                self.by_email[email] = i
+            team = str(r.get("Team", "")).strip().lower()
+            if team:
+                self.by_team[team].append(i)
+
+    # --- persistence ---
+    @staticmethod
+    def fingerprint_files(*paths: str) -> str:
+        h = hashlib.sha1(f"v{INDEX_VERSION}".encode())
+        for p in paths:
+            try:
+                stt = os.stat(p)
+                h.update(f"{p}:{stt.st_mtime_ns}:{stt.st_size}".encode())
+            except OSError:
+                h.update(f"{p}:missing".encode())
+        return h.hexdigest()
+
+    def save(self, path: str = INDEX_PATH):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load_or_build(cls, employee_df, office_df, fingerprint: str, path: str = INDEX_PATH):
+        """Reuse the on-disk index when it was built from the same CSV files."""
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    idx = pickle.load(f)
+                if isinstance(idx, cls) and idx.fingerprint == fingerprint:
+                    return idx
+            except Exception:
+                pass
+        idx = cls(employee_df, office_df, fingerprint)
+        try:
+            idx.save(path)
+        except OSError:
+            pass
+        return idx
+
+    def profile(self, user_email: str | None) -> dict | None:
+        i = self.by_email.get((user_email or "").strip().lower())
+        return self.employees[i] if i is not None else None
+
+    # --- selection ---
+    def select(self, query: str, user_email: str | None = None, k: int = TOP_K,
+               token_budget: int = CONTEXT_TOKEN_BUDGET):
+        """Pick the rows worth sending to Gemini for `query`.
+
+        Priority: the user's own row, matched office categories, the user's
+        team, BM25 hits for the query, then any remaining office rows, until
+        `token_budget` is used up. Returns (employee_rows, office_rows).
+        """
+        emp_ids, off_ids = [], []
+        used = 0
+
+        def take(kind: str, i: int) -> bool:
+            nonlocal used
+            ids, rows = (emp_ids, self.employees) if kind == "emp" else (off_ids, self.offices)
+            if i in ids:
+                return True
+            cost = estimate_tokens(json.dumps(rows[i]))
+            if used + cost > token_budget:
+                return False
+            ids.append(i)
+            used += cost
+            return True
+
+        me = self.by_email.get((user_email or "").strip().lower())
+        if me is not None:
+            take("emp", me)
+        for i in self.office_index.top_k(query, k):
+            take("off", i)
+        if me is not None:
+            team = str(self.employees[me].get("Team", "")).strip().lower()
+            for i in self.by_team.get(team, [])[: k * 2]:
+                if not take("emp", i):
+                    break
+        for i in self.employee_index.top_k(query, k):
+            take("emp", i)
+        for i in range(len(self.offices)):
+            if not take("off", i):
+                break
+
+        return [self.employees[i] for i in emp_ids], [self.offices[i] for i in off_ids]
+
+
+def record_prompt_size(prompt: str):
+    metrics.observe("onboarding.prompt_chars", len(prompt))
+    metrics.observe("onboarding.prompt_tokens", estimate_tokens(prompt))
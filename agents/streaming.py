@@ -0,0 +1,60 @@
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+import metrics
+
+# ----------------------------
+# Token streaming for chat turns
+# ----------------------------
+# Backends call a TokenStream with each text delta as it arrives; the stream
+# accumulates the text and hands it to `render` (e.g. a Streamlit placeholder)
+# at most every `min_interval` seconds. Time-to-first-token is recorded in
+# `metrics` as `<name>.ttft_ms`.
+
+class TokenStream:
+    def __init__(self, render=None, name: str = "chat", min_interval: float = 0.05):
+        self.render = render
+        self.name = name
+        self.min_interval = min_interval
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self._parts = []
+        self._last_render = 0.0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def __call__(self, token: str):
+        if not token:
+            return
+        now = time.perf_counter()
+        if self.first_token_at is None:
+            self.first_token_at = now
+            metrics.observe(f"{self.name}.ttft_ms", (now - self.started) * 1000)
+        self._parts.append(token)
+        if self.render is not None and now - self._last_render >= self.min_interval:
+            self._last_render = now
+            self.render(self.text)
+
+    def reset(self):
+        """Drop streamed text (e.g. a fallback answer that is about to be replaced) and clear the render."""
+        self._parts = []
+        if self.render is not None:
+            self.render("")
+
+    def finish(self):
+        metrics.observe(f"{self.name}.total_ms", (time.perf_counter() - self.started) * 1000)
+
+
+class StreamingCallbackHandler(BaseCallbackHandler):
+    """Forward LLM tokens from a LangChain run (the MentorMatch agent) to `on_token`."""
+
+    def __init__(self, on_token):
+        self.on_token = on_token
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        # Function-call steps of the agent stream no text
+        if token:
+            self.on_token(token)
@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import random
+import tempfile
+
+import pandas as pd
+
+# ----------------------------
+# Benchmark: seeding learning progress from the assignment CSV
+# ----------------------------
+# Compares the per-row loop the Homepage used to run (iterrows + Python split
+# + set lookup) with progress_store's vectorised split/explode + anti-join, on
+# a synthetic assignment file. Half of the pairs are pre-seeded so both
+# versions have to find the missing ones.
+#
+#   python bench_seed.py [employees]     (default 100000)
+
+MODULES = [f"Module {i:03d}" for i in range(60)]
+
+
+def synthetic_assignments(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "email": [f"user{i}@company.com" for i in range(n)],
+        "Learning Modules": [", ".join(rng.sample(MODULES, rng.randint(2, 8))) for _ in range(n)],
+    })
+
+
+def legacy_missing(df_assign: pd.DataFrame, df_prog: pd.DataFrame) -> list[dict]:
+    """The pre-vectorisation seeding loop (minus file I/O)."""
+    target_rows = []
+    for _, r in df_assign.iterrows():
+        email = str(r.get("email", "")).strip().lower()
+        mods_str = r.get("Learning Modules")
+        if not email or pd.isna(mods_str):
+            continue
+        for m in str(mods_str).split(","):
+            mod = str(m).strip()
+            if mod:
+                target_rows.append((email, mod))
+    existing = set(zip(df_prog["email"].tolist(), df_prog["module"].str.lower().tolist()))
+    return [{"email": e, "module": m, "completed": False} for e, m in target_rows if (e, m.lower()) not in existing]
+
+
+def vectorised_missing(df_assign: pd.DataFrame, df_prog: pd.DataFrame) -> pd.DataFrame:
+    from progress_store import assignment_pairs
+    pairs = assignment_pairs(df_assign, "Learning Modules")
+    existing = pd.DataFrame({"email": df_prog["email"], "item_key": df_prog["module"].str.lower()})
+    merged = pairs.merge(existing, on=["email", "item_key"], how="left", indicator=True)
+    return merged[merged["_merge"] == "left_only"]
+
+
+def _best(fn, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main(n: int):
+    df_assign = synthetic_assignments(n)
+    from progress_store import assignment_pairs
+    all_pairs = assignment_pairs(df_assign, "Learning Modules")
+    half = all_pairs.sample(frac=0.5, random_state=1)
+    df_prog = pd.DataFrame({"email": half["email"], "module": half["item"], "completed": False})
+    print(f"{n} employees, {len(all_pairs)} assigned pairs, {len(df_prog)} already seeded")
+
+    n_legacy = len(legacy_missing(df_assign, df_prog))
+    n_vec = len(vectorised_missing(df_assign, df_prog))
+    assert n_legacy == n_vec, (n_legacy, n_vec)
+
+    t_legacy = _best(lambda: legacy_missing(df_assign, df_prog), repeat=1)
+    t_vec = _best(lambda: vectorised_missing(df_assign, df_prog))
+    print(f"find missing pairs   legacy loop {t_legacy * 1000:9.1f} ms")
+    print(f"                     vectorised  {t_vec * 1000:9.1f} ms   ({t_legacy / t_vec:.1f}x)")
+
+    # End to end against a scratch database: first run inserts, the rerun is a stat
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, db_path = os.path.join(tmp, "assign.csv"), os.path.join(tmp, "bench.db")
+        df_assign.to_csv(csv_path, index=False)
+        import progress_store
+        t0 = time.perf_counter()
+        added = progress_store.seed_from_assignments(csv_path, path=db_path)
+        t_cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        progress_store.seed_from_assignments(csv_path, path=db_path)
+        t_warm = time.perf_counter() - t0
+        import db
+        db.close_all()
+    print(f"seed_from_assignments  first run {t_cold * 1000:9.1f} ms   ({added} rows)")
+    print(f"                       rerun     {t_warm * 1000:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
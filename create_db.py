@@ -1,6 +1,8 @@
 import sqlite3
 import pandas as pd
 
+from migrations import migrate
+
 CSV_PATH = "datasets/Employee Dataset1.csv"
 DB_PATH = "mentormatch.db"
 
@@ -49,96 +51,13 @@ users_df = df[[
     "office_hours", "college", "age", "salary"
 ]].copy()
 
-# -------- 2) Create DB & tables --------
+# -------- 2) Create DB & tables (see migrations.py) --------
+migrate(DB_PATH)
+
 con = sqlite3.connect(DB_PATH)
 con.execute("PRAGMA foreign_keys = ON;")
 cur = con.cursor()
 
-# --- Users ---
-cur.execute("""
-CREATE TABLE IF NOT EXISTS users(
-  ID INTEGER PRIMARY KEY,
-  name TEXT NOT NULL,
-  email TEXT UNIQUE NOT NULL,
-  position TEXT,
-  department TEXT,
-  team TEXT,
-  skills TEXT,
-  months_experience INTEGER DEFAULT 0,
-  is_mentor INTEGER DEFAULT 0,
-  chat TEXT,
-  timezone TEXT,
-  topics TEXT,
-  office_hours TEXT,
-  college TEXT,
-  age INTEGER,
-  salary REAL
-);
-""")
-
-# --- Sessions ---
-cur.execute("""
-CREATE TABLE IF NOT EXISTS sessions(
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  mentee_email TEXT NOT NULL,
-  mentor_email TEXT NOT NULL,
-  mentor_id INTEGER NOT NULL,
-  status TEXT NOT NULL,               -- requested/approved/booked/cancelled
-  start_utc TEXT,
-  end_utc TEXT,
-  location TEXT,
-  graph_event_id TEXT,
-  notes TEXT,
-  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-  FOREIGN KEY (mentor_id) REFERENCES users(ID)
-);
-""")
-
-# --- Rewards (history-friendly) ---
-cur.execute("""
-CREATE TABLE IF NOT EXISTS rewards(
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  mentor_id INTEGER NOT NULL,
-  points_total INTEGER DEFAULT 0,
-  last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
-  FOREIGN KEY (mentor_id) REFERENCES users(ID)
-);
-""")
-
-# --- Audit logs ---
-cur.execute("""
-CREATE TABLE IF NOT EXISTS audit_logs(
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  user_id INTEGER NOT NULL,
-  action TEXT NOT NULL,
-  details_json TEXT,
-  created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-  FOREIGN KEY (user_id) REFERENCES users(ID)
-);
-""")
-
-# --- Notifications ---
-cur.execute("""
-CREATE TABLE IF NOT EXISTS notifications(
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  user_email TEXT NOT NULL,
-  message TEXT NOT NULL,
-  ics_path TEXT,
-  created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-);
-""")
-
-# --- Chat history ---
-cur.execute("""
-CREATE TABLE IF NOT EXISTS chat_history(
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  user_email TEXT NOT NULL,
-  role TEXT NOT NULL,  -- 'user' or 'assistant'
-  message TEXT NOT NULL,
-  created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-);
-""")
-
 # -------- 3) Upsert users --------
 cur.executemany("""
 INSERT OR REPLACE INTO users
@@ -148,6 +67,12 @@ INSERT OR REPLACE INTO users
 VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
 """, users_df.itertuples(index=False, name=None))
 
+# INSERT OR REPLACE deletes without firing the delete trigger, so re-derive the index
+try:
+    cur.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+except sqlite3.OperationalError:
+    pass  # no FTS5 in this SQLite build
+
 # -------- 4) Initialize rewards for mentors --------
 cur.execute("""
 INSERT INTO rewards(mentor_id, points_total)
@@ -0,0 +1,164 @@
+import os
+import queue
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+from profiling import timed, section
+
+# ----------------------------
+# Shared access to mentormatch.db
+# ----------------------------
+# A thread holds one connection per database file for as long as it runs.
+# Streamlit starts a new script thread on every rerun, so when a thread ends
+# its connections go back to a shared idle pool (opened with
+# check_same_thread=False) and the next thread reuses one, statement cache
+# included, instead of opening a fresh connection. A connection is only ever
+# used by the thread holding it. Connections run in autocommit mode; use
+# `transaction()` to group several writes.
+DB_PATH = os.getenv("DB_PATH", "mentormatch.db")
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))   # idle connections kept per file
+
+_local = threading.local()
+_idle = {}                  # path -> LifoQueue of idle connections
+_idle_lock = threading.Lock()
+
+
+def _open(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+    )
+    con.row_factory = sqlite3.Row
+    con.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    try:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+    except sqlite3.OperationalError:
+        # Another process holds a lock while switching modes; keep the default journal
+        pass
+    return con
+
+
+def _idle_queue(path: str) -> queue.LifoQueue:
+    with _idle_lock:
+        q = _idle.get(path)
+        if q is None:
+            q = _idle[path] = queue.LifoQueue(maxsize=POOL_SIZE)
+        return q
+
+
+def _checkin(path: str, con: sqlite3.Connection):
+    try:
+        if con.in_transaction:
+            con.execute("ROLLBACK")
+        _idle_queue(path).put_nowait(con)
+    except (queue.Full, sqlite3.Error):
+        con.close()
+
+
+def _release(held: dict):
+    for path, con in held.items():
+        _checkin(path, con)
+    held.clear()
+
+
+class _Lease:
+    """The connections held by one thread, returned to the idle pool when the thread ends."""
+
+    def __init__(self):
+        self.held = {}
+        weakref.finalize(self, _release, self.held)
+
+
+def connect(path: str | None = None) -> sqlite3.Connection:
+    """Return the calling thread's pooled connection to `path` (default DB_PATH).
+
+    The connection is owned by the pool: callers must not close it.
+    """
+    path = path or DB_PATH
+    lease = getattr(_local, "lease", None)
+    if lease is None:
+        lease = _local.lease = _Lease()
+    con = lease.held.get(path)
+    if con is None:
+        try:
+            con = _idle_queue(path).get_nowait()
+        except queue.Empty:
+            con = _open(path)
+        lease.held[path] = con
+    return con
+
+
+def close_all():
+    """Close the calling thread's connections and every idle pooled one."""
+    lease = getattr(_local, "lease", None)
+    if lease is not None:
+        for con in lease.held.values():
+            con.close()
+        lease.held.clear()
+    with _idle_lock:
+        queues = list(_idle.values())
+    for q in queues:
+        while True:
+            try:
+                q.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+@contextmanager
+def transaction(path: str | None = None):
+    """`with transaction() as con:` — BEGIN IMMEDIATE … COMMIT, ROLLBACK on error.
+
+    Nested use joins the outer transaction.
+    """
+    con = connect(path)
+    if con.in_transaction:
+        yield con
+        return
+    with section("db", "transaction"):
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+
+
+# ----------------------------
+# Query helpers
+# ----------------------------
+@timed("db")
+def query(sql: str, params=(), path: str | None = None) -> list[dict]:
+    return [dict(r) for r in connect(path).execute(sql, params).fetchall()]
+
+
+@timed("db")
+def query_one(sql: str, params=(), path: str | None = None) -> dict | None:
+    row = connect(path).execute(sql, params).fetchone()
+    return dict(row) if row else None
+
+
+@timed("db")
+def scalar(sql: str, params=(), path: str | None = None):
+    row = connect(path).execute(sql, params).fetchone()
+    return row[0] if row else None
+
+
+@timed("db")
+def execute(sql: str, params=(), path: str | None = None) -> int:
+    """Run one write statement (committed immediately) and return lastrowid."""
+    return connect(path).execute(sql, params).lastrowid
+
+
+@timed("db")
+def executescript(script: str, path: str | None = None):
+    connect(path).executescript(script)
@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+import subprocess
+
+# ----------------------------
+# Import-time budget
+# ----------------------------
+# The Homepage and every page import these modules before anything renders, so
+# they must not build LLM clients, read CSVs or touch the DB at import time.
+# Each module is imported in a fresh interpreter (nothing warm in sys.modules)
+# and the import time is compared with the budget.
+
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+MODULES = [
+    "agents.mentor_agent",
+    "agents.onboarding_chatbot",
+]
+
+_PROBE = """
+import json, sys, time
+import streamlit, pandas, numpy  # shared third-party baseline, not counted
+t0 = time.perf_counter()
+__import__(sys.argv[1])
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000,
+                  "genai_loaded": "google.generativeai" in sys.modules,
+                  "langchain_google_loaded": "langchain_google_genai" in sys.modules}))
+"""
+
+
+def measure(module: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE, module],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "import failed"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def check(budget_ms: float = IMPORT_BUDGET_MS) -> bool:
+    ok = True
+    for module in MODULES:
+        r = measure(module)
+        if "error" in r:
+            print(f"FAIL {module}: {r['error']}")
+            ok = False
+            continue
+        eager = [name for name in ("genai", "langchain_google") if r[f"{name}_loaded"]]
+        passed = r["ms"] <= budget_ms and not eager
+        print(f"{'ok  ' if passed else 'FAIL'} {module}: {r['ms']:.0f} ms (budget {budget_ms:.0f} ms)"
+              + (f", eagerly imported {', '.join(eager)}" if eager else ""))
+        ok &= passed
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check() else 1)
@@ -0,0 +1,351 @@
+import os
+import json
+from datetime import date, datetime, timezone
+
+import db
+from migrations import migrate
+
+# ----------------------------
+# Learning state (mentormatch.db `learning_*`)
+# ----------------------------
+# Each user's accepted upskilling plan and its progress tracker, replacing the
+# per-user userdata/*.json files:
+#
+#   learning_plans        one row per user (plan text, role, start date, hours)
+#   learning_phases       one row per (user, phase): weeks and completion
+#   learning_checkpoints  one row per (user, checkpoint id)
+#
+# Dates are stored as canonical ISO-8601 text in DATE/TIMESTAMP columns, so
+# they sort and compare in SQL and read back with a single strict
+# fromisoformat. `save_state` diffs the session dict against the stored rows
+# and writes only the fields and rows that changed.
+
+USERDATA_DIR = os.getenv("USERDATA_DIR", "userdata")
+
+# progress_tracker keys with their own columns; anything else goes to `extra`
+_TRACKER_KEYS = {"start_date", "weekly_hours", "phase_weeks", "phase_status", "checkpoints", "created_at"}
+_PLAN_COLUMNS = ["plan_text", "role", "accepted_at", "start_date", "weekly_hours", "tracker_created_at", "extra"]
+_PHASE_COLUMNS = ["weeks", "completed", "completed_at"]
+_CHECKPOINT_COLUMNS = ["position", "label", "phase", "target_date", "completed", "completed_at"]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _email(email: str) -> str:
+    return email.strip().lower()
+
+
+# ----------------------------
+# Value coercion (session values <-> columns)
+# ----------------------------
+def _as_date(val) -> str | None:
+    """ISO date text for a date/datetime/ISO string, None when unparseable."""
+    if isinstance(val, datetime):
+        return val.date().isoformat()
+    if isinstance(val, date):
+        return val.isoformat()
+    if isinstance(val, str) and val:
+        try:
+            return datetime.fromisoformat(val).date().isoformat()
+        except ValueError:
+            return None
+    return None
+
+
+def _as_timestamp(val) -> str | None:
+    if isinstance(val, datetime):
+        return val.isoformat()
+    if isinstance(val, date):
+        return datetime(val.year, val.month, val.day).isoformat()
+    if isinstance(val, str) and val:
+        try:
+            return datetime.fromisoformat(val).isoformat()
+        except ValueError:
+            return None
+    return None
+
+
+def _as_number(val) -> float | None:
+    try:
+        return float(val) if val is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_phase(val) -> int | None:
+    try:
+        return int(val) if val is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_flag(val) -> int:
+    return int(bool(val))
+
+
+def _number_out(val):
+    return int(val) if val is not None and float(val).is_integer() else val
+
+
+def _date_out(val) -> date | None:
+    return date.fromisoformat(val) if val else None
+
+
+def _timestamp_out(val) -> datetime | None:
+    return datetime.fromisoformat(val) if val else None
+
+
+# ----------------------------
+# Session dict -> rows
+# ----------------------------
+def _plan_row(data: dict) -> dict:
+    pt = data.get("progress_tracker") or {}
+    extra = {k: v for k, v in pt.items() if k not in _TRACKER_KEYS}
+    return {
+        "plan_text": data.get("chosen_upskillingplan"),
+        "role": data.get("accepted_plan_role"),
+        "accepted_at": _as_timestamp(data.get("accepted_at")),
+        "start_date": _as_date(pt.get("start_date")),
+        "weekly_hours": _as_number(pt.get("weekly_hours")),
+        "tracker_created_at": _as_timestamp(pt.get("created_at")),
+        "extra": json.dumps(extra, sort_keys=True, default=str) if extra else None,
+    }
+
+
+def _phase_rows(pt: dict) -> dict:
+    """{phase: (weeks, completed, completed_at)}; completed is NULL for phases without a status entry."""
+    rows = {}
+    for phase, weeks in (pt.get("phase_weeks") or {}).items():
+        if _as_phase(phase) is not None:
+            rows[_as_phase(phase)] = (_as_number(weeks), None, None)
+    for phase, status in (pt.get("phase_status") or {}).items():
+        key = _as_phase(phase)
+        if key is None or not isinstance(status, dict):
+            continue
+        weeks = rows.get(key, (None,))[0]
+        rows[key] = (weeks, _as_flag(status.get("completed")), _as_timestamp(status.get("completed_at")))
+    return rows
+
+
+def _checkpoint_rows(pt: dict) -> dict:
+    """{checkpoint id: (position, label, phase, target_date, completed, completed_at)}."""
+    rows = {}
+    for position, cp in enumerate(pt.get("checkpoints") or []):
+        if not isinstance(cp, dict) or not cp.get("id"):
+            continue
+        rows[str(cp["id"])] = (position, cp.get("label"), _as_phase(cp.get("phase")),
+                               _as_date(cp.get("target_date")), _as_flag(cp.get("completed")),
+                               _as_timestamp(cp.get("completed_at")))
+    return rows
+
+
+# ----------------------------
+# Writes
+# ----------------------------
+def _sync_plan(con, email: str, row: dict) -> int:
+    cols = ", ".join(_PLAN_COLUMNS)
+    current = con.execute(f"SELECT {cols} FROM learning_plans WHERE email=?", (email,)).fetchone()
+    if current is None:
+        con.execute(f"""
+            INSERT INTO learning_plans (email, {cols}, updated_at)
+            VALUES (?, {", ".join("?" for _ in _PLAN_COLUMNS)}, ?)
+        """, (email, *(row[c] for c in _PLAN_COLUMNS), _now()))
+        return 1
+    changed = {c: row[c] for c in _PLAN_COLUMNS if current[c] != row[c]}
+    if changed:
+        sets = ", ".join(f"{c}=?" for c in changed)
+        con.execute(f"UPDATE learning_plans SET {sets}, updated_at=? WHERE email=?",
+                    (*changed.values(), _now(), email))
+    return len(changed)
+
+
+def _sync_rows(con, table: str, key: str, columns: list[str], email: str, rows: dict) -> int:
+    """Upsert the rows of `email` that differ from `table` and delete the ones no longer present."""
+    cols = ", ".join(columns)
+    existing = {r[0]: tuple(r[1:]) for r in con.execute(
+        f"SELECT {key}, {cols} FROM {table} WHERE email=?", (email,))}
+    upserts = [(email, k, *v) for k, v in rows.items() if existing.get(k) != v]
+    gone = [(email, k) for k in existing if k not in rows]
+    if upserts:
+        con.executemany(f"""
+            INSERT OR REPLACE INTO {table} (email, {key}, {cols})
+            VALUES (?, ?, {", ".join("?" for _ in columns)})
+        """, upserts)
+    if gone:
+        con.executemany(f"DELETE FROM {table} WHERE email=? AND {key}=?", gone)
+    return len(upserts) + len(gone)
+
+
+def write_state(con, email: str, data: dict) -> int:
+    """`save_state` on an open transaction."""
+    email = _email(email)
+    pt = data.get("progress_tracker") or {}
+    return (_sync_plan(con, email, _plan_row(data))
+            + _sync_rows(con, "learning_phases", "phase", _PHASE_COLUMNS, email, _phase_rows(pt))
+            + _sync_rows(con, "learning_checkpoints", "cp_id", _CHECKPOINT_COLUMNS, email, _checkpoint_rows(pt)))
+
+
+def save_state(email: str, data: dict, path: str | None = None) -> int:
+    """Store a user's learning state (the session dict layout); returns the fields/rows written."""
+    migrate(path)
+    with db.transaction(path) as con:
+        return write_state(con, email, data)
+
+
+def update_plan(email: str, path: str | None = None, **fields) -> bool:
+    """Set single plan columns (plan_text, role, accepted_at, start_date, weekly_hours)."""
+    coerce = {"plan_text": str, "role": str, "accepted_at": _as_timestamp,
+              "start_date": _as_date, "weekly_hours": _as_number}
+    unknown = set(fields) - set(coerce)
+    if unknown:
+        raise ValueError(f"cannot update {sorted(unknown)}")
+    if not fields:
+        return False
+    migrate(path)
+    values = {k: (coerce[k](v) if v is not None else None) for k, v in fields.items()}
+    sets = ", ".join(f"{k}=?" for k in values)
+    with db.transaction(path) as con:
+        return con.execute(f"UPDATE learning_plans SET {sets}, updated_at=? WHERE email=?",
+                           (*values.values(), _now(), _email(email))).rowcount > 0
+
+
+def set_checkpoint(email: str, cp_id: str, completed: bool, path: str | None = None) -> bool:
+    """Tick or untick one checkpoint; completed_at is set to now / cleared."""
+    migrate(path)
+    with db.transaction(path) as con:
+        return con.execute("""
+            UPDATE learning_checkpoints SET completed=?, completed_at=?
+            WHERE email=? AND cp_id=? AND completed != ?
+        """, (int(completed), datetime.utcnow().isoformat() if completed else None,
+              _email(email), str(cp_id), int(completed))).rowcount > 0
+
+
+# ----------------------------
+# Reads
+# ----------------------------
+def load_state(email: str, path: str | None = None) -> dict:
+    """The session dict for `email` (chosen_upskillingplan, ..., progress_tracker); {} if none is stored."""
+    migrate(path)
+    email = _email(email)
+    plan = db.query_one("SELECT * FROM learning_plans WHERE email=?", (email,), path=path)
+    if plan is None:
+        return {}
+    phases = db.query("SELECT * FROM learning_phases WHERE email=? ORDER BY phase", (email,), path=path)
+    cps = db.query("SELECT * FROM learning_checkpoints WHERE email=? ORDER BY position", (email,), path=path)
+
+    pt = json.loads(plan["extra"]) if plan["extra"] else {}
+    pt.update({
+        "start_date": _date_out(plan["start_date"]),
+        "phase_weeks": {p["phase"]: _number_out(p["weeks"]) for p in phases if p["weeks"] is not None},
+        "phase_status": {p["phase"]: {"completed": bool(p["completed"]),
+                                      "completed_at": _timestamp_out(p["completed_at"])}
+                         for p in phases if p["completed"] is not None},
+        "checkpoints": [{
+            "id": c["cp_id"], "label": c["label"], "phase": c["phase"],
+            "target_date": _date_out(c["target_date"]), "completed": bool(c["completed"]),
+            "completed_at": _timestamp_out(c["completed_at"]),
+        } for c in cps],
+    })
+    if plan["weekly_hours"] is not None:
+        pt["weekly_hours"] = _number_out(plan["weekly_hours"])
+    if plan["tracker_created_at"]:
+        pt["created_at"] = plan["tracker_created_at"]
+    return {
+        "chosen_upskillingplan": plan["plan_text"],
+        "accepted_plan_role": plan["role"],
+        "accepted_at": plan["accepted_at"],
+        "progress_tracker": pt,
+    }
+
+
+# ----------------------------
+# Cross-user aggregates
+# ----------------------------
+def role_summary(path: str | None = None) -> list[dict]:
+    """Per accepted role: learners, checkpoints done/total and phases completed."""
+    migrate(path)
+    return db.query("""
+        SELECT p.role AS role,
+               COUNT(DISTINCT p.email) AS learners,
+               COALESCE(SUM(c.done), 0) AS checkpoints_done,
+               COALESCE(SUM(c.total), 0) AS checkpoints_total,
+               COALESCE(SUM(ph.done), 0) AS phases_done
+        FROM learning_plans p
+        LEFT JOIN (SELECT email, SUM(completed) AS done, COUNT(*) AS total
+                   FROM learning_checkpoints GROUP BY email) c ON c.email = p.email
+        LEFT JOIN (SELECT email, SUM(completed = 1) AS done
+                   FROM learning_phases GROUP BY email) ph ON ph.email = p.email
+        WHERE p.plan_text IS NOT NULL
+        GROUP BY p.role ORDER BY learners DESC
+    """, path=path)
+
+
+def overdue_checkpoints(as_of: date | None = None, limit: int = 100, path: str | None = None) -> list[dict]:
+    """Open checkpoints whose target date is before `as_of` (default today), oldest first."""
+    migrate(path)
+    return db.query("""
+        SELECT email, cp_id, label, phase, target_date FROM learning_checkpoints
+        WHERE completed=0 AND target_date < ?
+        ORDER BY target_date LIMIT ?
+    """, ((as_of or date.today()).isoformat(), int(limit)), path=path)
+
+
+# ----------------------------
+# Import of userdata/*.json
+# ----------------------------
+def email_from_filename(name: str) -> str:
+    """Inverse of the legacy userdata file naming (a_at_b_dot_com.json)."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return stem.replace("_at_", "@").replace("_dot_", ".").lower()
+
+
+def read_json_dir(directory: str = USERDATA_DIR):
+    """(email, data) for every readable userdata/*.json file."""
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if isinstance(data, dict):
+            yield email_from_filename(name), data
+
+
+def import_json_dir(directory: str = USERDATA_DIR, overwrite: bool = False, path: str | None = None) -> int:
+    """Import userdata/*.json in one transaction; users already stored are kept unless `overwrite`."""
+    migrate(path)
+    imported = 0
+    with db.transaction(path) as con:
+        for email, data in read_json_dir(directory):
+            if not overwrite and con.execute("SELECT 1 FROM learning_plans WHERE email=?", (email,)).fetchone():
+                continue
+            write_state(con, email, data)
+            imported += 1
+    return imported
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Learning-state store: import legacy JSON or print aggregates.")
+    ap.add_argument("action", choices=["import", "stats"])
+    ap.add_argument("directory", nargs="?", default=USERDATA_DIR)
+    ap.add_argument("--overwrite", action="store_true", help="replace users already in the store")
+    ap.add_argument("--db", default=db.DB_PATH)
+    args = ap.parse_args()
+
+    if args.action == "import":
+        print(f"imported {import_json_dir(args.directory, args.overwrite, path=args.db)} users from {args.directory}")
+    else:
+        for r in role_summary(path=args.db):
+            pct = r["checkpoints_done"] / r["checkpoints_total"] * 100 if r["checkpoints_total"] else 0
+            print(f"{r['role'] or '(no role)':<30} learners={r['learners']:<5} "
+                  f"checkpoints={r['checkpoints_done']}/{r['checkpoints_total']} ({pct:.0f}%) "
+                  f"phases_done={r['phases_done']}")
+        print(f"overdue checkpoints: {len(overdue_checkpoints(limit=10_000, path=args.db))}")
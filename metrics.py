@@ -0,0 +1,69 @@
+import threading
+from collections import defaultdict, deque
+
+import numpy as np
+
+# ----------------------------
+# In-process metrics (shared by every Streamlit session)
+# ----------------------------
+# Counters are plain integers; observations keep the last MAX_SAMPLES values
+# per name so percentiles stay cheap to compute.
+MAX_SAMPLES = 1000
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+
+
+def incr(name: str, value: int = 1):
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, value: float):
+    with _lock:
+        _samples[name].append(float(value))
+
+
+def counter(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def ratio(hits: str, misses: str) -> float:
+    """Share of `hits` among `hits + misses` (0.0 when nothing was recorded)."""
+    h, m = counter(hits), counter(misses)
+    return h / (h + m) if (h + m) else 0.0
+
+
+def summary(name: str) -> dict:
+    with _lock:
+        vals = list(_samples.get(name, ()))
+    if not vals:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "max": None}
+    arr = np.asarray(vals)
+    return {
+        "count": len(vals),
+        "mean": round(float(arr.mean()), 3),
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p95": round(float(np.percentile(arr, 95)), 3),
+        "max": round(float(arr.max()), 3),
+    }
+
+
+def snapshot(prefix: str = "") -> dict:
+    """All counters and observation summaries whose name starts with `prefix`."""
+    with _lock:
+        counter_names = [n for n in _counters if n.startswith(prefix)]
+        sample_names = [n for n in _samples if n.startswith(prefix)]
+        counters = {n: _counters[n] for n in counter_names}
+    return {
+        "counters": dict(sorted(counters.items())),
+        "observations": {n: summary(n) for n in sorted(sample_names)},
+    }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _samples.clear()
@@ -0,0 +1,478 @@
+import os
+import sqlite3
+import threading
+
+import db
+
+# ----------------------------
+# Versioned schema migrations for mentormatch.db
+# ----------------------------
+# Each migration is (version, name, steps); a step is one SQL statement or a
+# callable taking the connection. Migrations run in order inside a single
+# transaction each and are recorded in `schema_version`, so every entry point
+# (create_db.py, the Homepage, the agent, the pages) can call `migrate()`
+# cheaply on start-up. Never edit a released migration — append a new one.
+
+_BASELINE = [
+    """
+    CREATE TABLE IF NOT EXISTS users(
+      ID INTEGER PRIMARY KEY,
+      name TEXT NOT NULL,
+      email TEXT UNIQUE NOT NULL,
+      position TEXT,
+      department TEXT,
+      team TEXT,
+      skills TEXT,
+      months_experience INTEGER DEFAULT 0,
+      is_mentor INTEGER DEFAULT 0,
+      chat TEXT,
+      timezone TEXT,
+      topics TEXT,
+      office_hours TEXT,
+      college TEXT,
+      age INTEGER,
+      salary REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sessions(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      mentee_email TEXT NOT NULL,
+      mentor_email TEXT NOT NULL,
+      mentor_id INTEGER NOT NULL,
+      status TEXT NOT NULL,               -- requested/approved/booked/completed/cancelled
+      start_utc TEXT,
+      end_utc TEXT,
+      location TEXT,
+      graph_event_id TEXT,
+      notes TEXT,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+      FOREIGN KEY (mentor_id) REFERENCES users(ID)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rewards(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      mentor_id INTEGER NOT NULL,
+      points_total INTEGER DEFAULT 0,
+      last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+      FOREIGN KEY (mentor_id) REFERENCES users(ID)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS audit_logs(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      user_id INTEGER NOT NULL,
+      action TEXT NOT NULL,
+      details_json TEXT,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+      FOREIGN KEY (user_id) REFERENCES users(ID)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS notifications(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      user_email TEXT NOT NULL,
+      message TEXT NOT NULL,
+      ics_path TEXT,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_history(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      user_email TEXT NOT NULL,
+      role TEXT NOT NULL,  -- 'user' or 'assistant'
+      message TEXT NOT NULL,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS feedback(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      session_id INTEGER,
+      user_email TEXT,
+      role TEXT,
+      takeaway TEXT,
+      rating INTEGER,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tickets(
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      user_email TEXT NOT NULL,
+      title TEXT NOT NULL,
+      status TEXT NOT NULL DEFAULT 'open',   -- open | in_progress | resolved | closed
+      details TEXT,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+      updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+]
+
+
+def _columns(con, table: str) -> set[str]:
+    return {r[1] for r in con.execute(f"PRAGMA table_info({table})")}
+
+
+def _sessions_mentor_email(con):
+    # mentor_agent.ensure_tables used to create `sessions` without mentor_email,
+    # while every insert writes it. Add and backfill it for those databases.
+    if "mentor_email" in _columns(con, "sessions"):
+        return
+    con.execute("ALTER TABLE sessions ADD COLUMN mentor_email TEXT NOT NULL DEFAULT ''")
+    con.execute("""
+        UPDATE sessions
+        SET mentor_email = COALESCE((SELECT email FROM users WHERE users.ID = sessions.mentor_id), '')
+    """)
+
+
+def _users_fts(con):
+    try:
+        con.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+              skills, topics, position, team, department,
+              content='users', content_rowid='ID',
+              tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: mentor search keeps using LIKE
+        return
+    con.execute("""
+        CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+          INSERT INTO users_fts(rowid, skills, topics, position, team, department)
+          VALUES (new.ID, new.skills, new.topics, new.position, new.team, new.department);
+        END
+    """)
+    con.execute("""
+        CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+          INSERT INTO users_fts(users_fts, rowid, skills, topics, position, team, department)
+          VALUES ('delete', old.ID, old.skills, old.topics, old.position, old.team, old.department);
+        END
+    """)
+    con.execute("""
+        CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE ON users BEGIN
+          INSERT INTO users_fts(users_fts, rowid, skills, topics, position, team, department)
+          VALUES ('delete', old.ID, old.skills, old.topics, old.position, old.team, old.department);
+          INSERT INTO users_fts(rowid, skills, topics, position, team, department)
+          VALUES (new.ID, new.skills, new.topics, new.position, new.team, new.department);
+        END
+    """)
+    con.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+
+
+_LEGACY_STATUS = {"open": "NEW", "in_progress": "IN_PROGRESS", "resolved": "RESOLVED", "closed": "CLOSED"}
+
+
+def _ticket_engine(con):
+    # One ticket table for the chat intake, MyTickets and the onboarding bot.
+    # Imports the old stores: the sidebar `tickets` table, datasets/tickets.csv
+    # and the onboarding bot's tickets.db.
+    from ticket_store import read_csv_rows, upsert_rows, now_iso
+
+    legacy = []
+    if "user_email" in _columns(con, "tickets"):
+        for r in con.execute("SELECT * FROM tickets").fetchall():
+            legacy.append({
+                "id": None, "title": r["title"], "description": r["details"] or "",
+                "status": _LEGACY_STATUS.get(str(r["status"]).lower(), "NEW"), "priority": "P3",
+                "category_key": "", "requester_email": r["user_email"], "assignee_email": "",
+                "role": "EMPLOYEE", "created_at": r["created_at"] or now_iso(),
+                "updated_at": r["updated_at"] or r["created_at"] or now_iso(),
+            })
+        con.execute("DROP TABLE tickets")
+
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS tickets(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          title TEXT NOT NULL,
+          description TEXT NOT NULL DEFAULT '',
+          status TEXT NOT NULL DEFAULT 'NEW',      -- ticket_store.STATUSES
+          priority TEXT NOT NULL DEFAULT 'P3',
+          category_key TEXT NOT NULL DEFAULT '',
+          requester_email TEXT NOT NULL,
+          assignee_email TEXT NOT NULL DEFAULT '',
+          role TEXT NOT NULL DEFAULT 'EMPLOYEE',
+          created_at TEXT NOT NULL,
+          updated_at TEXT NOT NULL
+        )
+    """)
+    for sql in (
+        "CREATE INDEX IF NOT EXISTS idx_tickets_requester_created ON tickets(requester_email, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_assignee_status ON tickets(assignee_email, status)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_status_created ON tickets(status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_category_status ON tickets(category_key, status)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets(created_at)",
+    ):
+        con.execute(sql)
+
+    # CSV ids are kept (users refer to "#12"); the other stores get new ids
+    upsert_rows(con, read_csv_rows(os.getenv(
+        "TICKETS_CSV", os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets", "tickets.csv"))))
+    upsert_rows(con, legacy)
+    onboarding_db = os.getenv("ONBOARDING_TICKETS_DB", "tickets.db")
+    if os.path.exists(onboarding_db):
+        old = sqlite3.connect(onboarding_db)
+        try:
+            rows = old.execute("SELECT User, Issue, Status, CreatedAt FROM tickets").fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+        finally:
+            old.close()
+        upsert_rows(con, [{
+            "id": None, "title": issue[:80], "description": issue,
+            "status": "CLOSED" if str(status).lower() == "closed" else "NEW", "priority": "P3",
+            "category_key": "it", "requester_email": user or "", "assignee_email": "",
+            "role": "EMPLOYEE", "created_at": created or now_iso(), "updated_at": created or now_iso(),
+        } for user, issue, status, created in rows if issue])
+
+
+def _progress_store(con):
+    # Checklist progress (progress_store.py), imported from the legacy CSVs
+    from progress_store import MIRRORS, read_mirror_rows
+
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS progress(
+          email TEXT NOT NULL,
+          kind TEXT NOT NULL,         -- module | document | software
+          item_key TEXT NOT NULL,     -- lower-cased item
+          item TEXT NOT NULL,
+          completed INTEGER NOT NULL DEFAULT 0,
+          updated_at TEXT NOT NULL,
+          PRIMARY KEY (email, kind, item_key)
+        ) WITHOUT ROWID
+    """)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_progress_kind_item ON progress(kind, item_key)")
+    for kind in MIRRORS:
+        con.executemany("""
+            INSERT OR REPLACE INTO progress (email, kind, item_key, item, completed, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, [(email, kind, item.lower(), item, int(done)) for email, item, done in read_mirror_rows(kind)])
+
+
+def _learning_store(con):
+    # Per-user learning plans (learning_store.py), imported from userdata/*.json
+    from learning_store import USERDATA_DIR, read_json_dir, write_state
+
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS learning_plans(
+          email TEXT PRIMARY KEY,
+          plan_text TEXT,
+          role TEXT,
+          accepted_at TIMESTAMP,
+          start_date DATE,
+          weekly_hours REAL,
+          tracker_created_at TIMESTAMP,
+          extra TEXT,                 -- JSON of other progress_tracker keys
+          updated_at TIMESTAMP NOT NULL
+        )
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS learning_phases(
+          email TEXT NOT NULL,
+          phase INTEGER NOT NULL,
+          weeks REAL,
+          completed INTEGER,          -- NULL: no status recorded yet
+          completed_at TIMESTAMP,
+          PRIMARY KEY (email, phase)
+        ) WITHOUT ROWID
+    """)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS learning_checkpoints(
+          email TEXT NOT NULL,
+          cp_id TEXT NOT NULL,
+          position INTEGER NOT NULL,
+          label TEXT,
+          phase INTEGER,
+          target_date DATE,
+          completed INTEGER NOT NULL DEFAULT 0,
+          completed_at TIMESTAMP,
+          PRIMARY KEY (email, cp_id)
+        ) WITHOUT ROWID
+    """)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_learning_checkpoints_due "
+                "ON learning_checkpoints(completed, target_date)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_learning_plans_role ON learning_plans(role)")
+    for email, data in read_json_dir(USERDATA_DIR):
+        write_state(con, email, data)
+
+
+_HOT_PATH_INDEXES = [
+    # mentee bookings / dashboard / meetings_in, ordered by start time
+    "CREATE INDEX IF NOT EXISTS idx_sessions_mentee_start ON sessions(mentee_email, start_utc)",
+    # pending requests for a mentor, newest first
+    "CREATE INDEX IF NOT EXISTS idx_sessions_mentor_status ON sessions(mentor_id, status, created_at)",
+    # booked → completed sweep on the mentee requests page
+    "CREATE INDEX IF NOT EXISTS idx_sessions_status_end ON sessions(status, end_utc)",
+    "CREATE INDEX IF NOT EXISTS idx_notifications_user_created ON notifications(user_email, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_chat_history_user_created ON chat_history(user_email, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_feedback_session_user ON feedback(session_id, user_email)",
+    "CREATE INDEX IF NOT EXISTS idx_feedback_user_created ON feedback(user_email, created_at)",
+    "ANALYZE",
+]
+
+MIGRATIONS = [
+    (1, "baseline tables", _BASELINE),
+    (2, "sessions.mentor_email", [_sessions_mentor_email]),
+    (3, "users full-text index", [_users_fts]),
+    (4, "hot path indexes", _HOT_PATH_INDEXES),
+    # keyset pagination of chat history (WHERE user_email=? AND id < ? ORDER BY id DESC)
+    (5, "chat history keyset index", [
+        "CREATE INDEX IF NOT EXISTS idx_chat_history_user_id ON chat_history(user_email, id)",
+    ]),
+    # semantic cache of onboarding answers (agents/response_cache.py)
+    (6, "response cache", [
+        """
+        CREATE TABLE IF NOT EXISTS response_cache(
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          scope TEXT NOT NULL,          -- team|position of the asker
+          fingerprint TEXT NOT NULL,    -- source CSV fingerprint
+          text_key TEXT NOT NULL,       -- sha1 of the normalised query
+          query TEXT,
+          vector BLOB NOT NULL,         -- unit float32 query embedding
+          response TEXT NOT NULL,
+          created_at REAL NOT NULL,
+          last_used REAL NOT NULL,
+          hits INTEGER DEFAULT 0,
+          UNIQUE(scope, fingerprint, text_key)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache(last_used)",
+    ]),
+    # single ticket store (ticket_store.py), replacing tickets.csv and tickets.db
+    (7, "ticket engine", [_ticket_engine]),
+    # learning/documents/software checklists (progress_store.py), replacing the progress CSVs
+    (8, "checklist progress", [_progress_store]),
+    # plans, phases and checkpoints (learning_store.py), replacing userdata/*.json
+    (9, "learning state", [_learning_store]),
+    # persisted query embeddings (agents/embedding_cache.py)
+    (10, "embedding cache", [
+        """
+        CREATE TABLE IF NOT EXISTS embedding_cache(
+          key TEXT PRIMARY KEY,         -- sha1 of namespace + normalised query
+          text TEXT,
+          vector BLOB NOT NULL,         -- float32 query embedding
+          created_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_embedding_cache_created ON embedding_cache(created_at)",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+_migrated = set()
+_lock = threading.Lock()
+
+
+def current_version(path: str | None = None) -> int:
+    con = db.connect(path)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version(
+          version INTEGER PRIMARY KEY,
+          name TEXT NOT NULL,
+          applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return con.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(path: str | None = None) -> list[int]:
+    """Apply pending migrations to `path` (default db.DB_PATH); returns the versions applied.
+
+    Runs at most once per process and database file.
+    """
+    path = path or db.DB_PATH
+    if path in _migrated:
+        return []
+    applied = []
+    with _lock:
+        if path in _migrated:
+            return []
+        if current_version(path) < LATEST_VERSION:
+            for version, name, steps in MIGRATIONS:
+                with db.transaction(path) as con:
+                    # Re-check under the write lock: another process may have migrated first
+                    if con.execute("SELECT 1 FROM schema_version WHERE version=?", (version,)).fetchone():
+                        continue
+                    for step in steps:
+                        if callable(step):
+                            step(con)
+                        else:
+                            con.execute(step)
+                    con.execute("INSERT INTO schema_version(version, name) VALUES (?, ?)", (version, name))
+                applied.append(version)
+        _migrated.add(path)
+    return applied
+
+
+# ----------------------------
+# Query-plan check for the hot queries
+# ----------------------------
+HOT_QUERIES = {
+    "bookings as mentee": (
+        "SELECT * FROM sessions WHERE mentee_email=? ORDER BY start_utc DESC", ("a@x",)),
+    "pending requests": (
+        "SELECT * FROM sessions WHERE mentor_id=? AND status='requested' ORDER BY created_at DESC", (1,)),
+    "complete booked sessions": (
+        "UPDATE sessions SET status='completed' WHERE status='booked' AND end_utc < ?", ("2025-01-01",)),
+    "notifications": (
+        "SELECT * FROM notifications WHERE user_email=? ORDER BY created_at DESC", ("a@x",)),
+    "chat history page": (
+        "SELECT id, role, message FROM chat_history WHERE user_email=? AND id < ? ORDER BY id DESC LIMIT 50",
+        ("a@x", 1000)),
+    "takeaway for session": (
+        "SELECT 1 FROM feedback f WHERE f.session_id=? AND f.user_email=?", (1, "a@x")),
+    "my takeaways": (
+        "SELECT * FROM feedback WHERE user_email=? ORDER BY created_at DESC", ("a@x",)),
+    "my tickets": (
+        "SELECT * FROM tickets WHERE requester_email=? ORDER BY created_at DESC", ("a@x",)),
+    "ticket queue": (
+        "SELECT * FROM tickets WHERE category_key=? AND status=? ORDER BY created_at DESC", ("it", "NEW")),
+    "checklist progress": (
+        "SELECT item_key, completed FROM progress WHERE email=? AND kind=?", ("a@x", "module")),
+    "overdue checkpoints": (
+        "SELECT email, label, target_date FROM learning_checkpoints WHERE completed=0 AND target_date < ? "
+        "ORDER BY target_date LIMIT 100", ("2025-01-01",)),
+    "assigned tickets": (
+        "SELECT * FROM tickets WHERE assignee_email=? AND status=?", ("a@x", "NEW")),
+    "embedding cache eviction": (
+        "SELECT key FROM embedding_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?", (20000,)),
+}
+
+
+def check_query_plans(path: str | None = None) -> dict:
+    """EXPLAIN QUERY PLAN every hot query; a query fails if it scans a table or sorts in a temp B-tree.
+
+    Returns {name: (ok, plan lines)}.
+    """
+    migrate(path)
+    con = db.connect(path)
+    results = {}
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = [r[3] for r in con.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        bad = [p for p in plan if (p.startswith("SCAN") and "USING" not in p) or "TEMP B-TREE" in p]
+        results[name] = (not bad, plan)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    ap = argparse.ArgumentParser(description="Migrate mentormatch.db to the latest schema.")
+    ap.add_argument("--db", default=db.DB_PATH)
+    ap.add_argument("--check", action="store_true", help="Fail if a hot query does not use an index")
+    args = ap.parse_args()
+
+    applied = migrate(args.db)
+    print(f"{args.db}: schema version {current_version(args.db)}"
+          + (f" (applied {applied})" if applied else " (up to date)"))
+    if args.check:
+        failed = False
+        for name, (ok, plan) in check_query_plans(args.db).items():
+            print(f"{'ok  ' if ok else 'FAIL'} {name}: {' | '.join(plan)}")
+            failed |= not ok
+        sys.exit(1 if failed else 0)
@@ -1,61 +1,37 @@
+import profiling
+profiling.begin_rerun("mentee_requests")
+
 import streamlit as st
-import sqlite3
+import db
+from migrations import migrate
 from agents.mentor_agent import _tool_approve_session
 from utils import notifications_panel
 from datetime import datetime, timezone
+profiling.mark("import")
 
 
-DB_PATH = "mentormatch.db"
+DB_PATH = db.DB_PATH
 
 # ------------------- DB Helpers -------------------
-def _conn():
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
-
-def ensure_feedback_table():
-    """Ensure the feedback table exists with correct schema."""
-    con = _conn()
-    con.execute("""
-        CREATE TABLE IF NOT EXISTS feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id INTEGER,
-            user_email TEXT,
-            role TEXT,
-            takeaway TEXT,
-            rating INTEGER,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    con.commit()
-    con.close()
-
 def auto_update_completed_sessions():
     """Flip booked sessions to completed if end_utc < now()."""
     now = datetime.now(timezone.utc)
-    con = _conn()
-    con.execute("""
+    db.execute("""
         UPDATE sessions
         SET status='completed'
         WHERE status='booked'
           AND end_utc < ?
     """, (now.isoformat(),))
-    con.commit()
-    con.close()
 
 def get_pending_requests(mentor_id: int):
-    con = _conn()
-    rows = con.execute(
+    return db.query(
         "SELECT * FROM sessions WHERE mentor_id=? AND status='requested' ORDER BY created_at DESC",
         (mentor_id,)
-    ).fetchall()
-    con.close()
-    return [dict(r) for r in rows]
+    )
 
 def get_completed_sessions(user_email: str):
     """Return completed sessions for this mentee that do NOT yet have a takeaway."""
-    con = _conn()
-    rows = con.execute(
+    return db.query(
         """
         SELECT s.*, u.name AS mentee_name
         FROM sessions s
@@ -69,23 +45,17 @@ def get_completed_sessions(user_email: str):
         ORDER BY s.start_utc DESC
         """,
         (user_email, user_email)
-    ).fetchall()
-    con.close()
-    return [dict(r) for r in rows]
+    )
 
 def save_takeaway(session_id: int, user_email: str, takeaway: str, rating: int):
-    con = _conn()
-    con.execute(
+    db.execute(
         "INSERT INTO feedback (session_id, user_email, role, takeaway, rating) VALUES (?,?,?,?,?)",
         (session_id, user_email, "mentee", takeaway, rating),
     )
-    con.commit()
-    con.close()
 
 def get_my_takeaways(user_email: str):
     """Fetch all takeaways by this mentee."""
-    con = _conn()
-    rows = con.execute(
+    return db.query(
         """
         SELECT f.*, s.start_utc, s.end_utc, s.mentor_email
         FROM feedback f
@@ -94,21 +64,20 @@ def get_my_takeaways(user_email: str):
         ORDER BY f.created_at DESC
         """,
         (user_email,)
-    ).fetchall()
-    con.close()
-    return [dict(r) for r in rows]
+    )
 
 # ------------------- Page -------------------
 if "user" in st.session_state and st.session_state["user"]:
     notifications_panel(st.session_state["user"])
+    profiling.profiling_panel(st.session_state["user"])
 
 # 🚨 Block page if no login
 if "user" not in st.session_state or not st.session_state.user:
     st.warning("⚠️ Please login from the Homepage first.")
     st.stop()
 
-# ✅ Ensure feedback table + update sessions before UI
-ensure_feedback_table()
+# ✅ Ensure schema (feedback table, indexes) + update sessions before UI
+migrate()
 auto_update_completed_sessions()
 
 st.title("Mentee Requests & Session History")
@@ -140,10 +109,7 @@ if user.get("is_mentor"):
                     resp = _tool_approve_session(input_str)
                     st.success(f"Approved!\n\n{resp}")
                 if reject:
-                    con = _conn()
-                    con.execute("UPDATE sessions SET status='cancelled' WHERE id=?", (r["id"],))
-                    con.commit()
-                    con.close()
+                    db.execute("UPDATE sessions SET status='cancelled' WHERE id=?", (r["id"],))
                     st.warning("Request rejected.")
 
 # --- Section 2: Completed Sessions (Takeaway Submission) ---
@@ -213,3 +179,5 @@ else:
         </div>
         """, unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
+
+profiling.end_rerun()
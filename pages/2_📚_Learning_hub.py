@@ -1,3 +1,6 @@
+import profiling
+profiling.begin_rerun("learning_hub")
+
 import os
 import re
 import json
@@ -19,6 +22,10 @@ from dotenv import load_dotenv
 from utils import notifications_panel
 from utils import hydrate_session_from_json, persist_session_to_json
 import sqlite3
+import db
+import skill_catalog
+from skill_gap import gap_stats, parse_user_skills
+profiling.mark("import")
 
 
 
@@ -26,31 +33,16 @@ import sqlite3
 # Takeaways loader
 # --------------------------------------------------
 def load_latest_takeaway(user_email):
-    conn = None
     try:
-        conn = sqlite3.connect("mentormatch.db")
-        cur = conn.cursor()
-        # Check whether the feedback table exists. If not, treat as no takeaways.
-        cur.execute("""
-            SELECT name FROM sqlite_master WHERE type='table' AND name='feedback'
-        """)
-        if not cur.fetchone():
-            return None
-
-        cur.execute("""
+        return db.scalar("""
             SELECT takeaway 
             FROM feedback 
             WHERE user_email=? 
             ORDER BY id DESC LIMIT 1
         """, (user_email,))
-        row = cur.fetchone()
-        return row[0] if row else None
     except sqlite3.OperationalError:
-        # Any operational error (including missing DB) should be treated as no takeaways.
+        # Missing feedback table (or DB) is treated as no takeaways.
         return None
-    finally:
-        if conn:
-            conn.close()
 
 
 def fuzzy_match_skill(skill, candidate_skills, threshold=80):
@@ -83,20 +75,9 @@ def detect_skills_from_takeaways(takeaways, all_skills):
     return ordered
 
 
-def recommend_courses_from_takeaways(takeaways, df):
-    all_skills = df["Skill"].unique().tolist()
-    detected = detect_skills_from_takeaways(takeaways, all_skills)
-    recs = {}
-    for skill in detected:
-        courses = []
-        base = df[df["Skill"] == skill]["Recommended_Courses"].tolist()
-        if base:
-            for b in base[0].split(";"):
-                courses.append(b.strip())
-        external = EXTERNAL_COURSE_INDEX.get(skill, [])
-        courses.extend(external)
-        recs[skill] = list(dict.fromkeys(courses))
-    return recs
+def recommend_courses_from_takeaways(takeaways, catalog):
+    detected = detect_skills_from_takeaways(takeaways, catalog.skills)
+    return {skill: catalog.courses(skill) for skill in detected}
 
 
 
@@ -109,6 +90,7 @@ hydrate_session_from_json()
 # ==================================================
 if "user" in st.session_state and st.session_state.user:
     notifications_panel(st.session_state.user)
+    profiling.profiling_panel(st.session_state.user)
 
 # --------------------------------------------------
 # Page Guard
@@ -182,189 +164,21 @@ if GOOGLE_API_KEY:
 # --------------------------------------------------
 # Data Loading / Sample Data
 # --------------------------------------------------
-@st.cache_data
-def load_role_skill_data():
-    data = [
-        {"Role": "Data Analyst", "Skill": "SQL", "Required_Level": 4, "Skill_Category": "Data", "Weight": 1.0, "Description": "Advanced SQL for analytics", "Recommended_Courses": "BI101;BI201"},
-        {"Role": "Data Analyst", "Skill": "Power BI", "Required_Level": 3, "Skill_Category": "Visualization", "Weight": 0.8, "Description": "Build dashboards & reports", "Recommended_Courses": "BI102"},
-        {"Role": "Data Analyst", "Skill": "Excel", "Required_Level": 4, "Skill_Category": "Data", "Weight": 0.7, "Description": "Data manipulation & pivot tables", "Recommended_Courses": "BI103"},
-        {"Role": "Data Analyst", "Skill": "Python", "Required_Level": 3, "Skill_Category": "Programming", "Weight": 0.8, "Description": "Python for data cleaning and analysis", "Recommended_Courses": "BI104"},
-
-        {"Role": "SAP BTP Development Engineer", "Skill": "SAP BTP", "Required_Level": 4, "Skill_Category": "Platform", "Weight": 1.0, "Description": "Develop & deploy on SAP BTP", "Recommended_Courses": "BTP101"},
-        {"Role": "SAP BTP Development Engineer", "Skill": "Java", "Required_Level": 3, "Skill_Category": "Programming", "Weight": 0.7, "Description": "Back-end services on BTP", "Recommended_Courses": "BTP102"},
-        {"Role": "SAP BTP Development Engineer", "Skill": "CAP (Cloud Application Programming)", "Required_Level": 3, "Skill_Category": "Framework", "Weight": 0.7, "Description": "Model and build apps on SAP BTP", "Recommended_Courses": "BTP103"},
-        {"Role": "SAP BTP Development Engineer", "Skill": "Python", "Required_Level": 2, "Skill_Category": "Programming", "Weight": 0.4, "Description": "Basic scripting for automation", "Recommended_Courses": "BTP104"},
-
-        {"Role": "SAP Intelligent ERP Engineer", "Skill": "SAP S/4HANA", "Required_Level": 4, "Skill_Category": "ERP", "Weight": 1.0, "Description": "Configure & customize S/4HANA", "Recommended_Courses": "ERP101"},
-        {"Role": "SAP Intelligent ERP Engineer", "Skill": "ABAP", "Required_Level": 3, "Skill_Category": "Programming", "Weight": 0.8, "Description": "Develop custom ERP logic", "Recommended_Courses": "ERP102"},
-        {"Role": "SAP Intelligent ERP Engineer", "Skill": "Fiori", "Required_Level": 3, "Skill_Category": "UI", "Weight": 0.7, "Description": "Design Fiori apps for ERP", "Recommended_Courses": "ERP103"},
-        {"Role": "SAP Intelligent ERP Engineer", "Skill": "Excel", "Required_Level": 2, "Skill_Category": "Data", "Weight": 0.4, "Description": "Use Excel for reporting and analysis", "Recommended_Courses": "ERP104"},
-
-        {"Role": "CX AI Solutions Engineer", "Skill": "SAP C4C", "Required_Level": 3, "Skill_Category": "CRM", "Weight": 0.8, "Description": "Customer Experience Cloud", "Recommended_Courses": "CX101"},
-        {"Role": "CX AI Solutions Engineer", "Skill": "AI/ML", "Required_Level": 3, "Skill_Category": "AI", "Weight": 0.7, "Description": "Embed AI for CX", "Recommended_Courses": "CX102"},
-        {"Role": "CX AI Solutions Engineer", "Skill": "Integration", "Required_Level": 3, "Skill_Category": "API", "Weight": 0.6, "Description": "Integrate CX platforms", "Recommended_Courses": "CX103"},
-        {"Role": "CX AI Solutions Engineer", "Skill": "Python", "Required_Level": 2, "Skill_Category": "Programming", "Weight": 0.4, "Description": "Basic Python for AI integration", "Recommended_Courses": "CX104"},
-
-        {"Role": "S/4HANA Cloud Engineer", "Skill": "SAP S/4HANA Cloud", "Required_Level": 4, "Skill_Category": "ERP", "Weight": 1.0, "Description": "Cloud ERP configuration", "Recommended_Courses": "S4C101"},
-        {"Role": "S/4HANA Cloud Engineer", "Skill": "ABAP", "Required_Level": 3, "Skill_Category": "Programming", "Weight": 0.7, "Description": "Cloud ABAP development", "Recommended_Courses": "S4C102"},
-        {"Role": "S/4HANA Cloud Engineer", "Skill": "Cloud Integration", "Required_Level": 3, "Skill_Category": "Integration", "Weight": 0.7, "Description": "Integrate with other cloud apps", "Recommended_Courses": "S4C103"},
-        {"Role": "S/4HANA Cloud Engineer", "Skill": "Excel", "Required_Level": 2, "Skill_Category": "Data", "Weight": 0.4, "Description": "Basic reporting with Excel", "Recommended_Courses": "S4C104"},
-
-        {"Role": "SAP Joule Copilot Engineer", "Skill": "SAP Joule", "Required_Level": 4, "Skill_Category": "AI", "Weight": 1.0, "Description": "Develop & configure Joule Copilot", "Recommended_Courses": "Joule101"},
-        {"Role": "SAP Joule Copilot Engineer", "Skill": "Conversational AI", "Required_Level": 3, "Skill_Category": "AI", "Weight": 0.8, "Description": "Design dialogue & flows", "Recommended_Courses": "Joule102"},
-        {"Role": "SAP Joule Copilot Engineer", "Skill": "API Integration", "Required_Level": 3, "Skill_Category": "API", "Weight": 0.6, "Description": "Integrate Copilot with SAP APIs", "Recommended_Courses": "Joule103"},
-        {"Role": "SAP Joule Copilot Engineer", "Skill": "Python", "Required_Level": 2, "Skill_Category": "Programming", "Weight": 0.4, "Description": "Basic Python for conversational AI", "Recommended_Courses": "Joule104"},
-
-        {"Role": "Supply Chain Intelligence Engineer", "Skill": "SAP IBP", "Required_Level": 4, "Skill_Category": "Supply Chain", "Weight": 1.0, "Description": "Integrated Business Planning", "Recommended_Courses": "SC101"},
-        {"Role": "Supply Chain Intelligence Engineer", "Skill": "Analytics", "Required_Level": 3, "Skill_Category": "Data", "Weight": 0.8, "Description": "Analyze supply chain data", "Recommended_Courses": "SC102"},
-        {"Role": "Supply Chain Intelligence Engineer", "Skill": "Python", "Required_Level": 3, "Skill_Category": "Programming", "Weight": 0.6, "Description": "Automate supply chain tasks", "Recommended_Courses": "SC103"},
-        {"Role": "Supply Chain Intelligence Engineer", "Skill": "Excel", "Required_Level": 2, "Skill_Category": "Data", "Weight": 0.4, "Description": "Basic supply chain analysis in Excel", "Recommended_Courses": "SC104"},
-
-        {"Role": "SAP Industry Cloud Engineer", "Skill": "SAP Industry Cloud", "Required_Level": 4, "Skill_Category": "Cloud", "Weight": 1.0, "Description": "Industry-specific cloud solutions", "Recommended_Courses": "IC101"},
-        {"Role": "SAP Industry Cloud Engineer", "Skill": "JavaScript", "Required_Level": 3, "Skill_Category": "Programming", "Weight": 0.7, "Description": "Front-end cloud development", "Recommended_Courses": "IC102"},
-        {"Role": "SAP Industry Cloud Engineer", "Skill": "Integration", "Required_Level": 3, "Skill_Category": "API", "Weight": 0.6, "Description": "Integrate cloud apps", "Recommended_Courses": "IC103"},
-        {"Role": "SAP Industry Cloud Engineer", "Skill": "Python", "Required_Level": 2, "Skill_Category": "Programming", "Weight": 0.4, "Description": "Basic scripting for cloud automation", "Recommended_Courses": "IC104"},
-
-        {"Role": "Integration & API Engineer", "Skill": "SAP CPI", "Required_Level": 4, "Skill_Category": "Integration", "Weight": 1.0, "Description": "Cloud Platform Integration", "Recommended_Courses": "API101"},
-        {"Role": "Integration & API Engineer", "Skill": "REST APIs", "Required_Level": 3, "Skill_Category": "API", "Weight": 0.8, "Description": "Design & consume APIs", "Recommended_Courses": "API102"},
-        {"Role": "Integration & API Engineer", "Skill": "OData", "Required_Level": 3, "Skill_Category": "API", "Weight": 0.7, "Description": "Build OData services", "Recommended_Courses": "API103"},
-        {"Role": "Integration & API Engineer", "Skill": "Python", "Required_Level": 2, "Skill_Category": "Programming", "Weight": 0.4, "Description": "Python for automation and integration", "Recommended_Courses": "API104"},
-
-        {"Role": "IT support / Technician", "Skill": "SAP Basis", "Required_Level": 4, "Skill_Category": "IT Support", "Weight": 1.0, "Description": "System administration & monitoring", "Recommended_Courses": "ITS101"},
-        {"Role": "IT support / Technician", "Skill": "Networking", "Required_Level": 3, "Skill_Category": "IT Support", "Weight": 0.8, "Description": "Network troubleshooting", "Recommended_Courses": "ITS102"},
-        {"Role": "IT support / Technician", "Skill": "Windows/Linux", "Required_Level": 3, "Skill_Category": "IT Support", "Weight": 0.7, "Description": "OS support & scripting", "Recommended_Courses": "ITS103"},
-        {"Role": "IT support / Technician", "Skill": "Python", "Required_Level": 2, "Skill_Category": "Programming", "Weight": 0.4, "Description": "Basic Python for IT automation", "Recommended_Courses": "ITS104"},
-        {"Role": "IT support / Technician", "Skill": "Excel", "Required_Level": 2, "Skill_Category": "Data", "Weight": 0.4, "Description": "Excel for IT reporting", "Recommended_Courses": "ITS105"},
-
-        {"Role": "Digital Transformation Analyst", "Skill": "SAP Digital Transformation", "Required_Level": 4, "Skill_Category": "Transformation", "Weight": 1.0, "Description": "Process digitization & change management", "Recommended_Courses": "DTA101"},
-        {"Role": "Digital Transformation Analyst", "Skill": "Project Management", "Required_Level": 3, "Skill_Category": "Management", "Weight": 0.8, "Description": "Lead transformation projects", "Recommended_Courses": "DTA102"},
-        {"Role": "Digital Transformation Analyst", "Skill": "Business Process Modeling", "Required_Level": 3, "Skill_Category": "Process", "Weight": 0.7, "Description": "Map & optimize business processes", "Recommended_Courses": "DTA103"},
-        {"Role": "Digital Transformation Analyst", "Skill": "Python", "Required_Level": 2, "Skill_Category": "Programming", "Weight": 0.4, "Description": "Basic scripting for process automation", "Recommended_Courses": "DTA104"},
-        {"Role": "Digital Transformation Analyst", "Skill": "Excel", "Required_Level": 2, "Skill_Category": "Data", "Weight": 0.4, "Description": "Excel for analysis and reporting", "Recommended_Courses": "DTA105"},
-    ]
-    df = pd.DataFrame(data)
-    df.columns = [c.strip() for c in df.columns]
-    return df
+@st.cache_resource
+def get_catalog_store():
+    """Role-skill catalogue shared by all sessions; reloads itself when its files change."""
+    return skill_catalog.CatalogStore()
+
+def get_catalog():
+    return get_catalog_store().get()
 
 # --------------------------------------------------
 # Utility: Parsing & Matching
 # --------------------------------------------------
-def parse_user_skills(raw_text):
-    if not raw_text:
-        return {}
-    parts = re.split(r"[,\n;]+", raw_text)
-    skill_map = {}
-    for p in parts:
-        p = p.strip()
-        if not p:
-            continue
-        if ":" in p:
-            skill_name, lvl = p.split(":", 1)
-            skill_name = skill_name.strip()
-            try:
-                lvl_val = float(lvl.strip())
-            except Exception:
-                lvl_val = None
-            skill_map[skill_name] = lvl_val
-        else:
-            skill_map[p] = None
-    return skill_map
+def compute_skill_gap(role, user_skills_dict, fuzzy=True):
+    return get_catalog().gap_engine().gap(role, user_skills_dict, fuzzy=fuzzy)
 
-def fuzzy_match_skill(skill, candidate_skills, threshold=85):
-    if not candidate_skills:
-        return skill, 0
-    match, score, _ = process.extractOne(skill, candidate_skills, scorer=fuzz.WRatio)
-    if score >= threshold:
-        return match, score
-    return skill, score
-
-def compute_skill_gap(df_role, user_skills_dict, fuzzy=True):
-    required_rows = df_role.copy()
-    canonical_skills = required_rows["Skill"].tolist()
-    normalized_user = {}
-    for raw_skill, lvl in user_skills_dict.items():
-        skill_clean = raw_skill.strip()
-        if fuzzy:
-            matched, _ = fuzzy_match_skill(skill_clean, canonical_skills)
-            normalized_user[matched] = lvl
-        else:
-            normalized_user[skill_clean] = lvl
-
-    gap = {"missing": [], "underdeveloped": [], "met": [], "extra": []}
-    for _, row in required_rows.iterrows():
-        req_skill = row["Skill"]
-        req_level = row.get("Required_Level", None)
-        weight = row.get("Weight", 1.0)
-        desc = row.get("Description", "")
-        base_courses = row.get("Recommended_Courses", "")
-        user_level = normalized_user.get(req_skill, None)
-
-        if user_level is None:
-            gap["missing"].append({
-                "skill": req_skill, "required_level": req_level, "user_level": None,
-                "weight": weight, "description": desc, "base_courses": base_courses
-            })
-        else:
-            if (req_level is not None and isinstance(req_level, (int, float))
-                    and user_level is not None):
-                if user_level >= req_level:
-                    gap["met"].append({
-                        "skill": req_skill, "required_level": req_level, "user_level": user_level,
-                        "weight": weight, "description": desc, "base_courses": base_courses
-                    })
-                else:
-                    gap["underdeveloped"].append({
-                        "skill": req_skill, "required_level": req_level, "user_level": user_level,
-                        "gap_value": req_level - user_level, "weight": weight,
-                        "description": desc, "base_courses": base_courses
-                    })
-            else:
-                gap["met"].append({
-                    "skill": req_skill, "required_level": req_level, "user_level": user_level,
-                    "weight": weight, "description": desc, "base_courses": base_courses
-                })
-
-    required_set = set(canonical_skills)
-    for uskill in normalized_user.keys():
-        if uskill not in required_set:
-            gap["extra"].append({"skill": uskill, "user_level": normalized_user[uskill]})
-    return gap
-
-def summarize_gap_stats(gap):
-    total_required = len(gap["missing"]) + len(gap["underdeveloped"]) + len(gap["met"])
-    if total_required == 0:
-        return {}
-    gap_score = 0.0
-    total_weight = 0.0
-    for item in gap["underdeveloped"]:
-        req_level = item.get("required_level")
-        user_level = item.get("user_level", 0) or 0
-        weight = item.get("weight", 1.0) or 1.0
-        if req_level:
-            gap_component = ((req_level - user_level) / req_level) * weight
-            gap_score += gap_component
-            total_weight += weight
-    for item in gap["missing"]:
-        weight = item.get("weight", 1.0) or 1.0
-        gap_score += 1.0 * weight
-        total_weight += weight
-    normalized_gap = gap_score / total_weight if total_weight else 0
-    return {
-        "total_required_skills": total_required,
-        "met": len(gap["met"]),
-        "underdeveloped": len(gap["underdeveloped"]),
-        "missing": len(gap["missing"]),
-        "extra": len(gap["extra"]),
-        "weighted_gap_index": round(normalized_gap, 3)
-    }
-
-EXTERNAL_COURSE_INDEX = {
-    "Python": ["Coursera: Python for Everybody", "Internal: DS101", "LeetCode practice sets"],
-    "SQL": ["Internal: DS102", "Mode Analytics SQL Tutorial", "Coursera: Advanced SQL"],
-    "Statistics": ["Internal: DS103", "Khan Academy: Statistics & Probability"],
-    "Machine Learning": ["Internal: DS201", "Andrew Ng ML", "Hands-On ML Book"],
-    "Airflow": ["Astronomer Academy Core", "Internal: DE201"]
-}
+summarize_gap_stats = gap_stats
 
 def collect_course_suggestions(gap):
     suggestions = {}
@@ -372,7 +186,7 @@ def collect_course_suggestions(gap):
         base_list = []
         if base_courses:
             base_list = [c.strip() for c in str(base_courses).split(";") if c.strip()]
-        ext_list = EXTERNAL_COURSE_INDEX.get(skill_name, [])
+        ext_list = get_catalog().external_courses(skill_name)
         return list(dict.fromkeys(base_list + ext_list))
     for section in ["missing", "underdeveloped"]:
         for item in gap[section]:
@@ -463,6 +277,7 @@ TASK:
 {takeaway_rule}
 """
 
+@profiling.timed("llm")
 def call_gemini(prompt):
     if not GOOGLE_API_KEY:
         return "Gemini API key not configured. Please set GOOGLE_API_KEY."
@@ -1051,17 +866,17 @@ with tabs[0]:
         4. Accept the plan to enable tracking in Progress Tracker tab.
         """)
     
-    df = load_role_skill_data()
-    if df is None or "Role" not in df.columns:
+    catalog = get_catalog()
+    if catalog is None or "Role" not in catalog.df.columns:
         st.error("Failed to load role skill data.")
         st.stop()
 
-    roles = sorted(df["Role"].dropna().unique().tolist())
+    roles = catalog.roles
 
     # Reactive Role Selection OUTSIDE form
     selected_role = st.selectbox("Select Role", roles, key="role_select")
 
-    role_df_view = df[df["Role"] == selected_role][["Skill", "Required_Level", "Skill_Category"]]
+    role_df_view = catalog.role_rows(selected_role)[["Skill", "Required_Level", "Skill_Category"]]
 
     st.caption("Role Requirements (updates immediately when role changes)")
     # Top chips: total skills and category distribution
@@ -1091,12 +906,12 @@ with tabs[0]:
 
     if submitted:
         user_skills_dict = parse_user_skills(user_skill_input)
-        role_df = df[df["Role"] == selected_role]
+        role_df = catalog.role_rows(selected_role)
 
         if role_df.empty:
             st.error("No data for that role.")
         else:
-            gap = compute_skill_gap(role_df, user_skills_dict)
+            gap = compute_skill_gap(selected_role, user_skills_dict)
             stats = summarize_gap_stats(gap)
             course_suggestions = collect_course_suggestions(gap)
 
@@ -1167,7 +982,7 @@ with tabs[0]:
         if not latest_takeaway:
             st.info("No takeaways yet. Attend mentor sessions and add takeaways.")
         else:
-            recs = recommend_courses_from_takeaways([latest_takeaway], df)
+            recs = recommend_courses_from_takeaways([latest_takeaway], get_catalog())
             # Persist latest takeaway and recommendations so plan generation can use them
             st.session_state["latest_takeaway"] = latest_takeaway
             st.session_state["latest_course_suggestions"] = recs
@@ -1595,4 +1410,6 @@ with tabs[2]:
                 st.rerun()
 
 
-persist_session_to_json()
\ No newline at end of file
+persist_session_to_json()
+
+profiling.end_rerun()
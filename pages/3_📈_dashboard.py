@@ -1,7 +1,12 @@
+import profiling
+profiling.begin_rerun("dashboard")
+
 import streamlit as st
 import pandas as pd
 import os
-import sqlite3
+import db
+import progress_store
+import skill_gap_job
 import json
 from datetime import datetime,timedelta,date
 from utils import notifications_panel
@@ -10,6 +15,7 @@ from io import BytesIO
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 import plotly.figure_factory as ff
+profiling.mark("import")
 
 
 # after login check
@@ -21,6 +27,7 @@ st.set_page_config(page_title="SAP360 Hub Dashboard", layout="wide")
 # ---------------- LOGIN CHECK ----------------
 if "user" in st.session_state and st.session_state["user"]:
     notifications_panel(st.session_state["user"])
+    profiling.profiling_panel(st.session_state["user"])
 
 
 if "user" not in st.session_state or not st.session_state.user:
@@ -33,14 +40,9 @@ st.title("📊 SAP360 Hub Dashboard")
 
 
 # ---------------- DB CONNECTION ----------------
-DB_PATH = "mentormatch.db"
-def _conn():
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
+DB_PATH = db.DB_PATH
 
 def get_confirmed_bookings(mentee_email: str, upcoming_only=True):
-    con = _conn()
     now = datetime.utcnow().isoformat()
     query = """
         SELECT s.id, s.start_utc, s.end_utc, s.status, s.location,
@@ -55,23 +57,25 @@ def get_confirmed_bookings(mentee_email: str, upcoming_only=True):
         query += " AND s.start_utc >= ?"
         params.append(now)
     query += " ORDER BY s.start_utc ASC"
-    rows = con.execute(query, tuple(params)).fetchall()
-    con.close()
-    return [dict(r) for r in rows]
+    return db.query(query, tuple(params))
 
 # ---------------- EMPLOYEE DATA ----------------
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 employee_path = os.path.join(BASE_DIR, "datasets/Employee Dataset1.csv")
-progress_path = os.path.join(BASE_DIR, "datasets/LearningProgress.csv")
 
 try:
-    employee_df = pd.read_csv(employee_path).fillna("")
+    employee_df = profiling.read_csv(employee_path).fillna("")
     employee_df.columns = employee_df.columns.str.strip()
     employee_df["email"] = employee_df["email"].astype(str).str.strip().str.lower()
     user_row = employee_df[employee_df["email"] == user_email]
 except Exception:
     user_row = pd.DataFrame()
 
+@st.cache_data
+def load_readiness(fingerprint):
+    """skill_gap_job.py output; `fingerprint` (path, mtime, size) re-reads it when the job reruns."""
+    return skill_gap_job.load_result()
+
 # ---------------- DASHBOARD LAYOUT ----------------
 tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "👤 Profile",
@@ -100,32 +104,17 @@ with tab2:
             modules = [m.strip() for m in str(modules_str).split(",") if m.strip()]
             if modules:
                 st.markdown("**Modules assigned to you:**")
-                if os.path.exists(progress_path):
-                    progress_df = pd.read_csv(progress_path)
-                else:
-                    progress_df = pd.DataFrame(columns=["email", "module", "completed"])
-                progress_df["email"] = progress_df["email"].astype(str).str.strip().str.lower()
-                progress_df["module"] = progress_df["module"].astype(str).str.strip()
-                user_progress = {
-                    row["module"]: bool(row["completed"])
-                    for _, row in progress_df[progress_df["email"] == user_email].iterrows()
-                }
+                user_progress = progress_store.get_progress(user_email, "module")
                 updated_progress, completed_count = {}, 0
                 for module in modules:
-                    completed = user_progress.get(module, False)
+                    completed = user_progress.get(module.lower(), False)
                     checked = st.checkbox(module, value=completed, key=f"{user_email}_{module}")
                     updated_progress[module] = checked
                     if checked: completed_count += 1
-                for module, checked in updated_progress.items():
-                    mask = (progress_df["email"] == user_email) & (progress_df["module"] == module)
-                    if mask.any():
-                        if progress_df.loc[mask, "completed"].values[0] != checked:
-                            progress_df.loc[mask, "completed"] = checked
-                    else:
-                        progress_df = pd.concat([progress_df, pd.DataFrame([{
-                            "email": user_email, "module": module, "completed": checked
-                        }])], ignore_index=True)
-                progress_df.to_csv(progress_path, index=False)
+                # Writes only the ticks that differ from the store (none on a plain render)
+                progress_store.set_many(user_email, "module", {
+                    m: c for m, c in updated_progress.items() if user_progress.get(m.lower(), False) != c
+                })
 
                 # Metrics + Progress Bar
                 c1, c2 = st.columns(2)
@@ -370,16 +359,14 @@ with tab5:
     plan_pct = completed_phases / total_phases if total_phases else 0
 
     # --- Mentor Engagement ---
-    con = _conn()
-    past_sessions = con.execute(
+    past_sessions = db.scalar(
         "SELECT COUNT(*) FROM sessions WHERE mentee_email=? AND status IN ('approved','booked') AND end_utc < ?",
         (user_email, datetime.utcnow().isoformat())
-    ).fetchone()[0]
-    total_sessions = con.execute(
+    )
+    total_sessions = db.scalar(
         "SELECT COUNT(*) FROM sessions WHERE mentee_email=? AND status IN ('approved','booked')",
         (user_email,)
-    ).fetchone()[0]
-    con.close()
+    )
     mentor_pct = past_sessions / total_sessions if total_sessions else 0
 
     # --- Weighted Score ---
@@ -477,5 +464,34 @@ with tab5:
     
     st.success(stage)
 
+    # -------------------------
+    # Role readiness (skill_gap_job.py)
+    # -------------------------
+    st.markdown("---")
+    st.subheader("🎯 Role Readiness")
+    readiness_fp = skill_gap_job.result_fingerprint()
+    readiness = load_readiness(readiness_fp) if readiness_fp else None
+    if readiness is None or readiness.empty:
+        st.info("No readiness data yet. Run `python skill_gap_job.py` to compute it for all employees.")
+    else:
+        mine = readiness[readiness["email"] == user_email]
+        if mine.empty:
+            st.info("You are not in the latest readiness run.")
+        else:
+            mine = mine.sort_values("readiness_pct", ascending=False)
+            best = mine.iloc[0]
+            st.metric("Closest role", best["role"], f"{best['readiness_pct']:.0f}% ready")
+            st.dataframe(
+                mine[["role", "readiness_pct", "met", "underdeveloped", "missing"]],
+                use_container_width=True, hide_index=True,
+            )
+        org = readiness.groupby("role")["readiness_pct"].mean().sort_values(ascending=False).round(1)
+        with st.expander("Organisation average by role"):
+            st.bar_chart(org)
+        st.caption(f"Computed {datetime.fromtimestamp(readiness_fp[1] / 1e9):%Y-%m-%d %H:%M} "
+                   f"for {readiness['email'].nunique()} employees.")
+
 
 persist_session_to_json()
+
+profiling.end_rerun()
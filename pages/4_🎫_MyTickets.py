@@ -1,5 +1,8 @@
 # pages/4_MyTickets.py
-# Company Ticket Hub (CSV-backed) with login gate + User/Admin view switch
+# Company Ticket Hub (SQLite ticket store) with login gate + User/Admin view switch
+
+import profiling
+profiling.begin_rerun("mytickets")
 
 import streamlit as st
 import pandas as pd
@@ -8,17 +11,20 @@ from datetime import datetime, timezone
 from dateutil import parser as dtparser
 
 from utils import notifications_panel
+import ticket_store
+profiling.mark("import")
 
 # Inside the page (after login check)
 if "user" in st.session_state and st.session_state["user"]:
     notifications_panel(st.session_state["user"])
+    profiling.profiling_panel(st.session_state["user"])
 
 
 
 # ---------- Page ----------
 #st.set_page_config(page_title="Company Ticket Hub", page_icon="🎫", layout="wide")
 st.title("Company Ticket Hub")
-st.caption("CSV-backed ticketing with safe writes, chatbot prefill, and role-based views.")
+st.caption("Ticketing with transactional writes, chatbot prefill, and role-based views.")
 
 # ---------- Require login first ----------
 user = st.session_state.get("user")
@@ -62,16 +68,14 @@ with left:
         except Exception:
             st.info("Use your browser Back button to return to chat.")
 
-# ---------- CSV config ----------
+# ---------- CSV config (tickets live in ticket_store) ----------
 EMPLOYEE_CSV   = os.getenv("EMPLOYEE_CSV",   "datasets/ticketingemployees.csv")
-TICKETS_CSV    = os.getenv("TICKETS_CSV",    "datasets/tickets.csv")
 CATEGORIES_CSV = os.getenv("CATEGORIES_CSV", "datasets/categories.csv")
 COMMENTS_CSV   = os.getenv("COMMENTS_CSV",   "datasets/comments.csv")
 
 # Ensure files exist (minimal schema)
 SCHEMAS = {
     EMPLOYEE_CSV:   ["email","name","role","team","manager_email","location","phone","date_joined","last_seen_at"],
-    TICKETS_CSV:    ["id","title","description","status","priority","category_key","requester_email","assignee_email","created_at","updated_at"],
     CATEGORIES_CSV: ["key","label","default_team"],
     COMMENTS_CSV:   ["id","ticket_id","author_email","body","internal","created_at"],
 }
@@ -83,7 +87,7 @@ for path, cols in SCHEMAS.items():
 @st.cache_data(ttl=1.0, show_spinner=False)
 def read_csv(path: str, mtime: float):
     try:
-        return pd.read_csv(path)
+        return profiling.read_csv(path)
     except Exception:
         return pd.DataFrame()
 
@@ -104,13 +108,11 @@ class CsvStore:
         os.replace(tmp, self.path)
 
 employees_store  = CsvStore(EMPLOYEE_CSV)
-tickets_store    = CsvStore(TICKETS_CSV)
 categories_store = CsvStore(CATEGORIES_CSV)
 comments_store   = CsvStore(COMMENTS_CSV)
 
 # ---------- Load Data ----------
 employees  = employees_store.load()
-tickets    = tickets_store.load()
 categories = categories_store.load()
 comments   = comments_store.load()
 
@@ -124,8 +126,6 @@ if categories.empty or "key" not in categories.columns:
     categories_store.save(categories)
 
 # Normalize dtypes
-if "id" in tickets.columns:
-    tickets["id"] = pd.to_numeric(tickets["id"], errors="coerce").astype("Int64")
 if "ticket_id" in comments.columns:
     comments["ticket_id"] = pd.to_numeric(comments["ticket_id"], errors="coerce").astype("Int64")
 
@@ -156,16 +156,11 @@ with st.sidebar:
         page = st.radio("Go to", ["Queues","Admin","Metrics","Raise Ticket","My Tickets"], index=0)
 
 # ---------- Helpers ----------
-STATUS   = ["NEW","TRIAGED","IN_PROGRESS","WAITING_ON_USER","RESOLVED","CLOSED"]
-PRIORITY = ["P1","P2","P3","P4"]
-
-def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+STATUS   = ticket_store.STATUSES
+PRIORITY = ticket_store.PRIORITIES
 
-def next_id(df: pd.DataFrame, col: str = "id") -> int:
-    if df.empty or col not in df.columns:
-        return 1
-    return int(pd.to_numeric(df[col], errors="coerce").fillna(0).max()) + 1
+def tickets_frame(rows: list[dict]) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=ticket_store.COLUMNS)
 
 def ensure_category(cat_key: str, label: str | None = None):
     global categories
@@ -199,28 +194,21 @@ if page == "Raise Ticket":
     create = st.button("Create ticket", type="primary", disabled=not (title and requester and category_key))
     if create:
         ensure_category(category_key)
-        new = {
-            "id": next_id(tickets, "id"),
-            "title": title.strip(),
-            "description": description.strip(),
-            "status": "NEW",
-            "priority": priority,
-            "category_key": category_key,
-            "requester_email": requester,
-            "assignee_email": assignee_email.strip(),
-            "created_at": now_iso(),
-            "updated_at": now_iso(),
-        }
-        tickets = pd.concat([tickets, pd.DataFrame([new])], ignore_index=True)
-        tickets_store.save(tickets)
-        st.success(f"Ticket #{new['id']} created")
+        new_id = ticket_store.create_ticket(
+            requester_email=requester,
+            title=title,
+            description=description,
+            category_key=category_key,
+            priority=priority,
+            assignee_email=assignee_email,
+            role=ME_ROLE,
+        )
+        st.success(f"Ticket #{new_id} created")
         st.balloons()
 
 elif page == "My Tickets":
     st.subheader("Your tickets")
-    mine = tickets.query("requester_email == @ME_EMAIL") if not tickets.empty else tickets
-    if "created_at" in mine.columns:
-        mine = mine.sort_values("created_at", ascending=False)
+    mine = tickets_frame(ticket_store.list_tickets(requester_email=ME_EMAIL))
     st.dataframe(mine, use_container_width=True)
     st.divider()
     st.caption("Update a ticket you created")
@@ -228,9 +216,7 @@ elif page == "My Tickets":
     edit_id    = st.number_input("Ticket ID", min_value=0, value=default_id, step=1)
     new_status = st.selectbox("New status", [""] + STATUS)
     if st.button("Update status", disabled=not (edit_id and new_status)):
-        if (tickets["id"] == edit_id).any():
-            tickets.loc[tickets["id"]==edit_id, ["status","updated_at"]] = [new_status, now_iso()]
-            tickets_store.save(tickets)
+        if ticket_store.update_ticket(edit_id, status=new_status, requester_email=ME_EMAIL):
             st.success(f"Ticket #{edit_id} updated to {new_status}")
         else:
             st.error("Ticket ID not found.")
@@ -248,13 +234,11 @@ elif page == "Queues":
         with c3:
             mine_only = st.checkbox("Only my assignees", value=False)
 
-        view = tickets.copy()
-        if cat:
-            view = view[view["category_key"]==cat]
-        if status:
-            view = view[view["status"]==status]
-        if mine_only and ME_EMAIL:
-            view = view[view["assignee_email"]==ME_EMAIL]
+        view = tickets_frame(ticket_store.list_tickets(
+            category_key=cat or None,
+            status=status or None,
+            assignee_email=ME_EMAIL if (mine_only and ME_EMAIL) else None,
+        ))
 
         def age_hours(ts):
             try:
@@ -263,9 +247,7 @@ elif page == "Queues":
             except Exception:
                 return None
 
-        if "created_at" in view.columns:
-            view = view.assign(age_h=view["created_at"].apply(age_hours))
-            view = view.sort_values("created_at", ascending=False)
+        view = view.assign(age_h=view["created_at"].apply(age_hours))
 
         st.dataframe(view, use_container_width=True)
 
@@ -275,13 +257,12 @@ elif page == "Queues":
         assign_to  = st.selectbox("Assign to", [""] + (employees["email"].dropna().tolist() if "email" in employees.columns else []))
         set_status = st.selectbox("Set status", [""] + STATUS)
         if st.button("Apply changes", disabled=not edit_id):
-            if (tickets["id"] == edit_id).any():
-                if assign_to:
-                    tickets.loc[tickets["id"]==edit_id, "assignee_email"] = assign_to
-                if set_status:
-                    tickets.loc[tickets["id"]==edit_id, "status"] = set_status
-                tickets.loc[tickets["id"]==edit_id, "updated_at"] = now_iso()
-                tickets_store.save(tickets)
+            changes = {}
+            if assign_to:
+                changes["assignee_email"] = assign_to
+            if set_status:
+                changes["status"] = set_status
+            if ticket_store.update_ticket(edit_id, **changes):
                 st.success(f"Ticket #{edit_id} updated.")
             else:
                 st.error("Ticket ID not found.")
@@ -320,34 +301,42 @@ elif page == "Admin":
                 employees_store.save(employees)
                 st.success("User added.")
 
+        st.divider()
+        st.markdown("#### Tickets CSV")
+        buf = io.StringIO()
+        count = ticket_store.export_csv(buf)
+        st.download_button(f"Export {count} tickets", buf.getvalue(), file_name="tickets.csv", mime="text/csv")
+        upload = st.file_uploader("Import tickets (rows with an existing id replace that ticket)", type="csv")
+        if upload is not None and st.button("Import"):
+            st.success(f"Imported {ticket_store.import_csv(upload.getvalue())} tickets.")
+
 elif page == "Metrics":
     st.subheader("Metrics")
     if st.session_state.get("tickets_admin_mode") is not True:
         st.info("Switch to Admin view in the sidebar to view metrics.")
     else:
-        total = len(tickets)
-        open_states = ["NEW","TRIAGED","IN_PROGRESS","WAITING_ON_USER"]
-        open_count = int(tickets["status"].isin(open_states).sum()) if "status" in tickets.columns and not tickets.empty else 0
-        resolved   = int(tickets["status"].isin(["RESOLVED","CLOSED"]).sum()) if "status" in tickets.columns and not tickets.empty else 0
+        counts = ticket_store.status_counts()
+        total = sum(counts.values())
+        open_count = sum(counts[s] for s in ticket_store.OPEN_STATUSES)
+        resolved   = counts["RESOLVED"] + counts["CLOSED"]
         st.metric("Total tickets", total)
         st.metric("Open", open_count)
         st.metric("Resolved/Closed", resolved)
 
-        if "created_at" in tickets.columns and not tickets.empty:
-            try:
-                tmp = tickets.copy()
-                tmp["created_dt"] = pd.to_datetime(tmp["created_at"], errors="coerce").dt.date
-                trend = tmp.groupby("created_dt").size().reset_index(name="count").tail(14)
-                st.line_chart(trend.set_index("created_dt"))
-            except Exception:
-                st.info("Not enough data for trend yet.")
+        trend = ticket_store.daily_counts(days=14)
+        if trend:
+            st.line_chart(pd.DataFrame(trend).set_index("day"))
+        else:
+            st.info("Not enough data for trend yet.")
 
 # ---------- Footer: freshness ----------
 st.divider()
 mtimes = {
     "employees":  datetime.fromtimestamp(employees_store.mtime).isoformat()  if employees_store.mtime  else "—",
-    "tickets":    datetime.fromtimestamp(tickets_store.mtime).isoformat()    if tickets_store.mtime    else "—",
+    "tickets":    ticket_store.last_updated() or "—",
     "categories": datetime.fromtimestamp(categories_store.mtime).isoformat() if categories_store.mtime else "—",
     "comments":   datetime.fromtimestamp(comments_store.mtime).isoformat()   if comments_store.mtime   else "—",
 }
 st.caption(f"Data freshness • employees: {mtimes['employees']} | tickets: {mtimes['tickets']} | categories: {mtimes['categories']} | comments: {mtimes['comments']}")
+
+profiling.end_rerun()
@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+import metrics
+
+# ----------------------------
+# Per-rerun profiling (SAP360_PROFILE=1)
+# ----------------------------
+# Each page calls `begin_rerun(page)` before its imports, `mark("import")`
+# after them and `end_rerun()` at the bottom. In between, helpers wrapped
+# with `timed(kind)` / `section(kind)` add their *exclusive* time (nested
+# sections are not double counted) to the rerun's trace under one of KINDS. Whatever is left of the wall time is
+# booked as "render". Finished traces are appended to TRACE_PATH as JSON
+# lines and observed in `metrics` as `profile.<page>.<kind>_ms`.
+#
+# When profiling is off, `timed` returns the function unchanged and
+# `section` is a no-op, so the instrumentation costs nothing.
+
+ENABLED = os.getenv("SAP360_PROFILE", "0") == "1"
+TRACE_PATH = os.getenv("SAP360_PROFILE_PATH", os.path.join("profiling", "traces.jsonl"))
+# The panel summarises only the newest traces; past TRACE_MAX_BYTES the file
+# is rotated to TRACE_PATH + ".1" (one old generation is kept)
+TRACE_TAIL = int(os.getenv("SAP360_PROFILE_TAIL", "2000"))
+TRACE_MAX_BYTES = int(os.getenv("SAP360_PROFILE_MAX_BYTES", str(16 * 1024 * 1024)))
+# Emails allowed to see the panel; without a list it is revealed by ?profile=1
+ADMINS = {e.strip().lower() for e in os.getenv("SAP360_PROFILE_ADMINS", "").split(",") if e.strip()}
+
+KINDS = ("import", "db", "csv", "llm", "render")
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+class _Trace:
+    def __init__(self, page: str):
+        self.page = page
+        self.started = time.perf_counter()
+        self.last_activity = self.started
+        self.mark_at = self.started
+        self.marked_ms = 0.0  # section time already accounted for at mark_at
+        self.totals = dict.fromkeys(KINDS, 0.0)
+        self.calls = {}       # "kind:name" -> [count, ms]
+        self.stack = []       # child time accumulated per open section
+
+
+@contextmanager
+def _noop():
+    yield
+
+
+@contextmanager
+def _section(kind: str, name: str):
+    trace = getattr(_local, "trace", None)
+    stack = trace.stack if trace is not None else None
+    if stack is not None:
+        stack.append(0.0)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        elapsed = (now - t0) * 1000
+        metrics.observe(f"profile.{kind}.{name}_ms", elapsed)
+        if stack is not None:
+            own = elapsed - stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            trace.totals[kind] += own
+            c = trace.calls.setdefault(f"{kind}:{name}", [0, 0.0])
+            c[0] += 1
+            c[1] += own
+            trace.last_activity = now
+
+
+def section(kind: str, name: str = ""):
+    """Context manager timing a block as `kind` (one of KINDS)."""
+    return _section(kind, name or kind) if ENABLED else _noop()
+
+
+def timed(kind: str, name: str | None = None):
+    """Decorator version of `section`; the section name defaults to the function name."""
+    def deco(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _section(kind, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def read_csv(*args, **kwargs):
+    """`pd.read_csv` booked as a "csv" section."""
+    import pandas as pd
+    with section("csv", "read_csv"):
+        return pd.read_csv(*args, **kwargs)
+
+
+# ----------------------------
+# Rerun boundaries
+# ----------------------------
+def begin_rerun(page: str):
+    if not ENABLED:
+        return
+    # st.stop()/st.rerun() skip end_rerun(); flush that run, ending at its last section
+    previous = getattr(_local, "trace", None)
+    if previous is not None:
+        _flush(previous, previous.last_activity, complete=False)
+    _local.trace = _Trace(page)
+
+
+def mark(kind: str):
+    """Book the time since the previous mark (or `begin_rerun`) not spent in sections as `kind`."""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return
+    now = time.perf_counter()
+    in_sections = sum(trace.totals.values()) - trace.marked_ms
+    trace.totals[kind] += max(0.0, (now - trace.mark_at) * 1000 - in_sections)
+    trace.mark_at, trace.marked_ms, trace.last_activity = now, sum(trace.totals.values()), now
+
+
+def end_rerun():
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return
+    _local.trace = None
+    _flush(trace, time.perf_counter(), complete=True)
+
+
+def _flush(trace: _Trace, ended: float, complete: bool):
+    wall = (ended - trace.started) * 1000
+    trace.totals["render"] += max(0.0, wall - sum(trace.totals.values()))
+    record = {
+        "ts": time.time(),
+        "page": trace.page,
+        "complete": complete,
+        "wall_ms": round(wall, 2),
+        "sections": {k: round(v, 2) for k, v in trace.totals.items()},
+        "calls": {k: {"n": n, "ms": round(ms, 2)} for k, (n, ms) in sorted(trace.calls.items())},
+    }
+    metrics.observe(f"profile.{trace.page}.wall_ms", wall)
+    for kind, ms in trace.totals.items():
+        metrics.observe(f"profile.{trace.page}.{kind}_ms", ms)
+    try:
+        with _write_lock:
+            os.makedirs(os.path.dirname(TRACE_PATH) or ".", exist_ok=True)
+            with open(TRACE_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                rotate = f.tell() > TRACE_MAX_BYTES
+            if rotate:
+                os.replace(TRACE_PATH, TRACE_PATH + ".1")
+    except OSError:
+        metrics.incr("profile.write_failed")
+
+
+def _tail_lines(path: str, n: int, block: int = 64 * 1024) -> list[bytes]:
+    """The last `n` lines of `path`, reading backwards from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos, data = f.tell(), b""
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.splitlines()
+    if pos > 0:
+        lines = lines[1:]   # first line may be cut in half
+    return lines[-n:]
+
+
+def load_traces(path: str = TRACE_PATH, page: str | None = None, tail: int | None = TRACE_TAIL) -> list[dict]:
+    """The newest `tail` traces of `path` (all of them with tail=None or 0)."""
+    rows = []
+    try:
+        if tail:
+            lines = _tail_lines(path, tail)
+        else:
+            with open(path, "rb") as f:
+                lines = f.readlines()
+    except OSError:
+        return []
+    for line in lines:
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            continue   # a line still being written
+    return [r for r in rows if page is None or r.get("page") == page]
+
+
+def summarize(traces: list[dict]) -> dict:
+    """{page: {section: {"n", "p50", "p95"}}} over the given traces (wall time as "wall")."""
+    import numpy as np
+    by_page = {}
+    for r in traces:
+        page = by_page.setdefault(r["page"], {})
+        for kind, ms in list(r["sections"].items()) + [("wall", r["wall_ms"])]:
+            page.setdefault(kind, []).append(ms)
+    return {
+        page: {
+            kind: {"n": len(v), "p50": round(float(np.percentile(v, 50)), 1),
+                   "p95": round(float(np.percentile(v, 95)), 1)}
+            for kind, v in kinds.items()
+        }
+        for page, kinds in by_page.items()
+    }
+
+
+# ----------------------------
+# Admin panel
+# ----------------------------
+def profiling_panel(user: dict | None):
+    """Sidebar p50/p95 per page and section. Only for SAP360_PROFILE_ADMINS (or ?profile=1)."""
+    if not ENABLED:
+        return
+    import streamlit as st
+    email = str((user or {}).get("email", "")).lower()
+    if not (email in ADMINS if ADMINS else st.query_params.get("profile") == "1"):
+        return
+    with st.sidebar.expander("⏱️ Profiling", expanded=False):
+        stats = summarize(load_traces())
+        if not stats:
+            st.caption(f"No traces in {TRACE_PATH} yet.")
+        for page, kinds in sorted(stats.items()):
+            st.markdown(f"**{page}**")
+            st.table([{"section": k, **v} for k, v in kinds.items()])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="p50/p95 per page and section from profiling traces.")
+    ap.add_argument("path", nargs="?", default=TRACE_PATH)
+    ap.add_argument("--page")
+    ap.add_argument("--tail", type=int, default=0, help="only the newest N traces (default all)")
+    args = ap.parse_args()
+
+    for page, kinds in sorted(summarize(load_traces(args.path, args.page, args.tail)).items()):
+        print(page)
+        for kind, s in kinds.items():
+            print(f"  {kind:<7} n={s['n']:<5} p50={s['p50']:>9.1f} ms  p95={s['p95']:>9.1f} ms")
@@ -0,0 +1,266 @@
+import os
+import csv
+import threading
+from datetime import datetime, timezone
+
+import db
+import profiling
+from migrations import migrate
+
+# ----------------------------
+# Checklist progress (mentormatch.db `progress`)
+# ----------------------------
+# One row per (email, kind, item) for the learning modules, documents and
+# software checklists. Items are matched case-insensitively (item_key), a
+# tick only writes when the stored value actually changes, and each write
+# touches one indexed row instead of rewriting a CSV.
+#
+# With PROGRESS_CSV_MIRROR=1 every change is also appended to the kind's
+# legacy CSV (email,<item column>,completed). Readers of those files already
+# keep the last row per (email, item), so the mirror never needs a rewrite.
+
+MIRROR = os.getenv("PROGRESS_CSV_MIRROR", "0") == "1"
+_DATASETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datasets")
+
+# kind -> (legacy CSV, item column)
+MIRRORS = {
+    "module": (os.getenv("LEARNING_PROGRESS_CSV", os.path.join(_DATASETS, "LearningProgress.csv")), "module"),
+    "document": (os.getenv("DOCUMENTS_PROGRESS_CSV", os.path.join(_DATASETS, "DocumentsProgress.csv")), "item"),
+    "software": (os.getenv("INSTALL_PROGRESS_CSV", os.path.join(_DATASETS, "InstallProgress.csv")), "item"),
+}
+
+_TRUE = {"true", "1", "yes", "y", "t"}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _key(item: str) -> str:
+    return str(item).strip().lower()
+
+
+def read_mirror_rows(kind: str) -> list[tuple[str, str, bool]]:
+    """(email, item, completed) rows of a legacy CSV, last occurrence per (email, item) winning."""
+    path, column = MIRRORS[kind]
+    if not os.path.exists(path):
+        return []
+    latest = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for r in csv.DictReader(f):
+            email, item = str(r.get("email") or "").strip().lower(), str(r.get(column) or "").strip()
+            if email and item:
+                latest[(email, _key(item))] = (email, item, str(r.get("completed")).strip().lower() in _TRUE)
+    return list(latest.values())
+
+
+def _append_mirror(kind: str, rows: list[tuple[str, str, bool]]):
+    if not MIRROR or not rows:
+        return
+    path, column = MIRRORS[kind]
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["email", column, "completed"])
+        w.writerows(rows)
+
+
+# ----------------------------
+# Reads
+# ----------------------------
+def get_progress(email: str, kind: str, path: str | None = None) -> dict[str, bool]:
+    """{item_key: completed} for one user's checklist."""
+    migrate(path)
+    rows = db.query("SELECT item_key, completed FROM progress WHERE email=? AND kind=?",
+                    (email.strip().lower(), kind), path=path)
+    return {r["item_key"]: bool(r["completed"]) for r in rows}
+
+
+def completed_items(email: str, kind: str, items: list[str], path: str | None = None) -> list[str]:
+    """The entries of `items` marked complete for `email`."""
+    done = get_progress(email, kind, path=path)
+    return [i for i in items if done.get(_key(i), False)]
+
+
+# ----------------------------
+# Writes
+# ----------------------------
+def set_many(email: str, kind: str, states: dict[str, bool], path: str | None = None) -> int:
+    """Store `states` ({item: completed}); only rows whose value changes are written. Returns that count."""
+    if not states:
+        return 0
+    migrate(path)
+    email = email.strip().lower()
+    ts = _now()
+    changed = []
+    with db.transaction(path) as con:
+        for item, completed in states.items():
+            cur = con.execute("""
+                INSERT INTO progress (email, kind, item_key, item, completed, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(email, kind, item_key) DO UPDATE SET
+                  completed=excluded.completed, item=excluded.item, updated_at=excluded.updated_at
+                WHERE progress.completed != excluded.completed
+            """, (email, kind, _key(item), str(item).strip(), int(bool(completed)), ts))
+            if cur.rowcount:
+                changed.append((email, str(item).strip(), bool(completed)))
+    _append_mirror(kind, changed)
+    return len(changed)
+
+
+def set_progress(email: str, kind: str, item: str, completed: bool, path: str | None = None) -> bool:
+    return set_many(email, kind, {item: completed}, path=path) > 0
+
+
+# ----------------------------
+# Seeding from the assignment CSV
+# ----------------------------
+_seeded = {}   # (db path, csv path, kind) -> csv fingerprint last seeded
+_seed_lock = threading.Lock()
+
+
+def assignment_pairs(df, column: str):
+    """Vectorised (email, item, item_key) frame from a comma-separated assignment column."""
+    import pandas as pd
+    if "email" not in df.columns or column not in df.columns:
+        return pd.DataFrame(columns=["email", "item", "item_key"])
+    pairs = pd.DataFrame({
+        "email": df["email"].astype(str).str.strip().str.lower(),
+        "item": df[column],
+    }).dropna(subset=["item"])
+    pairs = pairs[pairs["email"] != ""]
+    pairs = pairs.assign(item=pairs["item"].astype(str).str.split(",")).explode("item")
+    pairs["item"] = pairs["item"].str.strip()
+    pairs = pairs[pairs["item"] != ""]
+    pairs["item_key"] = pairs["item"].str.lower()
+    return pairs.drop_duplicates(["email", "item_key"]).reset_index(drop=True)
+
+
+def missing_pairs(pairs, kind: str, path: str | None = None):
+    """Anti-join of `pairs` against the rows already stored for `kind`."""
+    import pandas as pd
+    existing = pd.DataFrame(
+        db.query("SELECT email, item_key FROM progress WHERE kind=?", (kind,), path=path),
+        columns=["email", "item_key"],
+    )
+    merged = pairs.merge(existing, on=["email", "item_key"], how="left", indicator=True)
+    return merged.loc[merged["_merge"] == "left_only", ["email", "item", "item_key"]]
+
+
+def seed_from_assignments(csv_path: str, kind: str = "module", column: str = "Learning Modules",
+                          path: str | None = None, force: bool = False) -> int:
+    """Add a not-completed row for every assigned (email, item) that has none.
+
+    Runs once per process for each version (mtime/size) of `csv_path`, so
+    calling it on every rerun costs one stat. Returns the rows added.
+    """
+    try:
+        st_ = os.stat(csv_path)
+    except OSError:
+        return 0
+    key, fingerprint = (path or db.DB_PATH, os.path.abspath(csv_path), kind), (st_.st_mtime_ns, st_.st_size)
+    if not force and _seeded.get(key) == fingerprint:
+        return 0
+    with _seed_lock:
+        if not force and _seeded.get(key) == fingerprint:
+            return 0
+        migrate(path)
+        df = profiling.read_csv(csv_path, dtype=str)
+        df.columns = df.columns.str.strip()
+        new = missing_pairs(assignment_pairs(df, column), kind, path=path)
+        ts = _now()
+        with db.transaction(path) as con:
+            # OR IGNORE: another process may have seeded the same pairs meanwhile
+            con.executemany("""
+                INSERT OR IGNORE INTO progress (email, kind, item_key, item, completed, updated_at)
+                VALUES (?, ?, ?, ?, 0, ?)
+            """, ((e, kind, k, i, ts) for e, i, k in new[["email", "item", "item_key"]].itertuples(index=False)))
+        _seeded[key] = fingerprint
+    return len(new)
+
+
+# ----------------------------
+# Assigned items per user (in memory)
+# ----------------------------
+ASSIGNMENTS_CSV = os.getenv("ASSIGNMENTS_CSV", os.path.join(_DATASETS, "Employee Dataset1.csv"))
+# kind -> assignment column
+KIND_COLUMNS = {"module": "Learning Modules", "document": "Documents to be signed", "software": "To Install"}
+
+
+class AssignmentIndex:
+    """email -> {kind: [items]} from the assignment CSV, reloaded when its mtime/size changes."""
+
+    def __init__(self, csv_path: str = ASSIGNMENTS_CSV):
+        self.csv_path = csv_path
+        self._fingerprint = None
+        self._by_email = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            st_ = os.stat(self.csv_path)
+            fingerprint = (st_.st_mtime_ns, st_.st_size)
+        except OSError:
+            fingerprint = None
+        if fingerprint == self._fingerprint:
+            return
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+            by_email = {}
+            if fingerprint is not None:
+                df = profiling.read_csv(self.csv_path, dtype=str)
+                df.columns = df.columns.str.strip()
+                for email in df["email"].dropna().astype(str).str.strip().str.lower():
+                    by_email.setdefault(email, {})
+                for kind, column in KIND_COLUMNS.items():
+                    pairs = assignment_pairs(df, column)
+                    for email, items in pairs.groupby("email", sort=False)["item"]:
+                        by_email[email][kind] = items.tolist()
+            self._by_email, self._fingerprint = by_email, fingerprint
+
+    def known(self, email: str) -> bool:
+        self._refresh()
+        return email.strip().lower() in self._by_email
+
+    def items(self, email: str, kind: str) -> list[str]:
+        self._refresh()
+        return list(self._by_email.get(email.strip().lower(), {}).get(kind, ()))
+
+
+assignments = AssignmentIndex()
+
+
+def checklist(email: str, kind: str, path: str | None = None) -> tuple[list[str], dict[str, bool]]:
+    """(assigned items in file order, {item_key: completed}) for one user; O(items of that user)."""
+    items = assignments.items(email, kind)
+    return items, (get_progress(email, kind, path=path) if items else {})
+
+
+def export_csv(kind: str, dest: str, path: str | None = None) -> int:
+    """Write a compact CSV of one kind (legacy column layout); returns the row count."""
+    migrate(path)
+    _, column = MIRRORS[kind]
+    rows = db.query("SELECT email, item, completed FROM progress WHERE kind=? ORDER BY email, item_key",
+                    (kind,), path=path)
+    tmp = dest + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["email", column, "completed"])
+        w.writerows((r["email"], r["item"], bool(r["completed"])) for r in rows)
+    os.replace(tmp, dest)
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Export checklist progress to the legacy CSV layout.")
+    ap.add_argument("kind", choices=sorted(MIRRORS))
+    ap.add_argument("csv_path", nargs="?", help="default: the kind's mirror CSV")
+    ap.add_argument("--db", default=db.DB_PATH)
+    args = ap.parse_args()
+
+    dest = args.csv_path or MIRRORS[args.kind][0]
+    print(f"exported {export_csv(args.kind, dest, path=args.db)} rows to {dest}")
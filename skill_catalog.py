@@ -0,0 +1,121 @@
+import os
+import threading
+
+import pandas as pd
+
+import metrics
+import profiling
+
+# ----------------------------
+# Role-skill catalogue
+# ----------------------------
+# Required skills per role (level 1-5, weight, internal courses) and the
+# external courses per skill, read from files so the catalogue can grow
+# without code changes (.csv or .parquet). Each loaded version is a
+# `Catalog` with its lookups prebuilt (role -> rows, skill -> courses,
+# skill -> roles) and its own skill-gap engine; `CatalogStore.get()` swaps in
+# a new version when either file's mtime/size changes.
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+ROLE_SKILLS_PATH = os.getenv("ROLE_SKILLS_PATH", os.path.join(_HERE, "datasets", "role_skills.csv"))
+EXTERNAL_COURSES_PATH = os.getenv("EXTERNAL_COURSES_PATH", os.path.join(_HERE, "datasets", "external_courses.csv"))
+
+
+def _read(path: str) -> pd.DataFrame:
+    df = pd.read_parquet(path) if path.endswith(".parquet") else profiling.read_csv(path)
+    df.columns = [c.strip() for c in df.columns]
+    return df
+
+
+def _split_courses(courses) -> list[str]:
+    if not isinstance(courses, str):
+        return []
+    return [c.strip() for c in courses.split(";") if c.strip()]
+
+
+class Catalog:
+    """One loaded version of the catalogue with its lookup indexes."""
+
+    def __init__(self, df: pd.DataFrame, external: pd.DataFrame | None = None):
+        self.df = df
+        self.roles = sorted(df["Role"].dropna().unique().tolist())
+        self.skills = df["Skill"].dropna().unique().tolist()    # first-seen order
+        self._positions = df.groupby("Role", sort=False).indices
+        self._rows = {}
+        self._base_courses, self._skill_roles = {}, {}
+        for role, skill, courses in zip(df["Role"], df["Skill"], df["Recommended_Courses"]):
+            self._skill_roles.setdefault(skill, {})[role] = None
+            # the first row of a skill provides its catalogue courses
+            self._base_courses.setdefault(skill, _split_courses(courses))
+        self._external = {}
+        if external is not None and not external.empty:
+            for skill, course in zip(external["Skill"], external["Course"]):
+                if isinstance(skill, str) and isinstance(course, str) and course.strip():
+                    self._external.setdefault(skill.strip(), []).append(course.strip())
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def role_rows(self, role: str) -> pd.DataFrame:
+        rows = self._rows.get(role)
+        if rows is None:
+            rows = self._rows[role] = self.df.iloc[self._positions.get(role, [])]
+        return rows
+
+    def roles_for_skill(self, skill: str) -> list[str]:
+        return list(self._skill_roles.get(skill, ()))
+
+    def external_courses(self, skill: str) -> list[str]:
+        return list(self._external.get(skill, ()))
+
+    def courses(self, skill: str) -> list[str]:
+        """Catalogue courses of `skill` followed by external ones, without duplicates."""
+        return list(dict.fromkeys(self._base_courses.get(skill, []) + self._external.get(skill, [])))
+
+    def gap_engine(self):
+        """The SkillGapEngine for this version, built on first use."""
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    from skill_gap import SkillGapEngine
+                    self._engine = SkillGapEngine(self.df)
+        return self._engine
+
+
+def load_catalog(path: str = ROLE_SKILLS_PATH, external_path: str = EXTERNAL_COURSES_PATH) -> Catalog:
+    external = _read(external_path) if os.path.exists(external_path) else None
+    return Catalog(_read(path), external)
+
+
+def load_role_skill_data(path: str = ROLE_SKILLS_PATH) -> pd.DataFrame:
+    return _read(path)
+
+
+class CatalogStore:
+    """The current `Catalog`, reloaded when either source file changes (None while the catalogue is missing)."""
+
+    def __init__(self, path: str = ROLE_SKILLS_PATH, external_path: str = EXTERNAL_COURSES_PATH):
+        self.path, self.external_path = path, external_path
+        self._fingerprint = None
+        self._catalog = None
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        out = []
+        for p in (self.path, self.external_path):
+            try:
+                st_ = os.stat(p)
+                out.append((st_.st_mtime_ns, st_.st_size))
+            except OSError:
+                out.append(None)
+        return tuple(out)
+
+    def get(self) -> Catalog | None:
+        fingerprint = self._stat()
+        if fingerprint == self._fingerprint:
+            return self._catalog
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._catalog = load_catalog(self.path, self.external_path) if fingerprint[0] else None
+                self._fingerprint = fingerprint
+                metrics.incr("skill_catalog.reload")
+        return self._catalog
@@ -0,0 +1,296 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+import metrics
+
+# ----------------------------
+# Skill-gap engine
+# ----------------------------
+# Built once per role-skill catalogue (the Learning Hub keeps one in
+# st.cache_resource). Per-role requirements are built once, user skills are
+# matched to a role's canonical skills with one batched `process.cdist` call
+# (WRatio, same threshold and tie-breaking as the old per-skill extractOne),
+# and each match is remembered per role. Whole results are memoised on
+# (role, normalised skills), so a rerun with the same input costs a dict
+# lookup.
+
+MATCH_THRESHOLD = 85
+GAP_CACHE_SIZE = int(os.getenv("SKILL_GAP_CACHE_SIZE", "1024"))
+
+
+class RoleRequirements:
+    """One role's required skills, in catalogue order."""
+
+    def __init__(self, columns: dict, positions):
+        def pick(name, default):
+            values = columns.get(name)
+            return [values[i] for i in positions] if values is not None else [default] * len(positions)
+
+        self.skills = [str(s) for s in pick("Skill", "")]
+        self.levels = pick("Required_Level", None)
+        self.weights = pick("Weight", 1.0)
+        self.descriptions = pick("Description", "")
+        self.courses = pick("Recommended_Courses", "")
+        self.skill_set = set(self.skills)
+
+
+class _RoleIndex(dict):
+    """role -> RoleRequirements, each built on first access (catalogues can hold thousands of roles)."""
+
+    def __init__(self, df):
+        super().__init__()
+        self.positions = df.groupby("Role").indices
+        self.columns = {c: df[c].tolist() for c in
+                        ("Skill", "Required_Level", "Weight", "Description", "Recommended_Courses")
+                        if c in df.columns}
+
+    def __missing__(self, role):
+        req = self[role] = RoleRequirements(self.columns, self.positions[role])
+        return req
+
+
+def parse_user_skills(raw_text):
+    """{skill: level or None} from "Python:3, SQL, Excel:2" (commas, semicolons or newlines)."""
+    if not raw_text:
+        return {}
+    parts = re.split(r"[,\n;]+", raw_text)
+    skill_map = {}
+    for p in parts:
+        p = p.strip()
+        if not p:
+            continue
+        if ":" in p:
+            skill_name, lvl = p.split(":", 1)
+            skill_name = skill_name.strip()
+            try:
+                lvl_val = float(lvl.strip())
+            except Exception:
+                lvl_val = None
+            skill_map[skill_name] = lvl_val
+        else:
+            skill_map[p] = None
+    return skill_map
+
+
+def normalize_skills(user_skills: dict) -> tuple:
+    """((skill, level), ...) with names stripped and blanks dropped, in input order."""
+    return tuple((str(s).strip(), lvl) for s, lvl in user_skills.items() if str(s).strip())
+
+
+class SkillGapEngine:
+    def __init__(self, df, threshold: int = MATCH_THRESHOLD, cache_size: int = GAP_CACHE_SIZE):
+        self.threshold = threshold
+        self.requirements = _RoleIndex(df)
+        self.roles = sorted(self.requirements.positions)
+        self._matches = {}   # role -> {user skill: canonical or None}
+        self._gaps = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    # ----------------------------
+    # Matching
+    # ----------------------------
+    def match(self, role: str, skills) -> dict:
+        """{user skill: canonical skill of `role`, or None below the threshold}."""
+        req = self.requirements[role]
+        known = self._matches.setdefault(role, {})
+        unseen = list(dict.fromkeys(s for s in skills if s not in known))
+        if unseen and req.skills:
+            scores = process.cdist(unseen, req.skills, scorer=fuzz.WRatio, dtype=np.float64)
+            best = scores.argmax(axis=1)
+            ok = scores[np.arange(len(unseen)), best] >= self.threshold
+            with self._lock:
+                for s, i, hit in zip(unseen, best.tolist(), ok.tolist()):
+                    known[s] = req.skills[i] if hit else None
+        elif unseen:
+            with self._lock:
+                known.update(dict.fromkeys(unseen))
+        return {s: known[s] for s in skills}
+
+    # ----------------------------
+    # Gaps
+    # ----------------------------
+    def gap(self, role: str, user_skills: dict, fuzzy: bool = True) -> dict:
+        """{"missing", "underdeveloped", "met", "extra"} lists for `user_skills` ({skill: level or None})."""
+        key = (role, normalize_skills(user_skills), fuzzy)
+        with self._lock:
+            cached = self._gaps.get(key)
+            if cached is not None:
+                self._gaps.move_to_end(key)
+        if cached is not None:
+            metrics.incr("skill_gap.cache_hit")
+        else:
+            metrics.incr("skill_gap.cache_miss")
+            cached = self._compute(role, key[1], fuzzy)
+            with self._lock:
+                self._gaps[key] = cached
+                while len(self._gaps) > self._cache_size:
+                    self._gaps.popitem(last=False)
+        # callers keep results in session state; hand out copies of the cached rows
+        return {section: [dict(item) for item in items] for section, items in cached.items()}
+
+    def _compute(self, role: str, skills: tuple, fuzzy: bool) -> dict:
+        req = self.requirements[role]
+        matches = self.match(role, [s for s, _ in skills]) if fuzzy else {}
+        normalized_user = {}
+        for skill, lvl in skills:
+            normalized_user[(matches.get(skill) or skill) if fuzzy else skill] = lvl
+
+        gap = {"missing": [], "underdeveloped": [], "met": [], "extra": []}
+        for skill, req_level, weight, desc, courses in zip(
+                req.skills, req.levels, req.weights, req.descriptions, req.courses):
+            user_level = normalized_user.get(skill)
+            if user_level is None:
+                section, extra = "missing", {}
+            elif isinstance(req_level, (int, float)) and not user_level >= req_level:
+                section, extra = "underdeveloped", {"gap_value": req_level - user_level}
+            else:
+                section, extra = "met", {}
+            gap[section].append({"skill": skill, "required_level": req_level, "user_level": user_level,
+                                 **extra, "weight": weight, "description": desc, "base_courses": courses})
+
+        for uskill, lvl in normalized_user.items():
+            if uskill not in req.skill_set:
+                gap["extra"].append({"skill": uskill, "user_level": lvl})
+        return gap
+
+    def batch_stats(self, employees: dict, roles=None) -> list[dict]:
+        """`gap_stats` for every employee ({id: {skill: level}}) against every role (default all)."""
+        roles = list(roles) if roles is not None else self.roles
+        normalized = {emp: normalize_skills(skills) for emp, skills in employees.items()}
+        vocabulary = list(dict.fromkeys(s for skills in normalized.values() for s, _ in skills))
+        rows = []
+        for role in roles:
+            self.match(role, vocabulary)   # one cdist call for every skill not matched before
+            for emp, skills in normalized.items():
+                # bypasses the memo so a batch does not evict interactive results
+                stats = gap_stats(self._compute(role, skills, True))
+                rows.append({"employee": emp, "role": role, **stats})
+        return rows
+
+
+def gap_stats(gap: dict) -> dict:
+    """Counts per section and the weighted gap index (0 = ready, 1 = nothing met)."""
+    total_required = len(gap["missing"]) + len(gap["underdeveloped"]) + len(gap["met"])
+    if total_required == 0:
+        return {}
+    gap_score = 0.0
+    total_weight = 0.0
+    for item in gap["underdeveloped"]:
+        req_level = item.get("required_level")
+        user_level = item.get("user_level", 0) or 0
+        weight = item.get("weight", 1.0) or 1.0
+        if req_level:
+            gap_score += ((req_level - user_level) / req_level) * weight
+            total_weight += weight
+    for item in gap["missing"]:
+        weight = item.get("weight", 1.0) or 1.0
+        gap_score += 1.0 * weight
+        total_weight += weight
+    normalized_gap = gap_score / total_weight if total_weight else 0
+    return {
+        "total_required_skills": total_required,
+        "met": len(gap["met"]),
+        "underdeveloped": len(gap["underdeveloped"]),
+        "missing": len(gap["missing"]),
+        "extra": len(gap["extra"]),
+        "weighted_gap_index": round(normalized_gap, 3)
+    }
+
+
+# ----------------------------
+# Readiness matrix (many employees x many roles)
+# ----------------------------
+# The batch form of `gap` + `gap_stats`. Requirements become roles x skills
+# matrices, employee levels an (roles x employees x skills) block in which
+# each role sees the user skills as that role's matcher resolved them, and
+# every weighted gap index comes out of one broadcast over the block.
+
+class ReadinessTables:
+    """Roles x skills requirement/weight matrices and each role's column for every user skill."""
+
+    def __init__(self, engine: SkillGapEngine, vocabulary, roles=None):
+        self.roles = list(roles) if roles is not None else engine.roles
+        self.skills = sorted({s for r in self.roles for s in engine.requirements[r].skills})
+        column = {s: j for j, s in enumerate(self.skills)}
+        shape = (len(self.roles), len(self.skills))
+        self.required = np.full(shape, np.nan)
+        self.numeric = np.zeros(shape, dtype=bool)     # level is a number (else present == met)
+        self.weight = np.zeros(shape)
+        self.mask = np.zeros(shape, dtype=bool)
+        for i, role in enumerate(self.roles):
+            req = engine.requirements[role]
+            for skill, level, weight in zip(req.skills, req.levels, req.weights):
+                j = column[skill]
+                self.mask[i, j] = True
+                self.numeric[i, j] = isinstance(level, (int, float))
+                self.required[i, j] = level if self.numeric[i, j] else np.nan
+                self.weight[i, j] = weight or 1.0
+        self.vocabulary = list(vocabulary)
+        self.match = np.full((len(self.roles), len(self.vocabulary)), -1, dtype=np.int64)
+        for i, role in enumerate(self.roles):
+            matches = engine.match(role, self.vocabulary)
+            for u, skill in enumerate(self.vocabulary):
+                if matches[skill] is not None:
+                    self.match[i, u] = column[matches[skill]]
+
+    def chunk_size(self, cells: int = 4_000_000) -> int:
+        """Employees per `score` call keeping the level block around `cells` floats."""
+        return max(1, cells // max(1, self.required.size))
+
+
+def skill_pairs(employees, vocabulary: dict):
+    """(employee row, vocabulary index, level) arrays for [{skill: level}, ...], in input order."""
+    emp, uix, lvl = [], [], []
+    for e, skills in enumerate(employees):
+        for skill, level in normalize_skills(skills):
+            emp.append(e)
+            uix.append(vocabulary[skill])
+            lvl.append(np.nan if level is None else float(level))
+    return np.array(emp, dtype=np.int64), np.array(uix, dtype=np.int64), np.array(lvl, dtype=float)
+
+
+def score(t: ReadinessTables, emp, uix, lvl, n: int) -> dict:
+    """gap_stats fields as (roles x n) arrays for `n` employees given as skill pairs."""
+    R, S = t.required.shape
+    cols = t.match[:, uix]                                   # role x pair
+    r = np.broadcast_to(np.arange(R)[:, None], cols.shape)
+    e = np.broadcast_to(emp[None, :], cols.shape)
+    v = np.broadcast_to(lvl[None, :], cols.shape)
+    hit = cols >= 0
+
+    # several user skills resolving to one requirement: the last one wins, as in the dict
+    key = ((r[hit] * n + e[hit]) * S + cols[hit])[::-1]
+    _, last = np.unique(key, return_index=True)
+    levels = np.full((R, n, S), np.nan)
+    levels[r[hit][::-1][last], e[hit][::-1][last], cols[hit][::-1][last]] = v[hit][::-1][last]
+
+    # distinct names no requirement of the role matched are "extra"
+    extra = np.zeros((R, n), dtype=np.int64)
+    _, first = np.unique((r[~hit] * n + e[~hit]) * len(t.vocabulary) + uix[None, :].repeat(R, 0)[~hit],
+                         return_index=True)
+    np.add.at(extra, (r[~hit][first], e[~hit][first]), 1)
+
+    required, weight, mask = t.required[:, None, :], t.weight[:, None, :], t.mask[:, None, :]
+    have = ~np.isnan(levels)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        under = mask & have & t.numeric[:, None, :] & ~(levels >= required)
+        scored = under & (required != 0)
+        gap_score = np.where(scored, (required - levels) / required * weight, 0.0).sum(-1)
+    missing = mask & ~have
+    gap_score += np.where(missing, weight, 0.0).sum(-1)
+    total_weight = np.where(scored | missing, weight, 0.0).sum(-1)
+    index = np.divide(gap_score, total_weight, out=np.zeros_like(gap_score), where=total_weight != 0)
+    return {
+        "total_required_skills": np.broadcast_to(t.mask.sum(-1)[:, None], (R, n)),
+        "met": (mask & have & ~under).sum(-1),
+        "underdeveloped": under.sum(-1),
+        "missing": missing.sum(-1),
+        "extra": extra,
+        "weighted_gap_index": np.round(index, 3),
+    }
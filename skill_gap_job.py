@@ -0,0 +1,156 @@
+import os
+import time
+
+import pandas as pd
+
+# ----------------------------
+# Organisation-wide skill readiness
+# ----------------------------
+# Scores every employee in the employee CSV against every role of the
+# catalogue (skill_gap.ReadinessTables / score) and writes one row per
+# (employee, role) with the gap_stats fields plus readiness_pct. The
+# dashboard reads the result with `load_result`.
+#
+#   python skill_gap_job.py [--employees CSV] [--out PATH] [--workers N]
+#
+# Employee skills in the CSV carry no levels. The Learning Hub treats a skill
+# without a level as missing, which would make everyone 0% ready, so listed
+# skills are scored at --assumed-level instead.
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+EMPLOYEES_CSV = os.getenv("ASSIGNMENTS_CSV", os.path.join(_HERE, "datasets", "Employee Dataset1.csv"))
+RESULT_PATH = os.getenv("SKILL_READINESS_PATH", os.path.join(_HERE, "datasets", "skill_readiness.parquet"))
+ASSUMED_LEVEL = float(os.getenv("SKILL_GAP_ASSUMED_LEVEL", "3"))
+WORKERS = int(os.getenv("SKILL_GAP_WORKERS", "1"))
+
+STAT_COLUMNS = ["total_required_skills", "met", "underdeveloped", "missing", "extra", "weighted_gap_index"]
+
+_tables = _index = None   # ReadinessTables and vocabulary index of a worker process
+
+
+def load_employees(path: str = EMPLOYEES_CSV, assumed_level: float | None = ASSUMED_LEVEL):
+    """(email, name, {skill: level}) per employee row."""
+    from skill_gap import parse_user_skills
+    df = pd.read_csv(path, dtype=str)
+    df.columns = df.columns.str.strip()
+    out = []
+    names = df["Name"] if "Name" in df.columns else df["email"]
+    raw_skills = df["Skills"] if "Skills" in df.columns else [""] * len(df)
+    for email, name, raw in zip(df["email"], names, raw_skills):
+        if not isinstance(email, str) or not email.strip():
+            continue
+        skills = parse_user_skills(raw if isinstance(raw, str) else "")
+        if assumed_level is not None:
+            skills = {s: (assumed_level if lvl is None else lvl) for s, lvl in skills.items()}
+        out.append((email.strip().lower(), name, skills))
+    return out
+
+
+def _init_worker(tables, index):
+    global _tables, _index
+    _tables, _index = tables, index
+
+
+def _score_chunk(skills: list[dict]):
+    from skill_gap import score, skill_pairs
+    return score(_tables, *skill_pairs(skills, _index), len(skills))
+
+
+def compute(employees, roles=None, workers: int = WORKERS):
+    """DataFrame of (email, name, role, gap stats..., readiness_pct) for every employee x role."""
+    from concurrent.futures import ProcessPoolExecutor
+    from skill_catalog import load_role_skill_data
+    from skill_gap import SkillGapEngine, ReadinessTables, normalize_skills
+
+    engine = SkillGapEngine(load_role_skill_data())
+    vocabulary = list(dict.fromkeys(s for _, _, skills in employees for s, _ in normalize_skills(skills)))
+    tables = ReadinessTables(engine, vocabulary, roles)
+    index = {s: i for i, s in enumerate(vocabulary)}
+
+    size = tables.chunk_size()
+    chunks = [employees[i:i + size] for i in range(0, len(employees), size)]
+    jobs = [[skills for _, _, skills in chunk] for chunk in chunks]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(tables, index)) as pool:
+            results = list(pool.map(_score_chunk, jobs))
+    else:
+        _init_worker(tables, index)
+        results = [_score_chunk(job) for job in jobs]
+
+    frames = []
+    for chunk, res in zip(chunks, results):
+        n = len(chunk)
+        frame = pd.DataFrame({
+            "email": [e for e, _, _ in chunk] * len(tables.roles),
+            "name": [nm for _, nm, _ in chunk] * len(tables.roles),
+            "role": [r for r in tables.roles for _ in range(n)],
+            **{c: res[c].reshape(-1) for c in STAT_COLUMNS},
+        })
+        frames.append(frame)
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["email", "name", "role", *STAT_COLUMNS])
+    df["readiness_pct"] = ((1 - df["weighted_gap_index"].astype(float)) * 100).round(1)
+    return df
+
+
+# ----------------------------
+# Result file (Parquet, or CSV without a Parquet engine)
+# ----------------------------
+def _csv_sibling(path: str) -> str:
+    return os.path.splitext(path)[0] + ".csv"
+
+
+def write_result(df: pd.DataFrame, path: str = RESULT_PATH) -> str:
+    """Write `df` atomically; returns the path written (the .csv sibling if Parquet is unavailable)."""
+    if path.endswith(".parquet"):
+        tmp = path + ".tmp"
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+            return path
+        except ImportError:
+            path = _csv_sibling(path)
+    tmp = path + ".tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def result_path(path: str = RESULT_PATH) -> str | None:
+    """The existing result file for `path` (itself or its .csv sibling), newest first."""
+    candidates = [p for p in (path, _csv_sibling(path)) if os.path.exists(p)]
+    return max(candidates, key=os.path.getmtime) if candidates else None
+
+
+def result_fingerprint(path: str = RESULT_PATH):
+    found = result_path(path)
+    if found is None:
+        return None
+    st_ = os.stat(found)
+    return found, st_.st_mtime_ns, st_.st_size
+
+
+def load_result(path: str = RESULT_PATH) -> pd.DataFrame | None:
+    found = result_path(path)
+    if found is None:
+        return None
+    return pd.read_parquet(found) if found.endswith(".parquet") else pd.read_csv(found)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Readiness of every employee for every catalogue role.")
+    ap.add_argument("--employees", default=EMPLOYEES_CSV)
+    ap.add_argument("--out", default=RESULT_PATH, help=".parquet or .csv")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="processes (default SKILL_GAP_WORKERS or 1)")
+    ap.add_argument("--assumed-level", type=float, default=ASSUMED_LEVEL,
+                    help="level for skills listed without one (default %(default)s)")
+    ap.add_argument("--role", action="append", dest="roles", help="limit to these roles (repeatable)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    employees = load_employees(args.employees, args.assumed_level)
+    result = compute(employees, args.roles, args.workers)
+    written = write_result(result, args.out)
+    print(f"{len(employees)} employees x {result['role'].nunique()} roles -> {written} "
+          f"({time.perf_counter() - t0:.1f} s)")
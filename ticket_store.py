@@ -0,0 +1,224 @@
+import io
+import csv
+import os
+from datetime import datetime, timezone
+
+import db
+from migrations import migrate
+
+# ----------------------------
+# Ticket engine (mentormatch.db `tickets`)
+# ----------------------------
+# The single store behind the chat intake on the Homepage, the MyTickets page
+# and the onboarding bot's "raise a ticket". IDs come from AUTOINCREMENT, each
+# create/update is one statement, and the lookups used by the pages are
+# indexed (see migration 7). CSV is only an import/export format.
+
+STATUSES = ["NEW", "TRIAGED", "IN_PROGRESS", "WAITING_ON_USER", "RESOLVED", "CLOSED"]
+OPEN_STATUSES = ["NEW", "TRIAGED", "IN_PROGRESS", "WAITING_ON_USER"]
+PRIORITIES = ["P1", "P2", "P3", "P4"]
+
+COLUMNS = ["id", "title", "description", "status", "priority", "category_key",
+           "requester_email", "assignee_email", "created_at", "updated_at", "role"]
+_EDITABLE = {"title", "description", "status", "priority", "category_key", "assignee_email"}
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _ready(path: str | None):
+    migrate(path)
+
+
+def create_ticket(requester_email: str, title: str, description: str = "", category_key: str = "it",
+                  priority: str = "P3", assignee_email: str = "", role: str = "EMPLOYEE",
+                  path: str | None = None) -> int:
+    """Insert a NEW ticket and return its id."""
+    _ready(path)
+    priority = (priority or "P3").strip().upper()
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {PRIORITIES}")
+    ts = now_iso()
+    return db.execute("""
+        INSERT INTO tickets (title, description, status, priority, category_key,
+                             requester_email, assignee_email, role, created_at, updated_at)
+        VALUES (?, ?, 'NEW', ?, ?, ?, ?, ?, ?, ?)
+    """, (title.strip(), (description or "").strip(), priority, (category_key or "").strip().lower(),
+          requester_email.strip(), (assignee_email or "").strip(), (role or "EMPLOYEE").upper(), ts, ts),
+        path=path)
+
+
+def get_ticket(ticket_id: int, path: str | None = None) -> dict | None:
+    _ready(path)
+    return db.query_one("SELECT * FROM tickets WHERE id=?", (int(ticket_id),), path=path)
+
+
+def list_tickets(requester_email: str | None = None, assignee_email: str | None = None,
+                 status: str | None = None, category_key: str | None = None,
+                 limit: int | None = None, path: str | None = None) -> list[dict]:
+    """Tickets matching every given filter, newest first."""
+    _ready(path)
+    where, params = [], []
+    for column, value in (("requester_email", requester_email), ("assignee_email", assignee_email),
+                          ("status", status), ("category_key", category_key)):
+        if value:
+            where.append(f"{column}=?")
+            params.append(value)
+    sql = "SELECT * FROM tickets"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, id DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return db.query(sql, params, path=path)
+
+
+def update_ticket(ticket_id: int, *, requester_email: str | None = None, path: str | None = None,
+                  **changes) -> bool:
+    """Apply `changes` (title, description, status, priority, category_key, assignee_email).
+
+    With `requester_email`, only that requester's ticket is updated. Returns
+    False when no ticket matched.
+    """
+    unknown = set(changes) - _EDITABLE
+    if unknown:
+        raise ValueError(f"cannot update {sorted(unknown)}")
+    if changes.get("status") and changes["status"] not in STATUSES:
+        raise ValueError(f"status must be one of {STATUSES}")
+    if changes.get("priority") and changes["priority"] not in PRIORITIES:
+        raise ValueError(f"priority must be one of {PRIORITIES}")
+    _ready(path)
+    sets = [f"{k}=?" for k in changes] + ["updated_at=?"]
+    params = list(changes.values()) + [now_iso(), int(ticket_id)]
+    sql = f"UPDATE tickets SET {', '.join(sets)} WHERE id=?"
+    if requester_email:
+        sql += " AND requester_email=?"
+        params.append(requester_email)
+    with db.transaction(path) as con:
+        return con.execute(sql, params).rowcount > 0
+
+
+def status_counts(requester_email: str | None = None, path: str | None = None) -> dict:
+    _ready(path)
+    if requester_email:
+        rows = db.query("SELECT status, COUNT(*) AS n FROM tickets WHERE requester_email=? GROUP BY status",
+                        (requester_email,), path=path)
+    else:
+        rows = db.query("SELECT status, COUNT(*) AS n FROM tickets GROUP BY status", path=path)
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update({r["status"]: r["n"] for r in rows})
+    return counts
+
+
+def daily_counts(days: int = 14, path: str | None = None) -> list[dict]:
+    """[{"day": "YYYY-MM-DD", "count": n}] for the last `days` days that have tickets."""
+    _ready(path)
+    rows = db.query("""
+        SELECT substr(created_at, 1, 10) AS day, COUNT(*) AS count
+        FROM tickets GROUP BY day ORDER BY day DESC LIMIT ?
+    """, (int(days),), path=path)
+    return rows[::-1]
+
+
+def last_updated(path: str | None = None) -> str | None:
+    _ready(path)
+    return db.scalar("SELECT MAX(updated_at) FROM tickets", path=path)
+
+
+# ----------------------------
+# CSV import / export
+# ----------------------------
+def export_csv(dest, path: str | None = None) -> int:
+    """Write all tickets to `dest` (file path or text file object); returns the row count."""
+    rows = list_tickets(path=path)
+    if isinstance(dest, str):
+        tmp = dest + ".tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            _write_csv(f, rows)
+        os.replace(tmp, dest)
+    else:
+        _write_csv(dest, rows)
+    return len(rows)
+
+
+def _write_csv(f, rows):
+    w = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+    w.writeheader()
+    w.writerows(rows)
+
+
+def read_csv_rows(src) -> list[dict]:
+    """Rows of a tickets CSV (path, text file object or bytes) in COLUMNS shape."""
+    if isinstance(src, bytes):
+        src = io.StringIO(src.decode("utf-8-sig"))
+    if isinstance(src, str):
+        if not os.path.exists(src):
+            return []
+        with open(src, newline="", encoding="utf-8-sig") as f:
+            return _normalize(csv.DictReader(f))
+    return _normalize(csv.DictReader(src))
+
+
+def _normalize(reader) -> list[dict]:
+    out = []
+    for r in reader:
+        r = {k.strip(): (v or "").strip() for k, v in r.items() if k}
+        if not r.get("title"):
+            continue
+        ts = r.get("created_at") or now_iso()
+        out.append({
+            "id": int(float(r["id"])) if r.get("id") else None,
+            "title": r["title"],
+            "description": r.get("description", ""),
+            "status": r.get("status", "").upper() if r.get("status", "").upper() in STATUSES else "NEW",
+            "priority": r.get("priority", "").upper() if r.get("priority", "").upper() in PRIORITIES else "P3",
+            "category_key": r.get("category_key", "").lower(),
+            "requester_email": r.get("requester_email", ""),
+            "assignee_email": r.get("assignee_email", ""),
+            "role": (r.get("role") or "EMPLOYEE").upper(),
+            "created_at": ts,
+            "updated_at": r.get("updated_at") or ts,
+        })
+    return out
+
+
+def upsert_rows(con, rows: list[dict]) -> int:
+    """Insert `rows` on `con` (inside a transaction); rows whose id exists replace that ticket."""
+    for r in rows:
+        con.execute("""
+            INSERT INTO tickets (id, title, description, status, priority, category_key,
+                                 requester_email, assignee_email, role, created_at, updated_at)
+            VALUES (:id, :title, :description, :status, :priority, :category_key,
+                    :requester_email, :assignee_email, :role, :created_at, :updated_at)
+            ON CONFLICT(id) DO UPDATE SET
+              title=excluded.title, description=excluded.description, status=excluded.status,
+              priority=excluded.priority, category_key=excluded.category_key,
+              requester_email=excluded.requester_email, assignee_email=excluded.assignee_email,
+              role=excluded.role, created_at=excluded.created_at, updated_at=excluded.updated_at
+        """, r)
+    return len(rows)
+
+
+def import_csv(src, path: str | None = None) -> int:
+    """Upsert every ticket in the CSV `src` in one transaction; returns the row count."""
+    _ready(path)
+    rows = read_csv_rows(src)
+    with db.transaction(path) as con:
+        return upsert_rows(con, rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Import/export the ticket store as CSV.")
+    ap.add_argument("action", choices=["export", "import"])
+    ap.add_argument("csv_path")
+    ap.add_argument("--db", default=db.DB_PATH)
+    args = ap.parse_args()
+
+    if args.action == "export":
+        print(f"exported {export_csv(args.csv_path, path=args.db)} tickets to {args.csv_path}")
+    else:
+        print(f"imported {import_csv(args.csv_path, path=args.db)} tickets from {args.csv_path}")
@@ -1,46 +1,35 @@
-import sqlite3
 from pathlib import Path
 import streamlit as st
 from streamlit_autorefresh import st_autorefresh
 import os
 import json
-from datetime import datetime, date
+import hashlib
 
+import db
+import metrics
+import learning_store
 
 
-DB_PATH = "mentormatch.db"
 
-def _conn():
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    return con
+DB_PATH = db.DB_PATH
 
 def add_notification(user_email: str, message: str, ics_path: str = None):
-    con = _conn()
-    con.execute(
+    db.execute(
         """
         INSERT INTO notifications (user_email, message, ics_path, created_at)
         VALUES (?, ?, ?, CURRENT_TIMESTAMP)
         """,
         (user_email, message, ics_path)
     )
-    con.commit()
-    con.close()
 
 def get_notifications(user_email: str):
-    con = _conn()
-    rows = con.execute(
+    return db.query(
         "SELECT * FROM notifications WHERE user_email=? ORDER BY created_at DESC",
         (user_email,)
-    ).fetchall()
-    con.close()
-    return [dict(r) for r in rows]
+    )
 
 def clear_notifications(user_email: str):
-    con = _conn()
-    con.execute("DELETE FROM notifications WHERE user_email=?", (user_email,))
-    con.commit()
-    con.close()
+    db.execute("DELETE FROM notifications WHERE user_email=?", (user_email,))
 
 def notifications_panel(user):
     """Sidebar notifications for logged-in user"""
@@ -72,82 +61,52 @@ def notifications_panel(user):
         st.success("You have been logged out.")
         st.rerun()
 
-        
-
-
-#learning hub 
-
-
-USERDATA_DIR = "userdata"
-os.makedirs(USERDATA_DIR, exist_ok=True)
 
-
-def user_json_path(email: str) -> str:
-    safe = email.replace("@", "_at_").replace(".", "_dot_")
-    return os.path.join(USERDATA_DIR, f"{safe}.json")
-
-
-def parse_date_safe(val):
-    if not isinstance(val, str):
-        return val
-    try:
-        return datetime.fromisoformat(val).date()
-    except Exception:
-        try:
-            return date.fromisoformat(val)
-        except Exception:
-            return None
+def metrics_panel(prefix: str = ""):
+    """Sidebar view of in-process metrics. Enable with SAP360_METRICS=1."""
+    if os.getenv("SAP360_METRICS", "0") != "1":
+        return
+    snap = metrics.snapshot(prefix)
+    with st.sidebar.expander("📊 Metrics", expanded=False):
+        for name, value in snap["counters"].items():
+            st.write(f"- {name}: {value}")
+        for name, s in snap["observations"].items():
+            st.write(f"- {name}: n={s['count']} p50={s['p50']} p95={s['p95']}")
 
 
-def parse_datetime_safe(val):
-    if not isinstance(val, str):
-        return val
-    try:
-        return datetime.fromisoformat(val)
-    except Exception:
-        return None
+#learning hub 
 
 
-def normalize_dates(data: dict) -> dict:
-    pt = data.get("progress_tracker", {})
+# Plans and progress trackers live in mentormatch.db (learning_store.py).
+# persist_session_to_json keeps a digest of the last stored state in session
+# and only calls the store when it changes; the store then writes just the
+# changed fields/rows.
 
-    if "start_date" in pt:
-        pt["start_date"] = parse_date_safe(pt["start_date"])
 
-    for phase, info in pt.get("phase_status", {}).items():
-        if "completed_at" in info:
-            info["completed_at"] = parse_datetime_safe(info["completed_at"])
+def load_user_data(email: str) -> dict:
+    return learning_store.load_state(email)
 
-    for cp in pt.get("checkpoints", []):
-        if "target_date" in cp:
-            cp["target_date"] = parse_date_safe(cp["target_date"])
-        if "completed_at" in cp:
-            cp["completed_at"] = parse_datetime_safe(cp["completed_at"])
 
-    data["progress_tracker"] = pt
-    return data
+def save_user_data(email: str, data: dict) -> int:
+    return learning_store.save_state(email, data)
 
 
-def load_user_data(email: str) -> dict:
-    path = user_json_path(email)
-    if os.path.exists(path):
-        try:
-            with open(path, "r") as f:
-                data = json.load(f)
-            return normalize_dates(data)
-        except Exception:
-            return {}
-    return {}
+def _session_user_data() -> dict:
+    return {
+        "chosen_upskillingplan": st.session_state.get("chosen_upskillingplan"),
+        "accepted_plan_role": st.session_state.get("accepted_plan_role"),
+        "accepted_at": st.session_state.get("accepted_at"),
+        "progress_tracker": st.session_state.get("progress_tracker", {})
+    }
 
 
-def save_user_data(email: str, data: dict):
-    path = user_json_path(email)
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2, default=str)
+def _digest(data: dict) -> str:
+    text = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
 
 
 def hydrate_session_from_json():
-    """Call this once after login to make sure session_state is hydrated from JSON."""
+    """Call this once after login to make sure session_state is hydrated from the learning store."""
     if "user" not in st.session_state or not st.session_state.user:
         return
 
@@ -159,17 +118,24 @@ def hydrate_session_from_json():
             if key in user_data:
                 st.session_state[key] = user_data[key]
         st.session_state["hydrated_from_json"] = True
+        # What is stored now; persist_session_to_json writes only when this changes
+        st.session_state["_userdata_digest"] = _digest(_session_user_data())
+        st.session_state["_userdata_email"] = user_email
 
 
 def persist_session_to_json():
-    """Call this at the bottom of each page to persist back to JSON."""
+    """Call this at the bottom of each page to persist back to the store (only when the state changed)."""
     if "user" not in st.session_state or not st.session_state.user:
         return
 
     user_email = st.session_state.user["email"].strip().lower()
-    save_user_data(user_email, {
-        "chosen_upskillingplan": st.session_state.get("chosen_upskillingplan"),
-        "accepted_plan_role": st.session_state.get("accepted_plan_role"),
-        "accepted_at": st.session_state.get("accepted_at"),
-        "progress_tracker": st.session_state.get("progress_tracker", {})
-    })
+    data = _session_user_data()
+    digest = _digest(data)
+    key = "_userdata_digest"
+    if st.session_state.get(key) == digest and st.session_state.get("_userdata_email") == user_email:
+        metrics.incr("userdata.unchanged")
+        return
+    metrics.incr("userdata.writes")
+    save_user_data(user_email, data)
+    st.session_state[key] = digest
+    st.session_state["_userdata_email"] = user_email